@@ -0,0 +1,560 @@
+"""
+TecDoc Article Export
+=====================
+
+Streaming export of article pages to CSV, JSONL, a columnar binary format
+and XLSX, in constant memory.
+
+Writers accept article dicts (or ``ArticleTable`` rows) batch by batch,
+typically one ``get_articles`` page at a time, and never hold more than
+one row group in memory. All writers support:
+- compression: "gzip", "bz2" or "xz" (CSV/JSONL whole file, columnar per
+  column chunk; XLSX is always deflate-compressed by its ZIP container)
+- rotation: a new file ``<name>-00001.<ext>`` is started once the current
+  file reaches ``max_bytes``
+
+The columnar format stores each row group as the column buffers of an
+``ArticleTable`` (packed article numbers, uint32 ID columns,
+dictionary-coded manufacturer names) followed by a JSON footer with the
+row group offsets, similar in spirit to Parquet; ``read_columnar`` reads
+it back one row group at a time.
+
+XLSX files are written with the standard library only: rows are streamed
+into the worksheet entry of the ZIP archive as inline strings.
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import itertools
+import json
+import logging
+import lzma
+import os
+import re
+import struct
+import sys
+import zipfile
+import zlib
+from typing import Any, BinaryIO, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from article_table import ArticleTable
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("number", "manufacturer_id", "manufacturer_name", "data_supplier_id")
+
+# Header labels of the XLSX export (as in examples/MANN-FILTER_10_Artikel.xlsx)
+XLSX_LABELS = ("Artikelnummer", "Hersteller-ID", "Hersteller-Name", "DataSupplier-ID")
+XLSX_MAX_ROWS = 1048576
+
+COLUMNAR_MAGIC = b"TDCOL\x01\x00\x00"
+COLUMNAR_VERSION = 1
+_FOOTER_LENGTH = struct.Struct("<I")
+
+_OPENERS = {
+    "gzip": lambda raw: gzip.GzipFile(fileobj=raw, mode="wb"),
+    "bz2": lambda raw: bz2.BZ2File(raw, mode="wb"),
+    "xz": lambda raw: lzma.LZMAFile(raw, mode="wb"),
+}
+_CODECS = {
+    None: (lambda data: data, lambda data: data),
+    "gzip": (zlib.compress, zlib.decompress),
+    "bz2": (bz2.compress, bz2.decompress),
+    "xz": (lzma.compress, lzma.decompress),
+}
+
+# Characters not allowed in XML 1.0 documents
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert an optional numeric ID to int."""
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _row(article: Dict[str, Any]) -> Tuple[str, Optional[int], Optional[str], Optional[int]]:
+    """Convert an article dict or table row to a (number, mfr ID, mfr name, supplier ID) tuple."""
+    return (
+        article["number"],
+        _to_int(article.get("manufacturer_id")),
+        article.get("manufacturer_name"),
+        _to_int(article.get("data_supplier_id")),
+    )
+
+
+class ExportWriter:
+    """
+    Base class of the streaming export writers.
+
+    Subclasses implement ``_open_part``, ``_write_chunk`` and ``_close_part``.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        path: str,
+        compression: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        row_group_size: int = 10000
+    ) -> None:
+        """
+        Initialize writer. Files are created as row groups are written.
+
+        Args:
+            path: Output file path; rotated parts are named ``<stem>-00001<ext>``
+            compression: "gzip", "bz2", "xz" or None (default: None)
+            max_bytes: Start a new file once the current one reaches this
+                size on disk, checked after every row group; compressed text
+                files may overshoot by the compressor's buffer (default: no
+                rotation)
+            row_group_size: Rows buffered before they are written, i.e. the
+                rows per row group of columnar files (default: 10000)
+        """
+        if compression not in _CODECS:
+            raise ValueError(f"{self.__class__.__name__}: unknown compression {compression!r}")
+        if row_group_size < 1:
+            raise ValueError(f"{self.__class__.__name__}: row_group_size must be >= 1")
+
+        self.path = path
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.row_group_size = row_group_size
+
+        self.paths: List[str] = []
+        self.rows = 0
+        self._pending: List[Tuple] = []
+        self._part_rows = 0
+        self._raw: Optional[BinaryIO] = None
+        self._closed = False
+
+    def _part_path(self, part: int) -> str:
+        """Get the file name of one part."""
+        if part == 0:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        if ext in (".gz", ".bz2", ".xz"):
+            stem, inner = os.path.splitext(stem)
+            ext = inner + ext
+        return f"{stem}-{part:05d}{ext}"
+
+    def _start_part(self) -> None:
+        """Open the next output file."""
+        path = self._part_path(len(self.paths))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._raw = open(path, "wb")
+        self._part_rows = 0
+        self.paths.append(path)
+        self._open_part(self._raw)
+        logger.debug(f"Export file started: {path}")
+
+    def _finish_part(self) -> None:
+        """Close the current output file."""
+        if self._raw is not None:
+            self._close_part()
+            self._raw.close()
+            self._raw = None
+
+    def _part_full(self) -> bool:
+        """Whether the current file has reached its size limit."""
+        return self.max_bytes is not None and self._raw.tell() >= self.max_bytes
+
+    def write(self, articles: Iterable[Dict[str, Any]]) -> int:
+        """
+        Write a batch of articles (e.g. one page).
+
+        Rows are buffered across calls and written one full row group at a
+        time; ``close()`` writes the rest.
+
+        Args:
+            articles: Article dicts as returned by ``get_articles`` or table rows
+
+        Returns:
+            Number of rows accepted
+        """
+        if self._closed:
+            raise ValueError(f"{self.__class__.__name__}: writer is closed")
+
+        written = 0
+        rows = map(_row, articles)
+        while True:
+            chunk = list(itertools.islice(rows, self.row_group_size - len(self._pending)))
+            if not chunk:
+                break
+            self._pending += chunk
+            written += len(chunk)
+            if len(self._pending) >= self.row_group_size:
+                self._flush()
+        self.rows += written
+        return written
+
+    def _flush(self) -> None:
+        """Write the buffered rows, rotating files as needed."""
+        chunk, self._pending = self._pending, []
+        while chunk:
+            if self._raw is None:
+                self._start_part()
+            room = self._room()
+            part, chunk = chunk[:room], chunk[room:]
+            self._write_chunk(part)
+            self._part_rows += len(part)
+            if chunk or self._part_full():
+                self._finish_part()
+
+    def _room(self) -> int:
+        """Rows that still fit into the current file (apart from the size limit)."""
+        return sys.maxsize
+
+    def close(self) -> None:
+        """Write the buffered rows and finish the current file."""
+        if not self._closed:
+            self._closed = True
+            self._flush()
+            if not self.paths:
+                # An empty export still produces a (header-only) file
+                self._start_part()
+            self._finish_part()
+            logger.info(f"Exported {self.rows} rows to {len(self.paths)} file(s)")
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # Format hooks
+
+    def _open_part(self, raw: BinaryIO) -> None:
+        raise NotImplementedError
+
+    def _write_chunk(self, rows: List[Tuple]) -> None:
+        raise NotImplementedError
+
+    def _close_part(self) -> None:
+        raise NotImplementedError
+
+
+class _TextWriter(ExportWriter):
+    """Writer of line-based text formats with whole-file compression."""
+
+    def _open_part(self, raw: BinaryIO) -> None:
+        self._stream = _OPENERS[self.compression](raw) if self.compression else None
+        self._text = io.TextIOWrapper(self._stream or raw, encoding="utf-8", newline="")
+        self._write_header()
+
+    def _write_header(self) -> None:
+        pass
+
+    def _close_part(self) -> None:
+        self._text.flush()
+        self._text.detach()
+        if self._stream is not None:
+            self._stream.close()
+
+    def _part_full(self) -> bool:
+        self._text.flush()
+        return super()._part_full()
+
+
+class CsvExportWriter(_TextWriter):
+    """CSV with a header row in every file."""
+
+    extension = ".csv"
+
+    def _write_header(self) -> None:
+        self._csv = csv.writer(self._text)
+        self._csv.writerow(COLUMNS)
+
+    def _write_chunk(self, rows: List[Tuple]) -> None:
+        self._csv.writerows(rows)
+
+
+class JsonlExportWriter(_TextWriter):
+    """One JSON object per line."""
+
+    extension = ".jsonl"
+
+    def _write_chunk(self, rows: List[Tuple]) -> None:
+        self._text.write("".join(
+            json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+        ))
+
+
+class ColumnarExportWriter(ExportWriter):
+    """
+    Columnar binary files made of ``ArticleTable`` row groups.
+
+    Layout: magic, column chunks of every row group, JSON footer, footer
+    length (uint32 LE), magic.
+    """
+
+    extension = ".tdcol"
+
+    def _open_part(self, raw: BinaryIO) -> None:
+        raw.write(COLUMNAR_MAGIC)
+        self._row_groups: List[Dict[str, Any]] = []
+
+    def _write_chunk(self, rows: List[Tuple]) -> None:
+        table = ArticleTable()
+        for row in rows:
+            table.append(*row)
+
+        compress = _CODECS[self.compression][0]
+        chunks = {}
+        for name, data in table.to_buffers().items():
+            data = compress(data)
+            chunks[name] = [self._raw.tell(), len(data)]
+            self._raw.write(data)
+        self._row_groups.append({"rows": len(table), "chunks": chunks})
+
+    def _close_part(self) -> None:
+        footer = json.dumps({
+            "version": COLUMNAR_VERSION,
+            "columns": list(COLUMNS),
+            "compression": self.compression,
+            "byteorder": sys.byteorder,
+            "row_groups": self._row_groups,
+        }).encode("utf-8")
+        self._raw.write(footer)
+        self._raw.write(_FOOTER_LENGTH.pack(len(footer)))
+        self._raw.write(COLUMNAR_MAGIC)
+
+
+def read_columnar(path: str) -> Iterator[ArticleTable]:
+    """
+    Read a columnar export file one row group at a time.
+
+    Args:
+        path: File written by ``ColumnarExportWriter``
+
+    Yields:
+        One ``ArticleTable`` per row group
+
+    Raises:
+        ValueError: If the file is not a columnar export
+    """
+    with open(path, "rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"read_columnar: not a columnar export: {path}")
+        f.seek(-(len(COLUMNAR_MAGIC) + _FOOTER_LENGTH.size), os.SEEK_END)
+        (length,) = _FOOTER_LENGTH.unpack(f.read(_FOOTER_LENGTH.size))
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"read_columnar: truncated columnar export: {path}")
+        f.seek(-(len(COLUMNAR_MAGIC) + _FOOTER_LENGTH.size + length), os.SEEK_END)
+        footer = json.loads(f.read(length).decode("utf-8"))
+
+        decompress = _CODECS[footer["compression"]][1]
+        for group in footer["row_groups"]:
+            buffers = {}
+            for name, (offset, size) in group["chunks"].items():
+                f.seek(offset)
+                buffers[name] = decompress(f.read(size))
+            yield ArticleTable.from_buffers(buffers, footer["byteorder"])
+
+
+class XlsxExportWriter(ExportWriter):
+    """
+    XLSX workbook with one worksheet, streamed row by row.
+
+    Files are also rotated when a worksheet reaches the Excel row limit.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(
+        self,
+        path: str,
+        compression: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        row_group_size: int = 10000,
+        sheet_name: str = "Artikel",
+        labels: Tuple[str, ...] = XLSX_LABELS
+    ) -> None:
+        """
+        Initialize XLSX writer.
+
+        Args:
+            path: Output file path
+            compression: Must be None; the ZIP container is always deflated
+            max_bytes: Start a new workbook once the current one reaches this size
+            row_group_size: Rows buffered before they are written (default: 10000)
+            sheet_name: Worksheet name (default: "Artikel")
+            labels: Header row labels
+        """
+        if compression is not None:
+            raise ValueError("XlsxExportWriter: XLSX files are always deflate-compressed")
+        super().__init__(path, None, max_bytes, row_group_size)
+        self.sheet_name = sheet_name
+        self.labels = labels
+
+    def _room(self) -> int:
+        return XLSX_MAX_ROWS - 1 - self._part_rows
+
+    def _open_part(self, raw: BinaryIO) -> None:
+        self._zip = zipfile.ZipFile(raw, "w", compression=zipfile.ZIP_DEFLATED)
+        self._sheet: IO[bytes] = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._row_number = 1
+        header = "".join(
+            f'<c r="{column}1" s="1" t="inlineStr"><is><t>{escape(label)}</t></is></c>'
+            for column, label in zip("ABCD", self.labels)
+        )
+        self._sheet.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<cols><col min="1" max="1" width="25" customWidth="1"/>'
+            '<col min="2" max="2" width="15" customWidth="1"/>'
+            '<col min="3" max="3" width="20" customWidth="1"/>'
+            '<col min="4" max="4" width="18" customWidth="1"/></cols>'
+            f'<sheetData><row r="1">{header}</row>'
+        ).encode("utf-8"))
+
+    @staticmethod
+    def _cell(ref: str, value: Any) -> str:
+        """Render one cell."""
+        if value is None:
+            return ""
+        if isinstance(value, int):
+            return f'<c r="{ref}" t="n"><v>{value}</v></c>'
+        text = escape(_XML_INVALID.sub("", str(value)))
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def _write_chunk(self, rows: List[Tuple]) -> None:
+        parts = []
+        for row in rows:
+            self._row_number += 1
+            n = self._row_number
+            cells = "".join(self._cell(f"{column}{n}", value) for column, value in zip("ABCD", row))
+            parts.append(f'<row r="{n}">{cells}</row>')
+        self._sheet.write("".join(parts).encode("utf-8"))
+
+    def _close_part(self) -> None:
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+
+        ns = "http://schemas.openxmlformats.org"
+        self._zip.writestr("[Content_Types].xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Types xmlns="{ns}/package/2006/content-types">'
+            f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            f'<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'<Override PartName="/xl/worksheets/sheet1.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            f'<Override PartName="/xl/styles.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'</Types>'
+        ))
+        self._zip.writestr("_rels/.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{ns}/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/officeDocument" '
+            f'Target="xl/workbook.xml"/></Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{ns}/spreadsheetml/2006/main" '
+            f'xmlns:r="{ns}/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(self.sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            f'</workbook>'
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{ns}/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{ns}/officeDocument/2006/relationships/styles" '
+            f'Target="styles.xml"/></Relationships>'
+        ))
+        self._zip.writestr("xl/styles.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<styleSheet xmlns="{ns}/spreadsheetml/2006/main">'
+            f'<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+            f'<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+            f'<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            f'<fill><patternFill patternType="gray125"/></fill></fills>'
+            f'<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            f'<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            f'<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+            f'</styleSheet>'
+        ))
+        self._zip.close()
+
+
+WRITERS = {
+    "csv": CsvExportWriter,
+    "jsonl": JsonlExportWriter,
+    "columnar": ColumnarExportWriter,
+    "xlsx": XlsxExportWriter,
+}
+
+
+def open_writer(path: str, format: Optional[str] = None, **options: Any) -> ExportWriter:
+    """
+    Create an export writer.
+
+    Args:
+        path: Output file path
+        format: "csv", "jsonl", "columnar" or "xlsx" (default: from the file
+            extension, ignoring a compression suffix)
+        **options: Writer options (compression, max_bytes, row_group_size, ...)
+
+    Returns:
+        Export writer
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if format is None:
+        stem, ext = os.path.splitext(path)
+        if ext in (".gz", ".bz2", ".xz"):
+            ext = os.path.splitext(stem)[1]
+        format = next((name for name, cls in WRITERS.items() if cls.extension == ext), None)
+    if format not in WRITERS:
+        raise ValueError(f"open_writer: unknown export format for {path!r}")
+    return WRITERS[format](path, **options)
+
+
+def export_articles(
+    client: Any,
+    path: str,
+    format: Optional[str] = None,
+    data_supplier_id: Optional[int] = None,
+    manufacturer_id: Optional[int] = None,
+    article_country: Optional[str] = None,
+    prefetch: int = 2,
+    **options: Any
+) -> Dict[str, Any]:
+    """
+    Export all articles of a query page by page.
+
+    Articles are streamed from ``client.iter_articles`` into the writer, so
+    memory stays bounded by the read-ahead pages and one row group.
+
+    Args:
+        client: ``TecDocClient``
+        path: Output file path
+        format: Export format (default: from the file extension)
+        data_supplier_id: Filter by parts supplier
+        manufacturer_id: Filter by car manufacturer
+        article_country: Article country code (default: same as client country)
+        prefetch: Pages fetched ahead in background (default: 2)
+        **options: Writer options (compression, max_bytes, row_group_size, ...)
+
+    Returns:
+        Dict with rows written and the list of files
+    """
+    with open_writer(path, format, **options) as writer:
+        writer.write(client.iter_articles(
+            data_supplier_id=data_supplier_id,
+            manufacturer_id=manufacturer_id,
+            article_country=article_country,
+            prefetch=prefetch,
+        ))
+    return {"rows": writer.rows, "files": writer.paths}
@@ -0,0 +1,594 @@
+"""
+TecDoc Article Number Search
+============================
+
+In-memory search index over crawled article numbers.
+
+Counter staff type part numbers in many spellings ("HU 816 x", "HU816X",
+"hu-816x"). The index normalizes numbers to upper-case ASCII letters and
+digits and answers, across all suppliers:
+- exact lookups of the normalized number
+- prefix lookups (binary search over the sorted keys)
+- fuzzy lookups by trigram similarity, for typos and missing characters
+
+Every hit carries the original article number, DataSupplier ID and
+manufacturer ID. Exact and prefix lookups are binary searches and take
+microseconds for millions of numbers; fuzzy lookups count trigram
+matches over the query's posting lists and take a few milliseconds.
+
+The index is stored in flat uint32 columns and byte blobs. ``save`` writes
+them to one file; ``load`` memory-maps that file and uses the columns in
+place, so opening an index of millions of numbers takes milliseconds.
+
+Feed it from ``TecDocClient.get_articles``/``iter_articles`` results,
+``ArticleTable`` rows or ``ArticleStore.iter_articles``.
+"""
+
+import heapq
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"TDARTIDX"
+INDEX_VERSION = 2
+# magic, version, big-endian flag, keys, entries, key bytes, number bytes, postings
+_HEADER = struct.Struct("<8sIIIIIII")
+
+# Trigram symbols: boundary markers, digits, letters
+_SYMBOLS = "^$0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_SYMBOL_CODES = {c: i for i, c in enumerate(_SYMBOLS)}
+GRAM_SPACE = len(_SYMBOLS) ** 3
+
+# Column = array('I') when built, memoryview('I') when memory-mapped
+Column = Union[array, memoryview]
+
+
+def normalize_number(number: str) -> str:
+    """
+    Normalize an article number for matching.
+
+    Strips accents, upper-cases and drops everything except ASCII letters
+    and digits ("hu-816 x" -> "HU816X").
+
+    Args:
+        number: Article number as stored or typed
+
+    Returns:
+        Normalized number
+    """
+    decomposed = unicodedata.normalize("NFKD", number)
+    return "".join(c for c in decomposed if c.isascii() and c.isalnum()).upper()
+
+
+def _gram_codes(key: str) -> Set[int]:
+    """Get the codes of the boundary-padded trigrams of a normalized number."""
+    codes = [_SYMBOL_CODES[c] for c in f"^{key}$"]
+    return {
+        (codes[i] * len(_SYMBOLS) + codes[i + 1]) * len(_SYMBOLS) + codes[i + 2]
+        for i in range(len(codes) - 2)
+    }
+
+
+def _to_id(value: Any) -> int:
+    """Convert an optional numeric ID to a column value (0 for missing)."""
+    if value is None or value == "":
+        return 0
+    return int(value)
+
+
+def _ends(blobs: Sequence[bytes]) -> array:
+    """Get the end offsets (with leading 0) of concatenated blobs."""
+    ends = array("I", [0])
+    total = 0
+    for blob in blobs:
+        total += len(blob)
+        ends.append(total)
+    return ends
+
+
+def _pad(blob: bytes) -> bytes:
+    """Pad a blob to a multiple of 4 bytes so the next column stays aligned."""
+    return blob + b"\0" * (-len(blob) % 4)
+
+
+class ArticleSearchIndex:
+    """
+    Normalized article-number index with exact, prefix and fuzzy lookup.
+
+    Add articles with ``add``; the search structures are rebuilt on the
+    next lookup after an ``add``. Lookups are thread-safe once built.
+    """
+
+    def __init__(self) -> None:
+        # (data_supplier_id, number) -> manufacturer_id, not yet in the columns
+        self._pending: Dict[Tuple[int, str], int] = {}
+
+        self._key_ends: Column = array("I", [0])
+        self._keys: Union[bytes, mmap.mmap] = b""
+        self._entry_starts: Column = array("I", [0])
+        self._number_ends: Column = array("I", [0])
+        self._numbers: Union[bytes, mmap.mmap] = b""
+        self._supplier_ids: Column = array("I")
+        self._mfr_ids: Column = array("I")
+        self._gram_starts: Column = array("I", [0] * (GRAM_SPACE + 1))
+        self._postings: Column = array("I")
+        # Distinct trigrams per key (the key's side of the Dice denominator)
+        self._gram_counts: Column = array("I")
+
+        self._mmap: Optional[mmap.mmap] = None
+        self._views: List[memoryview] = []
+
+    # ===== Building =====
+
+    def add(self, articles: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add articles; an article already indexed for the same supplier is
+        replaced.
+
+        Args:
+            articles: Article dicts or rows with ``number``,
+                ``data_supplier_id`` and ``manufacturer_id``
+
+        Returns:
+            Number of articles read
+        """
+        count = 0
+        for article in articles:
+            number = article["number"]
+            if normalize_number(number):
+                key = (_to_id(article.get("data_supplier_id")), number)
+                self._pending[key] = _to_id(article.get("manufacturer_id"))
+            count += 1
+        return count
+
+    def _entries(self) -> Iterable[Tuple[Tuple[int, str], int]]:
+        """Get the indexed entries as ((supplier, number), manufacturer)."""
+        for i in range(len(self._supplier_ids)):
+            yield (self._supplier_ids[i], self.number(i)), self._mfr_ids[i]
+
+    def _build(self) -> None:
+        """Merge pending articles into the columns and rebuild the search structures."""
+        entries = dict(self._entries())
+        entries.update(self._pending)
+        self._pending = {}
+        self._release()
+
+        records = sorted(
+            (normalize_number(number), supplier_id, number, mfr_id)
+            for (supplier_id, number), mfr_id in entries.items()
+        )
+
+        keys: List[str] = []
+        entry_starts = array("I")
+        for i, (key, _, _, _) in enumerate(records):
+            if not keys or keys[-1] != key:
+                keys.append(key)
+                entry_starts.append(i)
+        entry_starts.append(len(records))
+
+        encoded_keys = [key.encode("ascii") for key in keys]
+        encoded_numbers = [number.encode("utf-8") for _, _, number, _ in records]
+        self._key_ends = _ends(encoded_keys)
+        self._keys = b"".join(encoded_keys)
+        self._entry_starts = entry_starts
+        self._number_ends = _ends(encoded_numbers)
+        self._numbers = b"".join(encoded_numbers)
+        self._supplier_ids = array("I", (supplier_id for _, supplier_id, _, _ in records))
+        self._mfr_ids = array("I", (mfr_id for _, _, _, mfr_id in records))
+
+        postings: Dict[int, List[int]] = defaultdict(list)
+        gram_counts = array("I")
+        for key_index, key in enumerate(keys):
+            codes = _gram_codes(key)
+            gram_counts.append(len(codes))
+            for code in codes:
+                postings[code].append(key_index)
+        gram_starts = array("I", [0] * (GRAM_SPACE + 1))
+        flat = array("I")
+        for code in range(GRAM_SPACE):
+            flat.extend(postings.get(code, ()))
+            gram_starts[code + 1] = len(flat)
+        self._gram_starts = gram_starts
+        self._postings = flat
+        self._gram_counts = gram_counts
+
+        logger.info(f"Article search index built: {len(records)} articles, {len(keys)} distinct numbers")
+
+    def _ready(self) -> None:
+        """Build the search structures if articles were added."""
+        if self._pending:
+            self._build()
+
+    # ===== Persistence =====
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a file (atomically replaced).
+
+        Args:
+            path: Index file
+        """
+        self._ready()
+        parts = [
+            _HEADER.pack(
+                INDEX_MAGIC, INDEX_VERSION, int(sys.byteorder == "big"),
+                len(self._key_ends) - 1, len(self._supplier_ids),
+                self._key_ends[-1], self._number_ends[-1], len(self._postings),
+            ),
+            bytes(self._key_ends),
+            _pad(bytes(self._keys)),
+            bytes(self._entry_starts),
+            bytes(self._number_ends),
+            _pad(bytes(self._numbers)),
+            bytes(self._supplier_ids),
+            bytes(self._mfr_ids),
+            bytes(self._gram_starts),
+            bytes(self._postings),
+            bytes(self._gram_counts),
+        ]
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            for part in parts:
+                f.write(part)
+        os.replace(temp_path, path)
+        logger.info(f"Article search index written to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "ArticleSearchIndex":
+        """
+        Open an index file.
+
+        The file is memory-mapped and its columns are used in place (copied
+        only if it was written on a machine with another byte order).
+
+        Args:
+            path: Index file written by ``save``
+
+        Returns:
+            Index; call ``close`` to unmap the file
+
+        Raises:
+            ValueError: If the file is not an article search index
+        """
+        index = cls()
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, big_endian, keys, entries, key_bytes, number_bytes, postings = (
+                _HEADER.unpack_from(mm, 0)
+            )
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"ArticleSearchIndex: {path} is not an article search index")
+            if version != INDEX_VERSION:
+                raise ValueError(f"ArticleSearchIndex: {path} has index version {version}, rebuild it")
+            swap = bool(big_endian) != (sys.byteorder == "big")
+
+            offset = _HEADER.size
+
+            def column(length: int) -> Column:
+                nonlocal offset
+                size = length * 4
+                if swap:
+                    values = array("I")
+                    values.frombytes(mm[offset:offset + size])
+                    values.byteswap()
+                else:
+                    values = memoryview(mm)[offset:offset + size].cast("I")
+                    index._views.append(values)
+                offset += size
+                return values
+
+            def blob(length: int) -> Tuple[int, int]:
+                nonlocal offset
+                start = offset
+                offset += length + (-length % 4)
+                return start, length
+
+            index._key_ends = column(keys + 1)
+            keys_at = blob(key_bytes)
+            index._entry_starts = column(keys + 1)
+            index._number_ends = column(entries + 1)
+            numbers_at = blob(number_bytes)
+            index._supplier_ids = column(entries)
+            index._mfr_ids = column(entries)
+            index._gram_starts = column(GRAM_SPACE + 1)
+            index._postings = column(postings)
+            index._gram_counts = column(keys)
+            if offset > len(mm):
+                raise ValueError(f"ArticleSearchIndex: {path} is truncated")
+
+            # Blobs are sliced straight from the map
+            index._keys = _Slice(mm, *keys_at)
+            index._numbers = _Slice(mm, *numbers_at)
+            index._mmap = mm
+        except Exception:
+            index._release()
+            mm.close()
+            raise
+        return index
+
+    def _release(self) -> None:
+        """Drop the memory-mapped columns (the data must have been copied)."""
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def close(self) -> None:
+        """Unmap a loaded index file. The index is empty afterwards."""
+        self._release()
+        self.__init__()
+
+    def __enter__(self) -> "ArticleSearchIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # ===== Lookups =====
+
+    def __len__(self) -> int:
+        """Number of indexed articles."""
+        self._ready()
+        return len(self._supplier_ids)
+
+    def key(self, key_index: int) -> str:
+        """Get a normalized number by its position in the sorted key list."""
+        return self._keys[self._key_ends[key_index]:self._key_ends[key_index + 1]].decode("ascii")
+
+    def number(self, entry: int) -> str:
+        """Get the original article number of an entry."""
+        return self._numbers[self._number_ends[entry]:self._number_ends[entry + 1]].decode("utf-8")
+
+    def _bisect(self, key: str) -> int:
+        """Position of the first key >= ``key``."""
+        target = key.encode("ascii")
+        lo, hi = 0, len(self._key_ends) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._keys[self._key_ends[mid]:self._key_ends[mid + 1]] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _hits(self, key_index: int, match: str, score: float) -> List[Dict[str, Any]]:
+        """Get the articles of one key as result dicts."""
+        return [
+            {
+                "number": self.number(entry),
+                "data_supplier_id": self._supplier_ids[entry] or None,
+                "manufacturer_id": self._mfr_ids[entry] or None,
+                "match": match,
+                "score": score,
+            }
+            for entry in range(self._entry_starts[key_index], self._entry_starts[key_index + 1])
+        ]
+
+    def exact(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Find the articles whose normalized number equals the query's.
+
+        Args:
+            query: Article number in any spelling
+
+        Returns:
+            Hits with ``number``, ``data_supplier_id``, ``manufacturer_id``,
+            ``match`` ("exact") and ``score`` (1.0)
+        """
+        self._ready()
+        key = normalize_number(query)
+        if not key:
+            return []
+        position = self._bisect(key)
+        if position < len(self._key_ends) - 1 and self.key(position) == key:
+            return self._hits(position, "exact", 1.0)
+        return []
+
+    def prefix(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find articles whose normalized number starts with the query's.
+
+        Args:
+            query: Beginning of an article number
+            limit: Maximum number of hits (default: 20)
+
+        Returns:
+            Hits in normalized-number order, ``match`` "exact" or "prefix"
+        """
+        self._ready()
+        key = normalize_number(query)
+        if not key:
+            return []
+        hits: List[Dict[str, Any]] = []
+        position = self._bisect(key)
+        while position < len(self._key_ends) - 1 and len(hits) < limit:
+            candidate = self.key(position)
+            if not candidate.startswith(key):
+                break
+            exact = candidate == key
+            score = 1.0 if exact else round(len(key) / len(candidate), 3)
+            hits += self._hits(position, "exact" if exact else "prefix", score)
+            position += 1
+        return hits[:limit]
+
+    def fuzzy(
+        self,
+        query: str,
+        limit: int = 20,
+        min_similarity: float = 0.3,
+        max_postings: int = 50000
+    ) -> List[Dict[str, Any]]:
+        """
+        Find articles by trigram similarity of the normalized number.
+
+        Similarity is the Dice coefficient of the trigram sets (twice the
+        shared trigrams over both counts). A transposed pair of digits in a
+        short number ("HU861X" for "HU 816 x") still shares a third of its
+        trigrams and scores 0.33, above the default ``min_similarity``.
+
+        Trigram occurrences are first counted over the query's posting lists
+        up to ``max_postings`` long (long lists belong to trigrams shared by
+        a large part of the catalogue, e.g. a supplier's number prefix).
+        Candidates are scored best count first until no remaining key can
+        reach the best ``limit`` scores. The long lists are only scanned
+        when a key found on them alone could still rank, so the result is
+        the same as scanning every list.
+
+        Args:
+            query: Possibly misspelled article number
+            limit: Maximum number of hits (default: 20)
+            min_similarity: Minimum Dice similarity of the trigram sets (default: 0.3)
+            max_postings: Longest posting list scanned up front (default: 50000)
+
+        Returns:
+            Hits by descending ``score`` (similarity), ``match`` "fuzzy"
+            (or "exact" for the normalized query itself)
+        """
+        if not 0 < min_similarity <= 1:
+            raise ValueError("fuzzy: min_similarity must be in (0, 1]")
+        self._ready()
+        key = normalize_number(query)
+        if not key:
+            return []
+
+        query_grams = _gram_codes(key)
+        lists = sorted(
+            (self._gram_starts[code + 1] - self._gram_starts[code], self._gram_starts[code])
+            for code in query_grams
+        )
+
+        counts: Counter = Counter()
+        scanned = 0
+        for length, start in lists:
+            if length > max_postings and scanned:
+                break
+            counts.update(self._postings[start:start + length])
+            scanned += 1
+
+        unscanned = lists[scanned:]
+        scored = self._score(len(query_grams), counts, unscanned, limit, min_similarity)
+        if unscanned:
+            # A key on the unscanned lists only shares at most len(unscanned) trigrams
+            bound = 2 * len(unscanned) / (len(query_grams) + len(unscanned))
+            if bound >= min_similarity and (len(scored) < limit or -scored[-1][0] <= bound):
+                for length, start in unscanned:
+                    counts.update(self._postings[start:start + length])
+                scored = self._score(len(query_grams), counts, [], limit, min_similarity)
+
+        hits: List[Dict[str, Any]] = []
+        for negative, key_index in scored:
+            match = "exact" if negative == -1.0 and self.key(key_index) == key else "fuzzy"
+            hits += self._hits(key_index, match, round(-negative, 3))
+            if len(hits) >= limit:
+                break
+        return hits[:limit]
+
+    def _score(
+        self,
+        query_count: int,
+        counts: Counter,
+        unscanned: List[Tuple[int, int]],
+        limit: int,
+        min_similarity: float
+    ) -> List[Tuple[float, int]]:
+        """
+        Score candidate keys, best trigram count first.
+
+        ``counts`` holds the trigrams each key shares on the scanned lists;
+        a candidate's ``unscanned`` (length, start) lists are checked by
+        binary search, as posting lists are sorted by key index. Stops once
+        no lower count can beat the ``limit``-th best similarity.
+
+        Returns:
+            The best ``limit`` (negative similarity, key index) pairs, sorted
+        """
+        # Dice 2s / (q + g) with g >= s grows with s: keys sharing fewer
+        # trigrams than this cannot reach min_similarity
+        least = math.ceil(min_similarity * query_count / (2 - min_similarity) - 1e-9) - len(unscanned)
+        candidates = sorted(
+            ((shared, key_index) for key_index, shared in counts.items() if shared >= least),
+            reverse=True
+        )
+
+        # Min-heap of the best (similarity, -key index) pairs so far
+        best: List[Tuple[float, int]] = []
+        postings = self._postings
+        gram_counts = self._gram_counts
+        level = None
+        for shared, key_index in candidates:
+            if shared != level:
+                level = shared
+                most = shared + len(unscanned)
+                bound = 2 * most / (query_count + most)
+                if bound < min_similarity or (len(best) >= limit and best[0][0] > bound):
+                    break
+            denominator = query_count + gram_counts[key_index]
+            if unscanned:
+                if len(best) >= limit and 2 * most / denominator < best[0][0]:
+                    continue
+                for length, start in unscanned:
+                    position = bisect_left(postings, key_index, start, start + length)
+                    if position < start + length and postings[position] == key_index:
+                        shared += 1
+            similarity = 2 * shared / denominator
+            if similarity >= min_similarity:
+                if len(best) < limit:
+                    heapq.heappush(best, (similarity, -key_index))
+                elif (similarity, -key_index) > best[0]:
+                    heapq.heapreplace(best, (similarity, -key_index))
+        return sorted((-similarity, -negative_index) for similarity, negative_index in best)
+
+    def search(self, query: str, limit: int = 20, min_similarity: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Find articles by exact number, then prefix, then similarity.
+
+        Args:
+            query: Article number in any spelling, a prefix or a misspelling
+            limit: Maximum number of hits (default: 20)
+            min_similarity: Minimum similarity of fuzzy hits (default: 0.3)
+
+        Returns:
+            Hits, best first, each article at most once
+        """
+        hits = self.prefix(query, limit)
+        if len(hits) < limit:
+            seen = {(hit["data_supplier_id"], hit["number"]) for hit in hits}
+            for hit in self.fuzzy(query, limit, min_similarity):
+                if (hit["data_supplier_id"], hit["number"]) not in seen and len(hits) < limit:
+                    hits.append(hit)
+        return hits
+
+
+class _Slice:
+    """Read-only byte range of a memory map, sliceable like ``bytes``."""
+
+    __slots__ = ("_mm", "_start", "_length")
+
+    def __init__(self, mm: mmap.mmap, start: int, length: int) -> None:
+        self._mm = mm
+        self._start = start
+        self._length = length
+
+    def __getitem__(self, index: slice) -> bytes:
+        return self._mm[self._start + index.start:self._start + index.stop]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bytes__(self) -> bytes:
+        return self._mm[self._start:self._start + self._length]
@@ -0,0 +1,384 @@
+"""
+TecDoc Article Store
+====================
+
+Local SQLite store for crawled TecDoc articles and reference data.
+
+Tables:
+- suppliers: DataSuppliers from ``data/datasuppliers.json``
+- manufacturers: Car manufacturers from ``data/manufacturers.json``
+- articles: One row per (dataSupplierId, articleNumber), indexed on
+  article number, supplier ID and mfrId
+
+Articles are written in batched transactional upserts, directly from
+``TecDocClient.iter_articles`` or ``get_articles`` results.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    article_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS manufacturers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    data_supplier_id INTEGER NOT NULL,
+    article_number TEXT NOT NULL,
+    mfr_id INTEGER,
+    mfr_name TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (data_supplier_id, article_number)
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS articles_number ON articles (article_number);
+CREATE INDEX IF NOT EXISTS articles_mfr ON articles (mfr_id);
+"""
+
+UPSERT_ARTICLE = """
+INSERT INTO articles (data_supplier_id, article_number, mfr_id, mfr_name, updated)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (data_supplier_id, article_number) DO UPDATE SET
+    mfr_id = excluded.mfr_id,
+    mfr_name = excluded.mfr_name,
+    updated = excluded.updated
+"""
+
+ArticleRow = Tuple[int, str, Optional[int], Optional[str], float]
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Convert an ID from the API (str or int) to int."""
+    return int(value) if value not in (None, "") else None
+
+
+def article_row(
+    article: Dict[str, Any],
+    data_supplier_id: Optional[int] = None,
+    updated: Optional[float] = None
+) -> ArticleRow:
+    """
+    Convert an article dict to a table row.
+
+    Accepts both ``TecDocClient`` dicts (number, manufacturer_id, ...) and
+    ``TecDocAPI`` dicts (articleNumber, mfrId, ...).
+
+    Args:
+        article: Article dict
+        data_supplier_id: Supplier to use when the article has none
+        updated: Row timestamp (default: now)
+
+    Returns:
+        Tuple of (data_supplier_id, article_number, mfr_id, mfr_name, updated)
+
+    Raises:
+        ValueError: If no DataSupplier ID is known for the article
+    """
+    if "number" in article:
+        number = article["number"]
+        supplier = _to_int(article.get("data_supplier_id"))
+        mfr_id = _to_int(article.get("manufacturer_id"))
+        mfr_name = article.get("manufacturer_name")
+    else:
+        number = article["articleNumber"]
+        supplier = _to_int(article.get("dataSupplierId"))
+        mfr_id = _to_int(article.get("mfrId"))
+        mfr_name = article.get("mfrName")
+
+    supplier = supplier if supplier is not None else data_supplier_id
+    if supplier is None:
+        raise ValueError(f"ArticleStore: no DataSupplier ID for article {number!r}")
+
+    return supplier, number, mfr_id, mfr_name, time.time() if updated is None else updated
+
+
+class ArticleStore:
+    """
+    SQLite-backed article store.
+
+    Thread-safe; all statements run on one connection guarded by a lock.
+    """
+
+    def __init__(self, path: str = "tecdoc_articles.sqlite", batch_size: int = 5000) -> None:
+        """
+        Open (or create) an article store.
+
+        Args:
+            path: SQLite database file (":memory:" for a temporary store)
+            batch_size: Rows per upsert transaction (default: 5000)
+        """
+        if batch_size < 1:
+            raise ValueError("ArticleStore: batch_size must be >= 1")
+
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA + INDEXES)
+
+    def load_reference_data(self, data_dir: str = "data") -> Tuple[int, int]:
+        """
+        Load suppliers and manufacturers from the JSON reference data.
+
+        Args:
+            data_dir: Directory with datasuppliers.json and manufacturers.json
+
+        Returns:
+            Tuple of (suppliers, manufacturers) loaded
+        """
+        with open(os.path.join(data_dir, "datasuppliers.json"), "r", encoding="utf-8") as f:
+            suppliers = json.load(f)["datasuppliers"]
+        with open(os.path.join(data_dir, "manufacturers.json"), "r", encoding="utf-8") as f:
+            manufacturers = json.load(f)["manufacturers"]["data"]
+
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO suppliers (id, name, article_count) VALUES (?, ?, ?)",
+                ((int(s["id"]), s["name"], s.get("articles")) for s in suppliers),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO manufacturers (id, name) VALUES (?, ?)",
+                ((int(m["id"]), m["name"]) for m in manufacturers),
+            )
+            self._db.execute("COMMIT")
+
+        logger.info(f"Loaded {len(suppliers)} suppliers and {len(manufacturers)} manufacturers")
+        return len(suppliers), len(manufacturers)
+
+    def upsert_articles(
+        self,
+        articles: Iterable[Dict[str, Any]],
+        data_supplier_id: Optional[int] = None
+    ) -> int:
+        """
+        Insert or update articles in batched transactions.
+
+        Consumes the iterable lazily, so it can be fed straight from
+        ``TecDocClient.iter_articles``.
+
+        Args:
+            articles: Article dicts
+            data_supplier_id: Supplier for articles that carry no DataSupplier ID
+
+        Returns:
+            Number of rows written
+        """
+        now = time.time()
+        rows = (article_row(article, data_supplier_id, now) for article in articles)
+        return self._write_rows(rows)
+
+    def _write_rows(self, rows: Iterable[ArticleRow]) -> int:
+        """Write rows in transactions of ``batch_size``."""
+        written = 0
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with self._lock:
+                self._db.execute("BEGIN")
+                try:
+                    self._db.executemany(UPSERT_ARTICLE, batch)
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._db.execute("COMMIT")
+            written += len(batch)
+        return written
+
+    def bulk_load(
+        self,
+        articles: Iterable[Dict[str, Any]],
+        data_supplier_id: Optional[int] = None
+    ) -> int:
+        """
+        Load a large number of articles as fast as possible.
+
+        Secondary indexes are dropped during the load and rebuilt once at
+        the end, and fsync is disabled until the load completes.
+
+        Args:
+            articles: Article dicts
+            data_supplier_id: Supplier for articles that carry no DataSupplier ID
+
+        Returns:
+            Number of rows written
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("DROP INDEX IF EXISTS articles_number")
+            self._db.execute("DROP INDEX IF EXISTS articles_mfr")
+
+        try:
+            written = self.upsert_articles(articles, data_supplier_id)
+        finally:
+            with self._lock:
+                self._db.executescript(INDEXES)
+                self._db.execute("PRAGMA synchronous=NORMAL")
+
+        logger.info(f"Bulk loaded {written} articles in {time.perf_counter() - started:.1f}s")
+        return written
+
+    def delete_articles(self, data_supplier_id: int, article_numbers: Iterable[str]) -> int:
+        """
+        Delete articles of one supplier.
+
+        Args:
+            data_supplier_id: Parts supplier
+            article_numbers: Article numbers to delete
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        numbers = iter(article_numbers)
+        while True:
+            batch = [(data_supplier_id, number) for number in islice(numbers, self.batch_size)]
+            if not batch:
+                break
+            with self._lock:
+                before = self._db.total_changes
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "DELETE FROM articles WHERE data_supplier_id = ? AND article_number = ?", batch
+                )
+                self._db.execute("COMMIT")
+                deleted += self._db.total_changes - before
+        return deleted
+
+    def suppliers_for_article(self, article_number: str) -> List[Dict[str, Any]]:
+        """
+        Find all suppliers carrying an article number.
+
+        Args:
+            article_number: Exact article number
+
+        Returns:
+            List of dicts with supplier ID/name and mfr ID/name
+        """
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT a.data_supplier_id, s.name, a.mfr_id, a.mfr_name
+                FROM articles a LEFT JOIN suppliers s ON s.id = a.data_supplier_id
+                WHERE a.article_number = ?
+                """,
+                (article_number,),
+            ).fetchall()
+        return [
+            {
+                "data_supplier_id": supplier_id,
+                "supplier_name": supplier_name,
+                "manufacturer_id": mfr_id,
+                "manufacturer_name": mfr_name,
+            }
+            for supplier_id, supplier_name, mfr_id, mfr_name in rows
+        ]
+
+    def iter_articles(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over stored articles with optional filters.
+
+        Args:
+            data_supplier_id: Filter by parts supplier
+            manufacturer_id: Filter by mfrId
+
+        Yields:
+            Article dicts in the ``TecDocClient`` format
+        """
+        where, args = self._filters(data_supplier_id, manufacturer_id)
+        where = f"{where} AND" if where else " WHERE"
+        last: Tuple[Any, ...] = (-1, "")
+
+        # Keyset pagination keeps memory flat and the lock short
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT data_supplier_id, article_number, mfr_id, mfr_name FROM articles"
+                    f"{where} (data_supplier_id, article_number) > (?, ?)"
+                    " ORDER BY data_supplier_id, article_number LIMIT ?",
+                    args + last + (self.batch_size,),
+                ).fetchall()
+            if not rows:
+                return
+            for supplier_id, number, mfr_id, mfr_name in rows:
+                yield {
+                    "number": number,
+                    "manufacturer_id": mfr_id,
+                    "manufacturer_name": mfr_name,
+                    "data_supplier_id": supplier_id,
+                }
+            last = rows[-1][:2]
+
+    def count_articles(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None
+    ) -> int:
+        """
+        Count stored articles with optional filters.
+
+        Args:
+            data_supplier_id: Filter by parts supplier
+            manufacturer_id: Filter by mfrId
+
+        Returns:
+            Number of matching articles
+        """
+        where, args = self._filters(data_supplier_id, manufacturer_id)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM articles{where}", args).fetchone()[0]
+
+    @staticmethod
+    def _filters(
+        data_supplier_id: Optional[int],
+        manufacturer_id: Optional[int]
+    ) -> Tuple[str, Tuple[int, ...]]:
+        """Build a WHERE clause for the optional filters."""
+        clauses, args = [], []
+        if data_supplier_id is not None:
+            clauses.append("data_supplier_id = ?")
+            args.append(data_supplier_id)
+        if manufacturer_id is not None:
+            clauses.append("mfr_id = ?")
+            args.append(manufacturer_id)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, tuple(args)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ArticleStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,312 @@
+"""
+TecDoc Article Table
+====================
+
+Compact, column-oriented container for getArticles results.
+
+A list of article dicts costs a dict, four keys and up to four separate
+strings per article. ``ArticleTable`` instead stores:
+- article numbers in one packed UTF-8 buffer with an ``array('I')`` of offsets
+- DataSupplier and manufacturer IDs in ``array('I')`` columns (0 = unknown)
+- manufacturer names dictionary-coded: each distinct name is stored once
+  and articles hold an index into the name list
+
+Rows are exposed as read-only mappings with the same keys as the article
+dicts of ``TecDocClient.get_articles`` (IDs as ``int``), so code written
+against the dicts keeps working. Tables of consecutive pages can be
+concatenated with ``extend`` without materializing any rows.
+"""
+
+import json
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+ROW_KEYS = ("number", "manufacturer_id", "manufacturer_name", "data_supplier_id")
+
+# (attribute, buffer name) of the uint32 columns
+BUFFER_COLUMNS = (
+    ("_offsets", "offsets"),
+    ("_supplier_ids", "supplier_ids"),
+    ("_mfr_ids", "manufacturer_ids"),
+    ("_name_codes", "name_codes"),
+)
+
+
+def _to_id(value: Any) -> int:
+    """Convert an optional numeric ID to a column value (0 for missing)."""
+    if value is None or value == "":
+        return 0
+    return int(value)
+
+
+class ArticleRow(Mapping):
+    """Read-only dict-like view of one row of an ``ArticleTable``."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ArticleTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        table, i = self._table, self._index
+        if key == "number":
+            return table.number(i)
+        if key == "manufacturer_id":
+            return table._mfr_ids[i] or None
+        if key == "manufacturer_name":
+            return table._names[table._name_codes[i]]
+        if key == "data_supplier_id":
+            return table._supplier_ids[i] or None
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ROW_KEYS)
+
+    def __len__(self) -> int:
+        return len(ROW_KEYS)
+
+    def __repr__(self) -> str:
+        return f"ArticleRow({dict(self)!r})"
+
+
+class ArticleTable:
+    """
+    Columnar table of articles.
+
+    Append-only; ``len()``, indexing (including negative indices and
+    slices) and iteration behave like a list of rows.
+    """
+
+    def __init__(self) -> None:
+        self._numbers = bytearray()
+        self._offsets = array("I", [0])
+        self._supplier_ids = array("I")
+        self._mfr_ids = array("I")
+        self._name_codes = array("I")
+        self._names: List[Optional[str]] = [None]
+        self._name_index: Dict[Optional[str], int] = {None: 0}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, str]]) -> "ArticleTable":
+        """
+        Build a table from raw getArticles records.
+
+        Args:
+            records: Records as returned by ``soap_parser.parse_articles``
+                (articleNumber, mfrId, mfrName, dataSupplierId)
+
+        Returns:
+            New table
+        """
+        table = cls()
+        for record in records:
+            table.append(
+                record["articleNumber"],
+                record.get("mfrId"),
+                record.get("mfrName"),
+                record.get("dataSupplierId"),
+            )
+        return table
+
+    @classmethod
+    def from_articles(cls, articles: Iterable[Dict[str, Any]]) -> "ArticleTable":
+        """
+        Build a table from ``TecDocClient.get_articles`` article dicts.
+
+        Args:
+            articles: Article dicts (number, manufacturer_id, manufacturer_name,
+                data_supplier_id) or rows of another table
+
+        Returns:
+            New table
+        """
+        table = cls()
+        for article in articles:
+            table.append(
+                article["number"],
+                article.get("manufacturer_id"),
+                article.get("manufacturer_name"),
+                article.get("data_supplier_id"),
+            )
+        return table
+
+    @classmethod
+    def concat(cls, tables: Iterable["ArticleTable"]) -> "ArticleTable":
+        """
+        Concatenate several tables into a new one.
+
+        Args:
+            tables: Tables in order
+
+        Returns:
+            New table
+        """
+        result = cls()
+        for table in tables:
+            result.extend(table)
+        return result
+
+    @classmethod
+    def from_buffers(cls, buffers: Dict[str, bytes], byteorder: str = sys.byteorder) -> "ArticleTable":
+        """
+        Rebuild a table from the output of ``to_buffers``.
+
+        Args:
+            buffers: Column buffers
+            byteorder: Byte order the integer columns were written in
+                (default: native)
+
+        Returns:
+            New table
+        """
+        table = cls()
+        table._numbers = bytearray(buffers["numbers"])
+        for attr, key in BUFFER_COLUMNS:
+            column = array("I")
+            column.frombytes(buffers[key])
+            if byteorder != sys.byteorder:
+                column.byteswap()
+            setattr(table, attr, column)
+        table._names = [None] + json.loads(buffers["names"].decode("utf-8"))
+        table._name_index = {name: code for code, name in enumerate(table._names)}
+        return table
+
+    def to_buffers(self) -> Dict[str, bytes]:
+        """
+        Get the raw column buffers (integer columns in native byte order).
+
+        Returns:
+            Dict with ``numbers`` (UTF-8), ``offsets``, ``supplier_ids``,
+            ``manufacturer_ids``, ``name_codes`` (uint32 arrays) and
+            ``names`` (JSON list of the distinct manufacturer names)
+        """
+        buffers = {"numbers": bytes(self._numbers)}
+        for attr, key in BUFFER_COLUMNS:
+            buffers[key] = getattr(self, attr).tobytes()
+        buffers["names"] = json.dumps(self._names[1:]).encode("utf-8")
+        return buffers
+
+    def _name_code(self, name: Optional[str]) -> int:
+        """Get the dictionary code of a manufacturer name, adding it if new."""
+        code = self._name_index.get(name)
+        if code is None:
+            code = self._name_index[name] = len(self._names)
+            self._names.append(name)
+        return code
+
+    def append(
+        self,
+        number: str,
+        manufacturer_id: Any = None,
+        manufacturer_name: Optional[str] = None,
+        data_supplier_id: Any = None
+    ) -> None:
+        """
+        Append one article.
+
+        Args:
+            number: Article number
+            manufacturer_id: Manufacturer ID (int or numeric string)
+            manufacturer_name: Manufacturer name
+            data_supplier_id: DataSupplier ID (int or numeric string)
+        """
+        self._numbers += number.encode("utf-8")
+        self._offsets.append(len(self._numbers))
+        self._mfr_ids.append(_to_id(manufacturer_id))
+        self._supplier_ids.append(_to_id(data_supplier_id))
+        self._name_codes.append(self._name_code(manufacturer_name))
+
+    def extend(self, other: Union["ArticleTable", Iterable[Dict[str, Any]]]) -> None:
+        """
+        Append all articles of another table (or of article dicts).
+
+        Tables are merged column by column; name codes are only rewritten
+        when the other table's name dictionary differs from this one's.
+
+        Args:
+            other: Table or iterable of article dicts
+        """
+        if not isinstance(other, ArticleTable):
+            for article in other:
+                self.append(
+                    article["number"],
+                    article.get("manufacturer_id"),
+                    article.get("manufacturer_name"),
+                    article.get("data_supplier_id"),
+                )
+            return
+
+        base = len(self._numbers)
+        self._numbers += other._numbers
+        self._offsets.extend(array("I", [offset + base for offset in other._offsets[1:]]))
+        self._mfr_ids.extend(other._mfr_ids)
+        self._supplier_ids.extend(other._supplier_ids)
+
+        mapping = [self._name_code(name) for name in other._names]
+        if mapping == list(range(len(mapping))):
+            self._name_codes.extend(other._name_codes)
+        else:
+            self._name_codes.extend(array("I", map(mapping.__getitem__, other._name_codes)))
+
+    def number(self, index: int) -> str:
+        """
+        Get the article number of one row.
+
+        Args:
+            index: Row index (non-negative)
+
+        Returns:
+            Article number
+        """
+        return self._numbers[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def numbers(self) -> List[str]:
+        """Get all article numbers in row order."""
+        return [self.number(i) for i in range(len(self))]
+
+    @property
+    def manufacturer_names(self) -> List[str]:
+        """Distinct manufacturer names in the table (without None)."""
+        return self._names[1:]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the table's buffers and name dictionary."""
+        size = sum(
+            buffer.buffer_info()[1] * buffer.itemsize
+            for buffer in (self._offsets, self._supplier_ids, self._mfr_ids, self._name_codes)
+        )
+        size += len(self._numbers)
+        size += sum(sys.getsizeof(name) for name in self._names if name is not None)
+        return size
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize all rows as plain dicts."""
+        return [dict(row) for row in self]
+
+    def __len__(self) -> int:
+        return len(self._mfr_ids)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ArticleRow, "ArticleTable"]:
+        if isinstance(index, slice):
+            return ArticleTable.from_articles(
+                ArticleRow(self, i) for i in range(*index.indices(len(self)))
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ArticleTable index out of range")
+        return ArticleRow(self, index)
+
+    def __iter__(self) -> Iterator[ArticleRow]:
+        for i in range(len(self)):
+            yield ArticleRow(self, i)
+
+    def __add__(self, other: "ArticleTable") -> "ArticleTable":
+        return ArticleTable.concat((self, other))
+
+    def __repr__(self) -> str:
+        return f"ArticleTable({len(self)} articles, {len(self._names) - 1} manufacturer names)"
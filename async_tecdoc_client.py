@@ -0,0 +1,322 @@
+"""
+TecDoc API Async Client
+=======================
+
+Asyncio front-end for the TecDoc Web Service API (Pegasus 3.0).
+
+Each coroutine runs the corresponding blocking ``TecDocClient`` call on a
+bounded worker pool that shares one pooled keep-alive transport, so many
+pages can be in flight at once while results are awaited from the event loop.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from core_tecdoc_client import TecDocClient
+from metrics import ClientMetrics
+from resilience import CircuitBreakers, HedgePolicy
+from response_archive import ResponseArchive
+from response_cache import ResponseCache, make_cache_key
+from single_flight import SingleFlight
+from soap_transport import PooledSessionTransport, SoapTransport
+from throttle import AimdLimiter, Throttle
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTecDocClient:
+    """
+    Asyncio TecDoc API client.
+
+    Mirrors ``TecDocClient`` as coroutines and adds ``fetch_all_pages`` to
+    crawl every page of an article query concurrently.
+    """
+
+    def __init__(
+        self,
+        provider_id: Optional[int] = None,
+        api_key: Optional[str] = None,
+        country: Optional[str] = None,
+        lang: Optional[str] = None,
+        timeout: int = 30,
+        transport: Optional[SoapTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        offline: bool = False,
+        throttle: Optional[Throttle] = None,
+        single_flight: Optional[SingleFlight] = None,
+        metrics: Optional[ClientMetrics] = None,
+        endpoint: Optional[str] = None,
+        archive: Optional[ResponseArchive] = None,
+        hedge: Optional[HedgePolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        concurrency: int = 16
+    ) -> None:
+        """
+        Initialize async TecDoc API client.
+
+        Args:
+            provider_id: TecDoc provider ID (default: from TEC_PROVIDER_ID env)
+            api_key: API authentication key (default: from TEC_API_KEY env)
+            country: Country code (default: from TEC_COUNTRY env or "de")
+            lang: Language code (default: from TEC_LANG env or "de")
+            timeout: Request timeout in seconds (default: 30)
+            transport: HTTP transport (default: pooled session sized to
+                ``concurrency``, owned and closed by this client)
+            cache: Response cache consulted before every SOAP call (default: none)
+            offline: Serve only from ``cache``, never call the API (default: False)
+            throttle: Rate limit, AIMD concurrency and retry engine (default:
+                new Throttle whose AIMD limit can grow up to ``concurrency``)
+            single_flight: Coalescer for identical concurrent calls, used for
+                both coroutines and worker threads (default: new SingleFlight)
+            metrics: Metrics registry (default: none, instrumentation disabled)
+            endpoint: SOAP endpoint URL (default: from TEC_ENDPOINT env or
+                TecDocClient.SOAP_ENDPOINT)
+            archive: Archive recording every raw response received from the
+                API (default: none)
+            hedge: Hedged-request policy (default: none)
+            breakers: Per-function circuit breakers (default: none)
+            concurrency: Maximum number of requests in flight (default: 16)
+        """
+        if concurrency < 1:
+            raise ValueError("AsyncTecDocClient: concurrency must be >= 1")
+
+        self.concurrency = concurrency
+        self._owns_transport = transport is None
+        transport = transport or PooledSessionTransport(pool_maxsize=concurrency)
+        throttle = throttle or Throttle(
+            limiter=AimdLimiter(initial=min(8, concurrency), maximum=concurrency)
+        )
+
+        self.client = TecDocClient(
+            provider_id=provider_id,
+            api_key=api_key,
+            country=country,
+            lang=lang,
+            timeout=timeout,
+            transport=transport,
+            cache=cache,
+            offline=offline,
+            throttle=throttle,
+            single_flight=single_flight,
+            metrics=metrics,
+            endpoint=endpoint,
+            archive=archive,
+            hedge=hedge,
+            breakers=breakers,
+        )
+        self.single_flight = self.client.single_flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="tecdoc-async"
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking client call on the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def _run_shared(self, key: Any, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking client call, coalesced with identical in-flight coroutines."""
+        return await self.single_flight.do_async(key, lambda: self._run(func, *args, **kwargs))
+
+    async def get_countries(self) -> List[Dict[str, str]]:
+        """
+        Get list of supported countries.
+
+        Returns:
+            List of countries with code and name
+        """
+        return await self._run_shared(("countries",), self.client.get_countries)
+
+    async def get_manufacturers(self, linking_target_type: str = "p") -> List[Dict[str, str]]:
+        """
+        Get list of all car manufacturers.
+
+        Args:
+            linking_target_type: Target type ("p" for passenger cars)
+
+        Returns:
+            List of manufacturers with ID and name
+        """
+        return await self._run_shared(
+            ("manufacturers", linking_target_type),
+            self.client.get_manufacturers,
+            linking_target_type,
+        )
+
+    async def get_brands(self) -> List[Dict[str, str]]:
+        """
+        Get list of parts brands (DataSuppliers).
+
+        Returns:
+            List of brands with DataSupplier ID and name
+        """
+        return await self._run_shared(("brands",), self.client.get_brands)
+
+    async def get_articles(
+        self,
+        data_supplier_id: Optional[Union[int, Sequence[int]]] = None,
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        page_number: int = 0,
+        as_table: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get one page of articles (parts) with optional filters.
+
+        Args:
+            data_supplier_id: Filter by parts supplier, or a list of suppliers
+            manufacturer_id: Filter by car manufacturer
+            article_country: Article country code (default: same as client country)
+            page_size: Number of results per page (max 100)
+            page_number: Page number (0-based)
+            as_table: Return the articles as an ``ArticleTable`` (default: False)
+
+        Returns:
+            Dict with total count and list (or ArticleTable) of articles
+        """
+        suppliers = (
+            tuple(sorted(data_supplier_id)) if isinstance(data_supplier_id, (list, tuple, set))
+            else data_supplier_id
+        )
+        key = (
+            "articles", suppliers, manufacturer_id, article_country,
+            page_size, page_number, as_table,
+        )
+        return await self._run_shared(
+            key,
+            self.client.get_articles,
+            data_supplier_id=data_supplier_id,
+            manufacturer_id=manufacturer_id,
+            article_country=article_country,
+            page_size=page_size,
+            page_number=page_number,
+            as_table=as_table,
+        )
+
+    async def get_articles_batched(
+        self,
+        data_supplier_ids: Iterable[int],
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        batch_size: int = 10
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Fetch all articles of several suppliers with combined requests.
+
+        Args:
+            data_supplier_ids: Parts suppliers
+            manufacturer_id: Filter by car manufacturer
+            article_country: Article country code (default: same as client country)
+            page_size: Number of results per page (max 100)
+            batch_size: Suppliers per combined query (default: 10)
+
+        Returns:
+            Dict of DataSupplier ID -> article dicts
+        """
+        return await self._run(
+            self.client.get_articles_batched,
+            data_supplier_ids,
+            manufacturer_id=manufacturer_id,
+            article_country=article_country,
+            page_size=page_size,
+            batch_size=batch_size,
+        )
+
+    async def get_raw_response(self, function: str, params: Dict[str, Any]) -> str:
+        """
+        Get raw XML response for any function.
+
+        Args:
+            function: TecDoc function name
+            params: Function parameters
+
+        Returns:
+            Raw XML response string
+        """
+        key = ("raw", make_cache_key(function, params, self.client.country, self.client.lang))
+        return await self._run_shared(key, self.client.get_raw_response, function, params)
+
+    async def fetch_all_pages(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        max_concurrency: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        as_table: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch every page of an article query concurrently.
+
+        The first page is fetched alone to learn ``totalMatchingArticles`` and
+        the number of rows the server really returns per page (the endpoint
+        may return fewer rows than ``page_size``). The remaining pages are
+        then fetched under a semaphore.
+
+        Args:
+            data_supplier_id: Filter by parts supplier
+            manufacturer_id: Filter by car manufacturer
+            article_country: Article country code (default: same as client country)
+            page_size: Requested number of results per page (max 100)
+            max_concurrency: Pages in flight at once (default: client concurrency)
+            max_pages: Stop after this many pages (default: all)
+            as_table: Return each page's articles as an ``ArticleTable``;
+                concatenate them with ``ArticleTable.concat`` (default: False)
+
+        Returns:
+            List of page dicts (as returned by ``get_articles``) in page order
+        """
+        limit = max_concurrency or self.concurrency
+        if limit < 1:
+            raise ValueError("fetch_all_pages: max_concurrency must be >= 1")
+
+        query = {
+            "data_supplier_id": data_supplier_id,
+            "manufacturer_id": manufacturer_id,
+            "article_country": article_country,
+            "page_size": page_size,
+            "as_table": as_table,
+        }
+
+        first = await self.get_articles(page_number=0, **query)
+        rows_per_page = len(first["articles"]) or page_size
+        page_count = math.ceil(first["total"] / rows_per_page) if first["total"] else 1
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+
+        semaphore = asyncio.Semaphore(limit)
+
+        async def fetch(page_number: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_articles(page_number=page_number, **query)
+
+        rest = await asyncio.gather(*(fetch(n) for n in range(1, page_count)))
+
+        logger.info(
+            f"Fetched {page_count} pages (total: {first['total']}, "
+            f"rows/page: {rows_per_page}, concurrency: {limit})"
+        )
+        return [first, *rest]
+
+    async def aclose(self) -> None:
+        """Shut down the worker pool and close an owned transport."""
+        # Waiting for running calls blocks, so it happens off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        if self._owns_transport:
+            self.client.transport.close()
+
+    async def __aenter__(self) -> "AsyncTecDocClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: getArticles response parsing
+=============================================
+
+Compares the record parser (soap_parser.parse_article_rows) with the
+previous parsing path of TecDocClient.get_articles (one regex search plus
+one re.findall pass per field, zipped together), extended to the four
+fields the client returns today; both produce one tuple per article. The last column adds building one dict per record
+(soap_parser.parse_articles). Prints parse cost in microseconds per
+article for several page sizes.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from soap_parser import parse_article_rows, parse_articles
+
+
+def build_response(article_count: int) -> str:
+    """Build a synthetic getArticles response with the given number of articles."""
+    articles = "".join(
+        f"<articles><dataSupplierId>30</dataSupplierId>"
+        f"<articleNumber>0 986 {i:06d}</articleNumber>"
+        f"<mfrId>{30 + i % 7}</mfrId><mfrName>BOSCH</mfrName></articles>"
+        for i in range(article_count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        '<getArticlesResponse xmlns="http://server.cat.tecdoc.net">'
+        f"<status>200</status><totalMatchingArticles>{article_count}</totalMatchingArticles>"
+        f"{articles}</getArticlesResponse></soap:Body></soap:Envelope>"
+    )
+
+
+def parse_regex(xml_response: str) -> list:
+    """Previous regex-based parsing path of TecDocClient.get_articles (plus dataSupplierId)."""
+    total_match = re.search(r'<totalMatchingArticles>(\d+)</totalMatchingArticles>', xml_response)
+    total = int(total_match.group(1)) if total_match else 0
+
+    article_numbers = re.findall(r'<articleNumber>([^<]+)</articleNumber>', xml_response)
+    mfr_ids = re.findall(r'<mfrId>(\d+)</mfrId>', xml_response)
+    mfr_names = re.findall(r'<mfrName>([^<]+)</mfrName>', xml_response)
+    data_supplier_ids = re.findall(r'<dataSupplierId>(\d+)</dataSupplierId>', xml_response)
+
+    return [total, list(zip(article_numbers, mfr_ids, mfr_names, data_supplier_ids))]
+
+
+def parse_rows(xml_response: str) -> list:
+    """Record parser path, one tuple per article."""
+    return list(parse_article_rows(xml_response))
+
+
+def parse_dicts(xml_response: str) -> list:
+    """Record parser path, one dict per article."""
+    return list(parse_articles(xml_response))
+
+
+def main():
+    """Run the parser benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    args = parser.parse_args()
+
+    print(f"{'articles':>8}  {'regex us/art':>12}  {'record us/art':>13}  {'ratio':>6}  {'dicts us/art':>12}")
+    for count in (10, 100, 1000):
+        xml_response = build_response(count)
+        number = max(1, 20000 // count)
+
+        results = {}
+        for name, func in (("regex", parse_regex), ("record", parse_rows), ("dicts", parse_dicts)):
+            best = min(timeit.repeat(lambda: func(xml_response), number=number, repeat=args.repeat))
+            results[name] = best / number / count * 1e6
+
+        print(
+            f"{count:>8}  {results['regex']:>12.2f}  {results['record']:>13.2f}  "
+            f"{results['record'] / results['regex']:>6.1f}x  {results['dicts']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
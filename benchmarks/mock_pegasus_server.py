@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Mock Pegasus SOAP Server
+========================
+
+Local stand-in for the TecDoc Web Service (Pegasus 3.0) SOAP endpoint,
+built on the standard library only. Serves synthetic ``getCountries``,
+``getManufacturers``, ``getBrands`` and ``getArticles`` responses generated
+from the reference data in ``data/``.
+
+Configurable behaviour:
+- latency and jitter per request
+- error injection (HTTP 503, or 429 with Retry-After)
+- page-size quirk: at most ``max_page_size`` rows per page, whatever
+  pageSize was requested (the live endpoint returns 10 rows for pageSize=100)
+- article padding to reach realistic response sizes
+
+Usage:
+    python benchmarks/mock_pegasus_server.py --port 8080 --latency 0.05
+    TEC_ENDPOINT=http://127.0.0.1:8080/ TEC_API_KEY=test python examples/get_manufacturers.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape, unescape
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+_FUNCTION = re.compile(r'<(\w+) xmlns="http://server\.cat\.tecdoc\.net">')
+_PARAM = re.compile(r"<(\w+)>([^<]*)</\1>")
+
+
+def _envelope(function: str, inner: str) -> bytes:
+    """Wrap a response body in a SOAP envelope."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        f'<{function}Response xmlns="http://server.cat.tecdoc.net"><status>200</status>'
+        f"{inner}</{function}Response></soap:Body></soap:Envelope>"
+    ).encode("utf-8")
+
+
+class MockPegasusServer:
+    """
+    Threaded mock SOAP server.
+
+    Use as a context manager or call ``start()``/``stop()``; ``url`` is the
+    endpoint to pass to the clients.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        max_page_size: int = 10,
+        article_padding: int = 400,
+        articles_per_supplier: Optional[int] = None,
+        data_dir: str = DATA_DIR,
+        seed: int = 0
+    ) -> None:
+        """
+        Initialize mock server.
+
+        Args:
+            host: Bind address (default: 127.0.0.1)
+            port: Bind port (default: 0, pick a free port)
+            latency: Base server latency in seconds
+            jitter: Uniform latency jitter (+/- seconds)
+            error_rate: Fraction of requests answered with ``error_status``
+            error_status: Injected HTTP status (503, or 429 with Retry-After)
+            max_page_size: Maximum rows returned per page (default: 10)
+            article_padding: Bytes of filler text per article (default: 400)
+            articles_per_supplier: Override the article count of every supplier
+                (default: counts from datasuppliers.json)
+            data_dir: Reference data directory
+            seed: Random seed for jitter and error injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_page_size = max_page_size
+        self.article_padding = article_padding
+        self.articles_per_supplier = articles_per_supplier
+
+        with open(os.path.join(data_dir, "countries.json"), "r", encoding="utf-8") as f:
+            self.countries = json.load(f)["countries"]
+        with open(os.path.join(data_dir, "manufacturers.json"), "r", encoding="utf-8") as f:
+            self.manufacturers = json.load(f)["manufacturers"]["data"]
+        with open(os.path.join(data_dir, "datasuppliers.json"), "r", encoding="utf-8") as f:
+            self.suppliers = {s["id"]: s for s in json.load(f)["datasuppliers"]}
+
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Endpoint URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            wbufsize = -1
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, payload, headers = server.handle(body.decode("utf-8"))
+                self.send_response(status)
+                self.send_header("Content-Type", "text/xml; charset=UTF-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def _delay(self) -> float:
+        """Draw the latency of one request."""
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def handle(self, request: str) -> tuple:
+        """
+        Answer one SOAP request.
+
+        Args:
+            request: SOAP request body
+
+        Returns:
+            Tuple of (HTTP status, response bytes, extra headers)
+        """
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+
+        time.sleep(self._delay())
+
+        if failed:
+            headers = {"Retry-After": "0"} if self.error_status == 429 else {}
+            return self.error_status, b"", headers
+
+        match = _FUNCTION.search(request)
+        if not match:
+            return 400, b"", {}
+        function = match.group(1)
+        # Repeated elements (list-valued params) are joined with commas
+        params: Dict[str, str] = {}
+        for name, value in _PARAM.findall(request):
+            params[name] = f"{params[name]},{value}" if name in params else value
+
+        if function == "getCountries":
+            inner = "".join(
+                f"<array><countryCode>{escape(c['code'])}</countryCode>"
+                f"<countryName>{escape(c['name'])}</countryName></array>"
+                for c in self.countries
+            )
+        elif function == "getManufacturers":
+            inner = "".join(
+                f"<array><manuId>{m['id']}</manuId>"
+                f"<manuName>{escape(unescape(m['name']))}</manuName></array>"
+                for m in self.manufacturers
+            )
+        elif function == "getBrands":
+            inner = "".join(
+                f"<array><dataSupplierId>{s['id']}</dataSupplierId>"
+                f"<mfrId>{s['id']}</mfrId><mfrName>{escape(unescape(s['name']))}</mfrName></array>"
+                for s in self.suppliers.values()
+            )
+        elif function == "getArticles":
+            inner = self._articles(params)
+        else:
+            return 500, _envelope(function, "<status>500</status>"), {}
+
+        return 200, _envelope(function, f"<data>{inner}</data>"), {}
+
+    def _articles(self, params: Dict[str, str]) -> str:
+        """Build a synthetic getArticles page."""
+        supplier_ids = [int(x) for x in params.get("dataSupplierIds", "").split(",") if x]
+        manufacturer_id = int(params.get("manufacturerId") or 0)
+        suppliers = [self.suppliers[i] for i in supplier_ids if i in self.suppliers] or list(
+            self.suppliers.values()
+        )
+
+        def count(supplier: Dict[str, Any]) -> int:
+            total = self.articles_per_supplier or supplier["articles"]
+            # A manufacturer filter selects a stable ~1/8 of the catalogue
+            return -(-total // 8) if manufacturer_id else total
+
+        total = sum(count(s) for s in suppliers)
+        page_size = min(int(params.get("pageSize") or 100), self.max_page_size)
+        start = int(params.get("pageNumber") or 0) * page_size
+
+        rows: List[str] = []
+        offset = 0
+        padding = "x" * self.article_padding
+        for supplier in suppliers:
+            n = count(supplier)
+            for i in range(max(start - offset, 0), min(start + page_size - offset, n)):
+                number = f"{supplier['id']:03d} {i:07d}"
+                rows.append(
+                    f"<articles><dataSupplierId>{supplier['id']}</dataSupplierId>"
+                    f"<articleNumber>{number}</articleNumber>"
+                    f"<mfrId>{supplier['id']}</mfrId>"
+                    f"<mfrName>{escape(unescape(supplier['name']))}</mfrName>"
+                    f"<articleText>{padding}</articleText></articles>"
+                )
+            offset += n
+            if offset >= start + page_size:
+                break
+
+        return (
+            f"<totalMatchingArticles>{total}</totalMatchingArticles>"
+            f"<maxAllowedPage>{-(-total // page_size) - 1}</maxAllowedPage>"
+            + "".join(rows)
+        )
+
+    def start(self) -> "MockPegasusServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockPegasusServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def main():
+    """Run the mock server in the foreground."""
+    parser = argparse.ArgumentParser(description="Mock Pegasus SOAP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--max-page-size", type=int, default=10)
+    parser.add_argument("--articles-per-supplier", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockPegasusServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        max_page_size=args.max_page_size,
+        articles_per_supplier=args.articles_per_supplier,
+    )
+    print(f"Mock Pegasus server listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
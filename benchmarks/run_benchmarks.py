@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: TecDoc client throughput against a local mock server
+=====================================================================
+
+Drives TecDocClient, AsyncTecDocClient and the legacy TecDocAPI through a
+set of scenarios against ``mock_pegasus_server.MockPegasusServer``, so
+throughput can be tracked without touching the live endpoint.
+
+Every scenario runs in its own subprocess (so peak RSS is per scenario)
+against a fresh mock server, and reports:
+- pages_per_second: completed getArticles pages per wall-clock second
+- latency_p50_ms / latency_p99_ms: per-request HTTP latency
+- parse_us_per_article: parse cost (TecDocClient scenarios only)
+- peak_rss_kb: peak resident set size of the client process
+- requests / errors: as counted by the mock server
+
+Usage:
+    python benchmarks/run_benchmarks.py [--pages N] [--latency S] [--jitter S]
+                                        [--scenario NAME ...] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from mock_pegasus_server import MockPegasusServer
+
+SUPPLIER_ID = 30
+ROWS_PER_PAGE = 10
+
+# Scenario name -> (description, mock server overrides)
+SCENARIOS: Dict[str, tuple] = {
+    "single_page": ("TecDocClient, the same page fetched sequentially", {}),
+    "supplier_crawl_serial": ("TecDocClient.iter_articles over one supplier, no read-ahead", {}),
+    "supplier_crawl_prefetch": ("TecDocClient.iter_articles over one supplier, prefetch=4", {}),
+    "supplier_crawl_errors": (
+        "TecDocClient.iter_articles, prefetch=4, 5% HTTP 503 with retries",
+        {"error_rate": 0.05},
+    ),
+    "async_crawl": ("AsyncTecDocClient.fetch_all_pages, concurrency=16", {}),
+    "high_concurrency": ("TecDocClient shared by 32 threads, distinct pages", {}),
+    "legacy_single_page": ("TecDocAPI, the same page fetched sequentially", {}),
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB (0 if unknown)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_scenario(name: str, url: str, pages: int) -> Dict[str, Any]:
+    """
+    Run one scenario in the current process.
+
+    Args:
+        name: Scenario name (key of SCENARIOS)
+        url: Mock server endpoint
+        pages: Number of getArticles pages to fetch
+
+    Returns:
+        Dict with the measured values
+    """
+    from async_tecdoc_client import AsyncTecDocClient
+    from core_tecdoc_client import TecDocClient
+    from metrics import ClientMetrics
+    from soap_transport import PooledSessionTransport
+    from tecdoc_query_script import TecDocAPI
+    from throttle import AimdLimiter, RetryPolicy, Throttle
+
+    logging.disable(logging.WARNING)
+
+    latencies: List[float] = []
+    parse_seconds = 0.0
+    parse_articles = 0
+
+    def on_event(event: Dict[str, Any]) -> None:
+        nonlocal parse_seconds, parse_articles
+        if event["event"] == "request":
+            latencies.append(event["connect"] + event["server"])
+        elif event["function"] == "getArticles":
+            parse_seconds += event["parse"]
+            parse_articles += event["articles"]
+
+    metrics = ClientMetrics()
+    metrics.add_hook(on_event)
+    retry = RetryPolicy(base_delay=0.01, max_delay=0.1)
+    options = {"api_key": "benchmark", "endpoint": url, "metrics": metrics}
+
+    fetched = 0
+    started = time.perf_counter()
+
+    if name == "single_page":
+        with TecDocClient(**options) as client:
+            for _ in range(pages):
+                client.get_articles(data_supplier_id=SUPPLIER_ID)
+                fetched += 1
+
+    elif name.startswith("supplier_crawl"):
+        prefetch = 0 if name == "supplier_crawl_serial" else 4
+        with TecDocClient(throttle=Throttle(retry=retry), **options) as client:
+            count = sum(1 for _ in client.iter_articles(SUPPLIER_ID, prefetch=prefetch))
+            fetched = -(-count // ROWS_PER_PAGE)
+
+    elif name == "async_crawl":
+        async def crawl() -> int:
+            async with AsyncTecDocClient(concurrency=16, **options) as client:
+                return len(await client.fetch_all_pages(SUPPLIER_ID))
+
+        fetched = asyncio.run(crawl())
+
+    elif name == "high_concurrency":
+        throttle = Throttle(limiter=AimdLimiter(initial=32, maximum=64), retry=retry)
+        transport = PooledSessionTransport(pool_maxsize=32)
+        with TecDocClient(transport=transport, throttle=throttle, **options) as client:
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                fetched = len(list(executor.map(
+                    lambda n: client.get_articles(data_supplier_id=SUPPLIER_ID, page_number=n),
+                    range(pages),
+                )))
+        transport.close()
+
+    elif name == "legacy_single_page":
+        class TimedTransport(PooledSessionTransport):
+            def post(self, *args: Any, **kwargs: Any) -> Any:
+                sent = time.perf_counter()
+                response = super().post(*args, **kwargs)
+                latencies.append(time.perf_counter() - sent)
+                return response
+
+        with TecDocAPI("23862", "benchmark", transport=TimedTransport()) as api:
+            api.endpoint = url
+            for _ in range(pages):
+                api.get_articles(SUPPLIER_ID)
+                fetched += 1
+
+    else:
+        raise ValueError(f"run_scenario: unknown scenario {name!r}")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": fetched,
+        "seconds": round(elapsed, 4),
+        "pages_per_second": round(fetched / elapsed, 1) if elapsed else 0.0,
+        "latency_p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "latency_p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "parse_us_per_article": (
+            round(parse_seconds / parse_articles * 1e6, 2) if parse_articles else None
+        ),
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def run_isolated(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run one scenario in a subprocess against a fresh mock server.
+
+    Args:
+        name: Scenario name
+        args: Parsed command line arguments
+
+    Returns:
+        Scenario result including the server-side request and error counts
+    """
+    description, overrides = SCENARIOS[name]
+    server_options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "max_page_size": ROWS_PER_PAGE,
+        "articles_per_supplier": args.pages * ROWS_PER_PAGE,
+        **overrides,
+    }
+
+    with MockPegasusServer(**server_options) as server:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__),
+             "--worker", name, "--url", server.url, "--pages", str(args.pages)],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        result.update(requests=server.requests, errors=server.errors)
+
+    return {"scenario": name, "description": description, "server": server_options, **result}
+
+
+def main():
+    """Run the selected scenarios and print/write the JSON report."""
+    parser = argparse.ArgumentParser(description="TecDoc client benchmarks")
+    parser.add_argument("--scenario", nargs="*", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--pages", type=int, default=200, help="pages per scenario (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.002, help="server latency jitter")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.worker, args.url, args.pages)))
+        return
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "pages": args.pages,
+        "scenarios": [run_isolated(name, args) for name in args.scenario or SCENARIOS],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
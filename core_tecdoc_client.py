@@ -12,12 +12,32 @@ Language: de (German)
 
 import os
 import logging
-import re
-from typing import Any, Dict, List, Optional
-import requests
+import math
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+)
+
+from response_cache import CacheMissError, ResponseCache, make_cache_key
+from single_flight import SingleFlight
+from soap_parser import parse_article_rows, parse_articles, parse_brands, parse_countries, parse_manufacturers
+from soap_request import SoapRequestBuilder, split_records
+
+# The HTTP stack (requests) and the optional subsystems are imported when
+# first used, so importing the client (e.g. for cached/offline use) stays cheap
+if TYPE_CHECKING:
+    import requests
+
+    from article_table import ArticleTable
+    from metrics import ClientMetrics
+    from resilience import CircuitBreakers, HedgePolicy
+    from response_archive import ResponseArchive
+    from soap_transport import SoapTransport
+    from throttle import Throttle
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 
 class TecDocClient:
@@ -38,7 +58,17 @@ class TecDocClient:
         api_key: Optional[str] = None,
         country: Optional[str] = None,
         lang: Optional[str] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        transport: Optional["SoapTransport"] = None,
+        cache: Optional[ResponseCache] = None,
+        offline: bool = False,
+        throttle: Optional["Throttle"] = None,
+        single_flight: Optional[SingleFlight] = None,
+        metrics: Optional["ClientMetrics"] = None,
+        endpoint: Optional[str] = None,
+        archive: Optional["ResponseArchive"] = None,
+        hedge: Optional["HedgePolicy"] = None,
+        breakers: Optional["CircuitBreakers"] = None
     ) -> None:
         """
         Initialize TecDoc API client.
@@ -49,16 +79,67 @@ class TecDocClient:
             country: Country code (default: from TEC_COUNTRY env or "de")
             lang: Language code (default: from TEC_LANG env or "de")
             timeout: Request timeout in seconds (default: 30)
+            transport: HTTP transport (default: pooled keep-alive session owned
+                and closed by this client)
+            cache: Response cache consulted before every SOAP call (default: none)
+            offline: Serve only from ``cache``, never call the API (default: False)
+            throttle: Rate limit, AIMD concurrency and retry engine; share one
+                instance between clients to share the budget (default: new Throttle)
+            single_flight: Coalescer for identical concurrent calls; share one
+                instance between clients to coalesce across them (default: new SingleFlight)
+            metrics: Metrics registry for latency, bytes, articles/s and component
+                stats (default: none, instrumentation disabled)
+            endpoint: SOAP endpoint URL (default: from TEC_ENDPOINT env or SOAP_ENDPOINT)
+            archive: Archive recording every raw response received from the
+                API, for later re-parsing (default: none)
+            hedge: Hedged-request policy sending a duplicate request once a
+                call exceeds its function's latency quantile (default: none)
+            breakers: Per-function circuit breakers; while a circuit is open,
+                calls are served stale from the disk tier of ``cache`` or
+                fail fast (default: none)
         """
         self.provider_id = provider_id or int(os.getenv("TEC_PROVIDER_ID", "23862"))
         self.api_key = api_key or os.getenv("TEC_API_KEY", "")
         self.country = (country or os.getenv("TEC_COUNTRY", "de")).lower()
         self.lang = (lang or os.getenv("TEC_LANG", "de")).lower()
+        self.endpoint = endpoint or os.getenv("TEC_ENDPOINT", self.SOAP_ENDPOINT)
         self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        if throttle is None:
+            from throttle import Throttle
+            throttle = Throttle()
+        self.throttle = throttle
+        self.single_flight = single_flight or SingleFlight()
+        self.metrics = metrics
+        self.archive = archive
+        self.hedge = hedge
+        self.breakers = breakers
+        
+        if metrics is not None:
+            metrics.add_source("throttle", self.throttle.stats)
+            metrics.add_source("single_flight", self.single_flight.stats)
+            if cache is not None:
+                metrics.add_source("cache", cache.stats)
+            if hedge is not None:
+                metrics.add_source("hedge", hedge.stats)
+            if breakers is not None:
+                metrics.add_source("circuit", breakers.stats)
+        
+        if offline and cache is None:
+            raise ValueError("TecDocClient: offline mode requires a cache")
         
-        if not self.provider_id or not self.api_key:
+        if not self.provider_id or not (self.api_key or offline):
             raise ValueError("TecDocClient: Provider ID and API Key are required")
         
+        self.request_builder = SoapRequestBuilder(self.provider_id, self.country, self.lang)
+        
+        self._owns_transport = transport is None
+        if transport is None:
+            from soap_transport import PooledSessionTransport
+            transport = PooledSessionTransport()
+        self.transport = transport
+        
         # Mask API key for logging
         masked_key = f"{self.api_key[:4]}...{self.api_key[-4:]}" if len(self.api_key) > 8 else "***"
         logger.info(
@@ -66,79 +147,234 @@ class TecDocClient:
             f"lang={self.lang}, key={masked_key})"
         )
     
-    def _build_soap_request(self, function: str, params: Dict[str, Any]) -> str:
+    def _build_soap_request(self, function: str, params: Dict[str, Any]) -> bytes:
         """
         Build SOAP XML request body.
         
         Args:
             function: TecDoc function name (e.g., "getArticles")
-            params: Function parameters
+            params: Function parameters (lists and dicts become repeated
+                and nested elements, see ``soap_request``)
             
         Returns:
-            SOAP XML string
+            UTF-8 encoded SOAP envelope
         """
-        # Build parameter XML
-        param_xml = f"""
-            <provider>{self.provider_id}</provider>
-            <country>{self.country}</country>
-            <lang>{self.lang}</lang>
-        """
-        
-        for key, value in params.items():
-            if value is not None:
-                param_xml += f"            <{key}>{value}</{key}>\n"
-        
-        soap_body = f"""<?xml version="1.0" encoding="UTF-8"?>
-<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
-    <soap:Body>
-        <{function} xmlns="http://server.cat.tecdoc.net">
-{param_xml.rstrip()}
-        </{function}>
-    </soap:Body>
-</soap:Envelope>"""
-        
-        return soap_body
+        return self.request_builder.build(function, params)
     
-    def _call_soap(self, function: str, params: Dict[str, Any]) -> str:
+    def _call_soap(self, function: str, params: Dict[str, Any], fresh: bool = False) -> str:
         """
         Make SOAP API call.
         
         Args:
             function: TecDoc function name
             params: Function parameters
+            fresh: Skip the cache lookup (and the stale fallback of an open
+                circuit) and call the API; the response is still written to
+                the cache. Ignored in offline mode (default: False)
             
         Returns:
             Raw XML response
             
         Raises:
-            requests.RequestException: On network errors
-            requests.HTTPError: On HTTP errors
+            requests.RequestException: On network errors (after retries)
+            requests.HTTPError: On HTTP errors (after retries)
+            CacheMissError: In offline mode when the response is not cached
+            CircuitOpenError: While the function's circuit is open and no
+                cached response is available
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(function, params, self.country, self.lang)
+            if not fresh or self.offline:
+                cached = self.cache.get(function, cache_key, allow_stale=self.offline)
+                if cached is not None:
+                    return cached
+        
+        if self.offline:
+            raise CacheMissError(f"TecDoc offline mode: {function} response not cached")
+        
+        # Built before the breaker is asked, so an invalid request never
+        # takes (and leaks) the half-open trial slot
         soap_body = self._build_soap_request(function, params)
         
+        breaker = self.breakers.get(function) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow():
+            if self.cache is not None and not fresh:
+                stale = self.cache.get(function, cache_key, allow_stale=True)
+                if stale is not None:
+                    self.breakers.record_fallback()
+                    logger.warning(f"TecDoc {function} circuit open, serving stale cached response")
+                    return stale
+            from resilience import CircuitOpenError
+            raise CircuitOpenError(f"TecDoc {function} circuit open")
+        
+        import requests
+        from throttle import RETRY_STATUSES
+        
         headers = {
             "Content-Type": "text/xml; charset=UTF-8",
             "X-Api-Key": self.api_key,
         }
         
-        try:
-            response = requests.post(
-                self.SOAP_ENDPOINT,
-                data=soap_body,
-                headers=headers,
-                timeout=self.timeout,
+        def attempt() -> "requests.Response":
+            # Duration of the last try (connect + server + body download)
+            elapsed = 0.0
+            
+            def send() -> "requests.Response":
+                nonlocal elapsed
+                started = time.perf_counter()
+                try:
+                    return self.transport.post(
+                        self.endpoint,
+                        data=soap_body,
+                        headers=headers,
+                        timeout=self.timeout,
+                    )
+                finally:
+                    elapsed = time.perf_counter() - started
+            
+            try:
+                response = self.throttle.run(send)
+            except requests.RequestException:
+                self._observe_request(function, 0, elapsed, len(soap_body), 0)
+                raise
+            self._observe_request(
+                function, response.status_code, elapsed, len(soap_body), len(response.content)
             )
-        except requests.RequestException as exc:
-            logger.error(f"TecDoc API RequestException: {exc}")
+            return response
+        
+        try:
+            response = self.hedge.run(function, attempt) if self.hedge is not None else attempt()
+        except Exception as exc:
+            if isinstance(exc, requests.RequestException):
+                logger.error(f"TecDoc API RequestException: {exc}")
+            if breaker is not None:
+                breaker.record(success=False)
             raise
         
+        if breaker is not None:
+            breaker.record(success=response.status_code not in RETRY_STATUSES)
+        
         if not response.ok:
             logger.error(
                 f"TecDoc API Error: HTTP {response.status_code} - {response.text[:500]}"
             )
             response.raise_for_status()
         
-        return response.text
+        xml_response = response.text
+        if self.cache is not None:
+            self.cache.set(function, cache_key, xml_response)
+        if self.archive is not None:
+            self.archive.append(function, params, self.country, self.lang, xml_response)
+        
+        return xml_response
+    
+    def _observe_request(
+        self,
+        function: str,
+        status: int,
+        elapsed: float,
+        request_bytes: int,
+        response_bytes: int
+    ) -> None:
+        """Record one HTTP request in the metrics registry, if enabled."""
+        if self.metrics is None:
+            return
+        connect = self.transport.connect_time
+        self.metrics.observe_request(
+            function, status, connect, max(0.0, elapsed - connect), request_bytes, response_bytes
+        )
+    
+    def _call_shared(
+        self,
+        function: str,
+        params: Dict[str, Any],
+        parse: Optional[Callable[[str], Any]] = None,
+        fresh: bool = False
+    ) -> Any:
+        """
+        Make a SOAP call, coalesced with identical calls already in flight.
+        
+        Concurrent callers with the same function, params, country and
+        language share one upstream call and one parsed result, which must
+        be treated as read-only. Fresh calls only share with fresh calls.
+        
+        Args:
+            function: TecDoc function name
+            params: Function parameters
+            parse: Converts the raw XML response (default: return it as is)
+            fresh: Bypass the cache lookup (see ``_call_soap``)
+            
+        Returns:
+            Parsed (or raw) response
+        """
+        key = (
+            make_cache_key(function, params, self.country, self.lang),
+            parse.__qualname__ if parse else None,
+            fresh,
+        )
+        
+        def call() -> Any:
+            xml_response = self._call_soap(function, params, fresh)
+            if not parse:
+                return xml_response
+            if self.metrics is None:
+                return parse(xml_response)
+            
+            started = time.perf_counter()
+            result = parse(xml_response)
+            articles = len(result[1]) if function == "getArticles" else 0
+            self.metrics.observe_parse(function, time.perf_counter() - started, articles)
+            return result
+        
+        return self.single_flight.do(key, call)
+    
+    @staticmethod
+    def _parse_countries(xml_response: str) -> List[Dict[str, str]]:
+        """Convert a getCountries response to country dicts."""
+        return [
+            {"code": record["countryCode"], "name": record.get("countryName", "")}
+            for record in parse_countries(xml_response)
+        ]
+    
+    @staticmethod
+    def _parse_manufacturers(xml_response: str) -> List[Dict[str, str]]:
+        """Convert a getManufacturers response to manufacturer dicts."""
+        return [
+            {"id": record["manuId"], "name": record.get("manuName", "")}
+            for record in parse_manufacturers(xml_response)
+        ]
+    
+    @staticmethod
+    def _parse_brands(xml_response: str) -> List[Dict[str, str]]:
+        """Convert a getBrands response to brand dicts."""
+        return [
+            {"id": record["dataSupplierId"], "name": record.get("mfrName", "")}
+            for record in parse_brands(xml_response)
+        ]
+    
+    @staticmethod
+    def _parse_articles(xml_response: str) -> Tuple[int, List[Dict[str, Any]]]:
+        """Convert a getArticles response to (total, article dicts)."""
+        total, rows = parse_article_rows(xml_response)
+        articles = [
+            {
+                "number": number,
+                "manufacturer_id": mfr_id or None,
+                "manufacturer_name": mfr_name or None,
+                "data_supplier_id": data_supplier_id or None
+            }
+            for number, mfr_id, mfr_name, data_supplier_id in rows
+        ]
+        return total, articles
+    
+    @staticmethod
+    def _parse_article_table(xml_response: str) -> Tuple[int, "ArticleTable"]:
+        """Convert a getArticles response to (total, ArticleTable)."""
+        from article_table import ArticleTable
+        
+        total, records = parse_articles(xml_response)
+        return total, ArticleTable.from_records(records)
     
     def get_countries(self) -> List[Dict[str, str]]:
         """
@@ -147,15 +383,7 @@ class TecDocClient:
         Returns:
             List of countries with code and name
         """
-        xml_response = self._call_soap("getCountries", {})
-        
-        # Parse XML response
-        country_codes = re.findall(r'<countryCode>([^<]+)</countryCode>', xml_response)
-        country_names = re.findall(r'<countryName>([^<]+)</countryName>', xml_response)
-        
-        countries = []
-        for code, name in zip(country_codes, country_names):
-            countries.append({"code": code, "name": name})
+        countries = self._call_shared("getCountries", {}, self._parse_countries)
         
         logger.info(f"Retrieved {len(countries)} countries")
         return countries
@@ -171,39 +399,53 @@ class TecDocClient:
             List of manufacturers with ID and name
         """
         params = {"linkingTargetType": linking_target_type}
-        xml_response = self._call_soap("getManufacturers", params)
-        
-        # Parse XML response
-        manu_ids = re.findall(r'<manuId>(\d+)</manuId>', xml_response)
-        manu_names = re.findall(r'<manuName>([^<]+)</manuName>', xml_response)
-        
-        manufacturers = []
-        for mid, name in zip(manu_ids, manu_names):
-            manufacturers.append({"id": mid, "name": name})
+        manufacturers = self._call_shared("getManufacturers", params, self._parse_manufacturers)
         
         logger.info(f"Retrieved {len(manufacturers)} manufacturers")
         return manufacturers
     
+    def get_brands(self) -> List[Dict[str, str]]:
+        """
+        Get list of parts brands (DataSuppliers).
+        
+        Returns:
+            List of brands with DataSupplier ID and name
+        """
+        brands = self._call_shared("getBrands", {}, self._parse_brands)
+        
+        logger.info(f"Retrieved {len(brands)} brands")
+        return brands
+    
     def get_articles(
         self,
-        data_supplier_id: Optional[int] = None,
+        data_supplier_id: Optional[Union[int, Sequence[int]]] = None,
         manufacturer_id: Optional[int] = None,
         article_country: Optional[str] = None,
         page_size: int = 100,
-        page_number: int = 0
+        page_number: int = 0,
+        as_table: bool = False,
+        fresh: bool = False
     ) -> Dict[str, Any]:
         """
         Get articles (parts) with optional filters.
         
         Args:
-            data_supplier_id: Filter by parts supplier (e.g., 3 for ATE, 2 for BOSCH)
+            data_supplier_id: Filter by parts supplier (e.g., 3 for ATE, 2 for BOSCH),
+                or a list of suppliers queried in one request
             manufacturer_id: Filter by car manufacturer (e.g., 4 for BMW)
             article_country: Article country code (default: same as client country)
             page_size: Number of results per page (max 100)
             page_number: Page number (0-based)
+            as_table: Return the articles as a compact ``ArticleTable``
+                instead of a list of dicts (default: False)
+            fresh: Fetch from the API even if the page is cached; the
+                response still refreshes the cache (default: False)
             
         Returns:
-            Dict with total count and list of articles
+            Dict with total count and list (or ArticleTable) of articles
+            
+        Raises:
+            ValueError: If ``data_supplier_id`` is an empty sequence
         """
         params = {
             "articleCountry": article_country or self.country,
@@ -211,30 +453,20 @@ class TecDocClient:
             "pageNumber": page_number,
         }
         
-        if data_supplier_id:
+        if isinstance(data_supplier_id, (list, tuple, set)):
+            if not data_supplier_id:
+                # An empty filter would silently query every supplier
+                raise ValueError("get_articles: data_supplier_id must not be an empty sequence")
+            # Sorted, so every order of the same suppliers shares a cache entry
+            params["dataSupplierIds"] = sorted({int(i) for i in data_supplier_id})
+        elif data_supplier_id:
             params["dataSupplierIds"] = data_supplier_id
         
         if manufacturer_id:
             params["manufacturerId"] = manufacturer_id
         
-        xml_response = self._call_soap("getArticles", params)
-        
-        # Parse XML response
-        total_match = re.search(r'<totalMatchingArticles>(\d+)</totalMatchingArticles>', xml_response)
-        total = int(total_match.group(1)) if total_match else 0
-        
-        # Extract articles
-        article_numbers = re.findall(r'<articleNumber>([^<]+)</articleNumber>', xml_response)
-        mfr_ids = re.findall(r'<mfrId>(\d+)</mfrId>', xml_response)
-        mfr_names = re.findall(r'<mfrName>([^<]+)</mfrName>', xml_response)
-        
-        articles = []
-        for artnum, mfr_id, mfr_name in zip(article_numbers, mfr_ids, mfr_names):
-            articles.append({
-                "number": artnum,
-                "manufacturer_id": mfr_id,
-                "manufacturer_name": mfr_name
-            })
+        parse = self._parse_article_table if as_table else self._parse_articles
+        total, articles = self._call_shared("getArticles", params, parse, fresh)
         
         logger.info(
             f"Retrieved {len(articles)} articles (total: {total}, page: {page_number})"
@@ -247,39 +479,266 @@ class TecDocClient:
             "articles": articles
         }
     
-    def get_raw_response(self, function: str, params: Dict[str, Any]) -> str:
+    def get_articles_batched(
+        self,
+        data_supplier_ids: Iterable[int],
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        batch_size: int = 10,
+        prefetch: int = 2
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Fetch all articles of several suppliers with combined requests.
+        
+        Up to ``batch_size`` suppliers are packed into the ``dataSupplierIds``
+        of one query, whose pages are then split back per supplier. Small
+        suppliers share pages instead of costing one request each.
+        
+        Args:
+            data_supplier_ids: Parts suppliers
+            manufacturer_id: Filter by car manufacturer
+            article_country: Article country code (default: same as client country)
+            page_size: Number of results per page (max 100)
+            batch_size: Suppliers per combined query (default: 10)
+            prefetch: Number of pages fetched ahead in background (default: 2)
+            
+        Returns:
+            Dict of DataSupplier ID -> article dicts (empty list for
+            suppliers without articles)
+        """
+        if batch_size < 1:
+            raise ValueError("get_articles_batched: batch_size must be >= 1")
+        
+        supplier_ids = sorted({int(i) for i in data_supplier_ids})
+        result: Dict[int, List[Dict[str, Any]]] = {}
+        for start in range(0, len(supplier_ids), batch_size):
+            batch = supplier_ids[start:start + batch_size]
+            articles = self.iter_articles(
+                data_supplier_id=batch if len(batch) > 1 else batch[0],
+                manufacturer_id=manufacturer_id,
+                article_country=article_country,
+                page_size=page_size,
+                prefetch=prefetch,
+            )
+            result.update(split_records(articles, "data_supplier_id", batch))
+        
+        logger.info(
+            f"Retrieved {sum(len(a) for a in result.values())} articles "
+            f"of {len(supplier_ids)} suppliers"
+        )
+        return result
+    
+    def iter_articles(
+        self,
+        data_supplier_id: Optional[Union[int, Sequence[int]]] = None,
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        prefetch: int = 2
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Lazily iterate over all articles matching the filters.
+        
+        The first page is fetched eagerly; while its articles are consumed,
+        up to ``prefetch`` following pages are fetched in the background.
+        At most ``prefetch + 1`` pages are held in memory at any time, and
+        iteration stops exactly after ``totalMatchingArticles`` articles.
+        
+        Args:
+            data_supplier_id: Filter by parts supplier (e.g., 3 for ATE, 2 for BOSCH),
+                or a list of suppliers queried together
+            manufacturer_id: Filter by car manufacturer (e.g., 4 for BMW)
+            article_country: Article country code (default: same as client country)
+            page_size: Number of results per page (max 100)
+            prefetch: Number of pages fetched ahead in background (default: 2,
+                0 disables read-ahead)
+            
+        Yields:
+            Article dicts as returned in ``get_articles()["articles"]``
+        """
+        if prefetch < 0:
+            raise ValueError("iter_articles: prefetch must be >= 0")
+        
+        query = {
+            "data_supplier_id": data_supplier_id,
+            "manufacturer_id": manufacturer_id,
+            "article_country": article_country,
+            "page_size": page_size,
+        }
+        
+        yielded = total = 0
+        pages = self._iter_pages(query, prefetch)
+        try:
+            for total, articles in pages:
+                for article in articles:
+                    if yielded >= total:
+                        return
+                    yield article
+                    yielded += 1
+        finally:
+            pages.close()
+        
+        if yielded < total:
+            logger.warning(f"Article iteration ended early ({yielded} of {total} articles)")
+    
+    def get_article_table(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+        article_country: Optional[str] = None,
+        page_size: int = 100,
+        prefetch: int = 2
+    ) -> "ArticleTable":
+        """
+        Fetch all articles matching the filters into one ``ArticleTable``.
+        
+        Pages are fetched like in ``iter_articles`` and concatenated column
+        by column, without building a dict per article.
+        
+        Args:
+            data_supplier_id: Filter by parts supplier (e.g., 3 for ATE, 2 for BOSCH)
+            manufacturer_id: Filter by car manufacturer (e.g., 4 for BMW)
+            article_country: Article country code (default: same as client country)
+            page_size: Number of results per page (max 100)
+            prefetch: Number of pages fetched ahead in background (default: 2)
+            
+        Returns:
+            Table with at most ``totalMatchingArticles`` articles
+        """
+        if prefetch < 0:
+            raise ValueError("get_article_table: prefetch must be >= 0")
+        
+        from article_table import ArticleTable
+        
+        query = {
+            "data_supplier_id": data_supplier_id,
+            "manufacturer_id": manufacturer_id,
+            "article_country": article_country,
+            "page_size": page_size,
+            "as_table": True,
+        }
+        
+        table = ArticleTable()
+        total = 0
+        pages = self._iter_pages(query, prefetch)
+        try:
+            for total, articles in pages:
+                table.extend(articles)
+                if len(table) >= total:
+                    break
+        finally:
+            pages.close()
+        
+        if len(table) > total:
+            table = table[:total]
+        elif len(table) < total:
+            logger.warning(f"Article table ended early ({len(table)} of {total} articles)")
+        return table
+    
+    def _iter_pages(self, query: Dict[str, Any], prefetch: int) -> Iterator[Tuple[int, Any]]:
+        """
+        Fetch consecutive article pages with read-ahead.
+        
+        The first page is fetched eagerly; while a page is consumed, up to
+        ``prefetch`` following pages are fetched in the background. Stops
+        after the last page or at the first empty page.
+        
+        Args:
+            query: Keyword arguments for ``get_articles`` (without page_number)
+            prefetch: Number of pages fetched ahead (0 disables read-ahead)
+            
+        Yields:
+            Tuples of (totalMatchingArticles, articles of the page)
+        """
+        first = self.get_articles(page_number=0, **query)
+        total = first["total"]
+        rows_per_page = len(first["articles"]) or query["page_size"]
+        page_count = math.ceil(total / rows_per_page)
+        
+        executor = ThreadPoolExecutor(max_workers=prefetch) if prefetch else None
+        pending: Deque[Future] = deque()
+        next_page = 1
+        
+        def fill() -> None:
+            nonlocal next_page
+            while executor and next_page < page_count and len(pending) < prefetch:
+                pending.append(
+                    executor.submit(self.get_articles, page_number=next_page, **query)
+                )
+                next_page += 1
+        
+        def next_articles() -> Any:
+            nonlocal next_page
+            if pending:
+                page = pending.popleft().result()
+            elif not executor and next_page < page_count:
+                page = self.get_articles(page_number=next_page, **query)
+                next_page += 1
+            else:
+                return []
+            fill()
+            return page["articles"]
+        
+        try:
+            fill()
+            articles = first["articles"]
+            while articles:
+                yield total, articles
+                articles = next_articles()
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor:
+                executor.shutdown(wait=False)
+    
+    def get_raw_response(self, function: str, params: Dict[str, Any], fresh: bool = False) -> str:
         """
         Get raw XML response for any function.
         
         Args:
             function: TecDoc function name
             params: Function parameters
+            fresh: Skip the cache lookup, e.g. after the caller already
+                missed it; the response is still cached (default: False)
             
         Returns:
             Raw XML response string
         """
-        return self._call_soap(function, params)
+        return self._call_shared(function, params, fresh=fresh)
+    
+    def close(self) -> None:
+        """Close the HTTP transport if it is owned by this client."""
+        if self._owns_transport:
+            self.transport.close()
+    
+    def __enter__(self) -> "TecDocClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
 
 if __name__ == "__main__":
-    # Example usage
-    client = TecDocClient()
-    
-    # Get countries
-    print("\n=== Countries ===")
-    countries = client.get_countries()
-    for country in countries:
-        print(f"  {country['code']}: {country['name']}")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
-    # Get manufacturers
-    print("\n=== Manufacturers (first 10) ===")
-    manufacturers = client.get_manufacturers()
-    for mfg in manufacturers[:10]:
-        print(f"  {mfg['id']}: {mfg['name']}")
-    
-    # Get ATE articles
-    print("\n=== ATE Articles (first 10) ===")
-    ate_articles = client.get_articles(data_supplier_id=3, page_size=10)
-    print(f"Total ATE articles: {ate_articles['total']}")
-    for article in ate_articles['articles']:
-        print(f"  {article['number']} - {article['manufacturer_name']}")
+    # Example usage
+    with TecDocClient() as client:
+        # Get countries
+        print("\n=== Countries ===")
+        countries = client.get_countries()
+        for country in countries:
+            print(f"  {country['code']}: {country['name']}")
+        
+        # Get manufacturers
+        print("\n=== Manufacturers (first 10) ===")
+        manufacturers = client.get_manufacturers()
+        for mfg in manufacturers[:10]:
+            print(f"  {mfg['id']}: {mfg['name']}")
+        
+        # Get ATE articles
+        print("\n=== ATE Articles (first 10) ===")
+        ate_articles = client.get_articles(data_supplier_id=3, page_size=10)
+        print(f"Total ATE articles: {ate_articles['total']}")
+        for article in ate_articles['articles']:
+            print(f"  {article['number']} - {article['manufacturer_name']}")
@@ -0,0 +1,373 @@
+"""
+TecDoc Article Count Matrix
+===========================
+
+Article counts per (dataSupplierId, manufacturerId), precomputed for crawl
+planning and query routing.
+
+Every cell is one count-only ``getArticles`` request (``pageSize=1``, only
+``totalMatchingArticles`` is used), issued in parallel. The matrix is
+sparse: a cell exists once it was counted, and stores its count together
+with the time it was counted. A refresh only requests cells that are
+missing or older than ``max_age``; suppliers without any articles are
+counted once and all their cells are filled with zero without further
+requests.
+
+Cells live in a small SQLite table and are mirrored in memory, so reads
+never touch the network or the disk.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS article_counts (
+    data_supplier_id INTEGER NOT NULL,
+    manufacturer_id INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    checked REAL NOT NULL,
+    PRIMARY KEY (country, data_supplier_id, manufacturer_id)
+) WITHOUT ROWID;
+"""
+
+UPSERT_COUNT = """
+INSERT INTO article_counts (data_supplier_id, manufacturer_id, country, total, checked)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (country, data_supplier_id, manufacturer_id) DO UPDATE SET
+    total = excluded.total,
+    checked = excluded.checked
+"""
+
+# manufacturer_id of the per-supplier total (all manufacturers)
+ALL_MANUFACTURERS = 0
+
+Cell = Tuple[int, int]
+
+
+class CountMatrix:
+    """
+    Sparse, timestamped supplier x manufacturer article-count matrix.
+
+    Thread-safe. One matrix holds the counts of one article country.
+    """
+
+    def __init__(
+        self,
+        path: str = "tecdoc_counts.sqlite",
+        country: str = "de",
+        batch_size: int = 500
+    ) -> None:
+        """
+        Open (or create) a count matrix.
+
+        Args:
+            path: SQLite file (":memory:" for a matrix that is not persisted)
+            country: Article country the counts belong to (default: "de")
+            batch_size: Counted cells per write transaction (default: 500)
+        """
+        if batch_size < 1:
+            raise ValueError("CountMatrix: batch_size must be >= 1")
+
+        self.path = path
+        self.country = country.lower()
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        # (supplier, manufacturer) -> (total, checked)
+        self._cells: Dict[Cell, Tuple[int, float]] = {
+            (supplier_id, manufacturer_id): (total, checked)
+            for supplier_id, manufacturer_id, total, checked in self._db.execute(
+                "SELECT data_supplier_id, manufacturer_id, total, checked "
+                "FROM article_counts WHERE country = ?",
+                (self.country,),
+            )
+        }
+
+    # ===== Reads =====
+
+    def count(self, data_supplier_id: int, manufacturer_id: Optional[int] = None) -> Optional[int]:
+        """
+        Get the article count of one cell.
+
+        Args:
+            data_supplier_id: Parts supplier
+            manufacturer_id: Car manufacturer (default: all manufacturers)
+
+        Returns:
+            Article count, or None if the cell was never counted
+        """
+        cell = self._cells.get((data_supplier_id, manufacturer_id or ALL_MANUFACTURERS))
+        return cell[0] if cell else None
+
+    def checked(self, data_supplier_id: int, manufacturer_id: Optional[int] = None) -> Optional[float]:
+        """
+        Get the time a cell was counted.
+
+        Args:
+            data_supplier_id: Parts supplier
+            manufacturer_id: Car manufacturer (default: all manufacturers)
+
+        Returns:
+            Unix timestamp, or None if the cell was never counted
+        """
+        cell = self._cells.get((data_supplier_id, manufacturer_id or ALL_MANUFACTURERS))
+        return cell[1] if cell else None
+
+    def supplier_counts(self, data_supplier_id: int) -> Dict[int, int]:
+        """
+        Get the counted cells of one supplier.
+
+        Args:
+            data_supplier_id: Parts supplier
+
+        Returns:
+            Dict of manufacturer ID -> article count (without the supplier total)
+        """
+        with self._lock:
+            cells = list(self._cells.items())
+        return {
+            manufacturer_id: total
+            for (supplier_id, manufacturer_id), (total, _) in cells
+            if supplier_id == data_supplier_id and manufacturer_id != ALL_MANUFACTURERS
+        }
+
+    def manufacturer_counts(self, manufacturer_id: int) -> Dict[int, int]:
+        """
+        Get the counted cells of one manufacturer.
+
+        Args:
+            manufacturer_id: Car manufacturer
+
+        Returns:
+            Dict of supplier ID -> article count
+        """
+        with self._lock:
+            cells = list(self._cells.items())
+        return {
+            supplier_id: total
+            for (supplier_id, mfr_id), (total, _) in cells
+            if mfr_id == manufacturer_id
+        }
+
+    def cells(self, min_count: int = 1) -> Iterator[Tuple[int, Optional[int], int]]:
+        """
+        Iterate over the counted cells, e.g. as crawl slices.
+
+        Args:
+            min_count: Skip cells with fewer articles (default: 1, skip empty cells)
+
+        Yields:
+            Tuples of (supplier ID, manufacturer ID or None for the supplier
+            total, article count), sorted by supplier and manufacturer
+        """
+        with self._lock:
+            cells = sorted(self._cells.items())
+        for (supplier_id, manufacturer_id), (total, _) in cells:
+            if total >= min_count:
+                yield supplier_id, manufacturer_id or None, total
+
+    def stale_cells(
+        self,
+        supplier_ids: Iterable[int],
+        manufacturer_ids: Iterable[Optional[int]],
+        max_age: Optional[float] = None
+    ) -> List[Cell]:
+        """
+        Get the cells of a grid that are missing or older than ``max_age``.
+
+        Args:
+            supplier_ids: Parts suppliers
+            manufacturer_ids: Car manufacturers (None for the supplier total)
+            max_age: Maximum age in seconds (default: only missing cells)
+
+        Returns:
+            Stale (supplier, manufacturer) cells
+        """
+        cutoff = time.time() - max_age if max_age is not None else None
+        manufacturer_ids = [m or ALL_MANUFACTURERS for m in manufacturer_ids]
+        stale = []
+        with self._lock:
+            for supplier_id in supplier_ids:
+                for manufacturer_id in manufacturer_ids:
+                    cell = self._cells.get((supplier_id, manufacturer_id))
+                    if cell is None or (cutoff is not None and cell[1] < cutoff):
+                        stale.append((supplier_id, manufacturer_id))
+        return stale
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get matrix statistics.
+
+        Returns:
+            Dict with ``cells``, ``nonzero`` cells, ``suppliers``, ``oldest``
+            and ``newest`` check timestamps
+        """
+        with self._lock:
+            values = list(self._cells.values())
+            suppliers = {supplier_id for supplier_id, _ in self._cells}
+        checked = [c for _, c in values]
+        return {
+            "cells": len(values),
+            "nonzero": sum(1 for total, _ in values if total),
+            "suppliers": len(suppliers),
+            "oldest": min(checked) if checked else None,
+            "newest": max(checked) if checked else None,
+        }
+
+    # ===== Refresh =====
+
+    def set_count(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int],
+        total: int,
+        checked: Optional[float] = None
+    ) -> None:
+        """
+        Record a count obtained elsewhere (e.g. from a crawl's first page).
+
+        Args:
+            data_supplier_id: Parts supplier
+            manufacturer_id: Car manufacturer (None for the supplier total)
+            total: Article count
+            checked: Time of the count (default: now)
+        """
+        self._write([(data_supplier_id, manufacturer_id or ALL_MANUFACTURERS, total, checked or time.time())])
+
+    def _write(self, rows: List[Tuple[int, int, int, float]]) -> None:
+        """Persist counted cells in one transaction and mirror them in memory."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    UPSERT_COUNT,
+                    [(s, m, self.country, total, checked) for s, m, total, checked in rows],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            for supplier_id, manufacturer_id, total, checked in rows:
+                self._cells[(supplier_id, manufacturer_id)] = (total, checked)
+
+    def refresh(
+        self,
+        client: Any,
+        supplier_ids: Iterable[int],
+        manufacturer_ids: Iterable[Optional[int]] = (None,),
+        max_age: Optional[float] = None,
+        workers: int = 8
+    ) -> Dict[str, int]:
+        """
+        Count the stale cells of a supplier x manufacturer grid in parallel.
+
+        Supplier totals are counted first (also when not part of the grid);
+        the manufacturer cells of a supplier without articles are set to
+        zero without requests. Cells whose request fails are left stale and
+        are retried by the next refresh.
+
+        Args:
+            client: ``TecDocClient`` for this matrix's article country
+            supplier_ids: Parts suppliers
+            manufacturer_ids: Car manufacturers, None for the supplier
+                total (default: supplier totals only)
+            max_age: Re-count cells older than this many seconds (default:
+                only count missing cells)
+            workers: Parallel requests (default: 8)
+
+        Returns:
+            Dict with ``requested`` cells, ``pruned`` (zero without a
+            request), ``failed`` and ``fresh`` (skipped) cells
+        """
+        if workers < 1:
+            raise ValueError("refresh: workers must be >= 1")
+
+        supplier_ids = list(dict.fromkeys(supplier_ids))
+        manufacturer_ids = list(dict.fromkeys(m or ALL_MANUFACTURERS for m in manufacturer_ids))
+        grid = len(supplier_ids) * len(manufacturer_ids)
+        result = {"requested": 0, "pruned": 0, "failed": 0, "fresh": 0}
+        result["fresh"] = grid - len(self.stale_cells(supplier_ids, manufacturer_ids, max_age))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tecdoc-count") as executor:
+            totals = self.stale_cells(supplier_ids, [None], max_age)
+            self._count_cells(client, executor, totals, result)
+
+            stale = self.stale_cells(
+                supplier_ids, [m for m in manufacturer_ids if m != ALL_MANUFACTURERS], max_age
+            )
+            now = time.time()
+            empty = [cell for cell in stale if self.count(cell[0]) == 0]
+            if empty:
+                self._write([(s, m, 0, now) for s, m in empty])
+                result["pruned"] = len(empty)
+            pruned = set(empty)
+            self._count_cells(client, executor, [c for c in stale if c not in pruned], result)
+
+        logger.info(
+            f"Count matrix refreshed: {result['requested']} requests, {result['pruned']} pruned, "
+            f"{result['failed']} failed, {result['fresh']} fresh"
+        )
+        return result
+
+    def _count_cells(
+        self,
+        client: Any,
+        executor: ThreadPoolExecutor,
+        cells: List[Cell],
+        result: Dict[str, int]
+    ) -> None:
+        """Count cells with count-only requests, writing them in batches."""
+        def count(cell: Cell) -> Optional[Tuple[int, int, int, float]]:
+            supplier_id, manufacturer_id = cell
+            try:
+                # Bypass the response cache: the count is stamped with the current time
+                page = client.get_articles(
+                    data_supplier_id=supplier_id,
+                    manufacturer_id=manufacturer_id or None,
+                    article_country=self.country,
+                    page_size=1,
+                    fresh=True,
+                )
+            except Exception as exc:
+                logger.warning(f"Counting {supplier_id}/{manufacturer_id} failed: {exc}")
+                return None
+            return supplier_id, manufacturer_id, page["total"], time.time()
+
+        batch: List[Tuple[int, int, int, float]] = []
+        for row in executor.map(count, cells):
+            result["requested"] += 1
+            if row is None:
+                result["failed"] += 1
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "CountMatrix":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
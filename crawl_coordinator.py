@@ -0,0 +1,408 @@
+"""
+TecDoc Crawl Coordinator
+========================
+
+Resumable, multi-process crawling of supplier x manufacturer catalogues.
+
+The crawl is split into work units of (dataSupplierId, manufacturerId,
+page range) kept in a SQLite queue. Workers lease a unit, fetch its pages,
+record a checkpoint (next page) after every page and mark the unit done.
+A lease expires unless it is renewed by a heartbeat, so the units of a
+crashed worker are picked up again by others, resuming at the checkpoint.
+Completed units are never leased again.
+
+Any number of processes can share one queue file. Within one host the
+file uses WAL mode; for several hosts sharing a network file system,
+open it with ``wal=False`` (WAL needs shared memory).
+"""
+
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_units (
+    id INTEGER PRIMARY KEY,
+    data_supplier_id INTEGER NOT NULL,
+    manufacturer_id INTEGER NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER NOT NULL,
+    page_size INTEGER NOT NULL,
+    next_page INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL NOT NULL,
+    UNIQUE (data_supplier_id, manufacturer_id, first_page)
+);
+CREATE INDEX IF NOT EXISTS crawl_units_status ON crawl_units (status, lease_expires);
+"""
+
+# manufacturer_id stored for units that cover all manufacturers
+ALL_MANUFACTURERS = 0
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Called with (unit, page_number, articles) for every fetched page
+PageSink = Callable[[Dict[str, Any], int, List[Dict[str, Any]]], None]
+
+_UNIT_COLUMNS = (
+    "id", "data_supplier_id", "manufacturer_id", "first_page", "last_page",
+    "page_size", "next_page", "attempts", "rows",
+)
+
+
+class LeaseLostError(RuntimeError):
+    """The lease of a work unit expired and was taken over by another worker."""
+
+
+class CrawlCoordinator:
+    """
+    SQLite-backed work queue with leases, heartbeats and checkpoints.
+
+    Work units are dicts with ``id``, ``data_supplier_id``,
+    ``manufacturer_id`` (None for all manufacturers), ``first_page``,
+    ``last_page`` (exclusive), ``page_size``, ``next_page`` (checkpoint),
+    ``attempts``, ``rows`` and the lease ``token``.
+    """
+
+    def __init__(
+        self,
+        path: str = "tecdoc_crawl.sqlite",
+        lease_seconds: float = 300.0,
+        max_attempts: int = 5,
+        worker_id: Optional[str] = None,
+        wal: bool = True
+    ) -> None:
+        """
+        Open (or create) a crawl queue.
+
+        Args:
+            path: SQLite queue file shared by all workers
+            lease_seconds: Lease duration; a unit whose lease is not renewed
+                in time is handed to another worker (default: 300)
+            max_attempts: Leases per unit before it is marked failed (default: 5)
+            worker_id: Name recorded on leased units (default: host:pid)
+            wal: Use WAL journaling; disable for files on network shares
+                (default: True)
+        """
+        if lease_seconds <= 0:
+            raise ValueError("CrawlCoordinator: lease_seconds must be > 0")
+        if max_attempts < 1:
+            raise ValueError("CrawlCoordinator: max_attempts must be >= 1")
+
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._db.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self._db.executescript(SCHEMA)
+
+    # ===== Planning =====
+
+    def add_slice(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int],
+        page_count: int,
+        pages_per_unit: int = 50,
+        page_size: int = 100
+    ) -> int:
+        """
+        Split one slice into work units. Existing units are kept.
+
+        Args:
+            data_supplier_id: Parts supplier
+            manufacturer_id: Car manufacturer filter (None for all)
+            page_count: Number of pages of the slice
+            pages_per_unit: Pages per work unit (default: 50)
+            page_size: Requested rows per page (default: 100)
+
+        Returns:
+            Number of new units
+        """
+        if pages_per_unit < 1:
+            raise ValueError("add_slice: pages_per_unit must be >= 1")
+
+        now = time.time()
+        rows = [
+            (data_supplier_id, manufacturer_id or ALL_MANUFACTURERS, first,
+             min(first + pages_per_unit, page_count), page_size, first, now)
+            for first in range(0, page_count, pages_per_unit)
+        ]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO crawl_units "
+                "(data_supplier_id, manufacturer_id, first_page, last_page, page_size, next_page, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    def plan(
+        self,
+        client: Any,
+        slices: Iterable[Tuple[int, Optional[int]]],
+        pages_per_unit: int = 50,
+        page_size: int = 100
+    ) -> int:
+        """
+        Probe the size of every slice and add its work units.
+
+        One ``get_articles`` call per slice learns ``totalMatchingArticles``
+        and the number of rows the server really returns per page.
+
+        Args:
+            client: ``TecDocClient``
+            slices: (dataSupplierId, manufacturerId or None) pairs
+            pages_per_unit: Pages per work unit (default: 50)
+            page_size: Requested rows per page (default: 100)
+
+        Returns:
+            Number of new units
+        """
+        added = 0
+        for data_supplier_id, manufacturer_id in slices:
+            first = client.get_articles(
+                data_supplier_id=data_supplier_id,
+                manufacturer_id=manufacturer_id,
+                page_size=page_size,
+                page_number=0,
+            )
+            rows_per_page = len(first["articles"]) or page_size
+            page_count = math.ceil(first["total"] / rows_per_page)
+            added += self.add_slice(
+                data_supplier_id, manufacturer_id, page_count, pages_per_unit, page_size
+            )
+        logger.info(f"Crawl planned: {added} new units")
+        return added
+
+    # ===== Leasing =====
+
+    def lease(self) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next pending (or expired) work unit.
+
+        Returns:
+            Work unit, or None if no unit is available right now
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that used up their attempts are given up
+                self._db.execute(
+                    "UPDATE crawl_units SET status = ?, error = 'lease expired', updated = ? "
+                    "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, now, LEASED, now, self.max_attempts),
+                )
+                row = self._db.execute(
+                    f"SELECT {', '.join(_UNIT_COLUMNS)} FROM crawl_units "
+                    "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE crawl_units SET status = ?, worker = ?, token = ?, "
+                        "lease_expires = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (LEASED, self.worker_id, token, now + self.lease_seconds, now, row[0]),
+                    )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+        if row is None:
+            return None
+        unit = dict(zip(_UNIT_COLUMNS, row))
+        unit["manufacturer_id"] = unit["manufacturer_id"] or None
+        unit["attempts"] += 1
+        unit["token"] = token
+        return unit
+
+    def heartbeat(self, unit: Dict[str, Any], next_page: Optional[int] = None, rows: int = 0) -> None:
+        """
+        Renew the lease of a unit and record a checkpoint.
+
+        Args:
+            unit: Leased work unit
+            next_page: First page not yet processed (default: unchanged)
+            rows: Rows processed since the last checkpoint
+
+        Raises:
+            LeaseLostError: If the lease expired and was taken over
+        """
+        if next_page is not None:
+            unit["next_page"] = next_page
+        unit["rows"] += rows
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE crawl_units SET lease_expires = ?, next_page = ?, rows = ?, updated = ? "
+                "WHERE id = ? AND token = ? AND status = ?",
+                (now + self.lease_seconds, unit["next_page"], unit["rows"], now,
+                 unit["id"], unit["token"], LEASED),
+            )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"CrawlCoordinator: lease of unit {unit['id']} was lost")
+
+    def complete(self, unit: Dict[str, Any]) -> None:
+        """
+        Mark a leased unit as done.
+
+        Raises:
+            LeaseLostError: If the lease expired and was taken over
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE crawl_units SET status = ?, next_page = last_page, rows = ?, "
+                "token = NULL, lease_expires = NULL, error = NULL, updated = ? "
+                "WHERE id = ? AND token = ? AND status = ?",
+                (DONE, unit["rows"], time.time(), unit["id"], unit["token"], LEASED),
+            )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"CrawlCoordinator: lease of unit {unit['id']} was lost")
+
+    def release(self, unit: Dict[str, Any], error: Optional[str] = None) -> None:
+        """
+        Give a leased unit back, keeping its checkpoint.
+
+        The unit becomes pending again, or failed once it has used up
+        ``max_attempts`` leases.
+
+        Args:
+            unit: Leased work unit
+            error: Failure description, if the unit failed
+        """
+        status = FAILED if error and unit["attempts"] >= self.max_attempts else PENDING
+        with self._lock:
+            self._db.execute(
+                "UPDATE crawl_units SET status = ?, token = NULL, lease_expires = NULL, "
+                "error = ?, updated = ? WHERE id = ? AND token = ?",
+                (status, error, time.time(), unit["id"], unit["token"]),
+            )
+
+    # ===== Workers =====
+
+    def run_worker(
+        self,
+        client: Any,
+        sink: PageSink,
+        max_units: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Process units until the queue has nothing left to lease.
+
+        Pages are delivered to ``sink`` before their checkpoint is written,
+        so after a crash the page in progress may be delivered again; the
+        sink should be idempotent (e.g. ``ArticleStore.upsert_articles``).
+
+        Args:
+            client: ``TecDocClient``
+            sink: Called with (unit, page_number, articles) for every page
+            max_units: Stop after this many units (default: no limit)
+
+        Returns:
+            Dict with units done, units failed, pages and rows processed
+        """
+        summary = {"units": 0, "failed": 0, "pages": 0, "rows": 0}
+        while max_units is None or summary["units"] + summary["failed"] < max_units:
+            unit = self.lease()
+            if unit is None:
+                break
+            try:
+                for page_number in range(unit["next_page"], unit["last_page"]):
+                    articles = client.get_articles(
+                        data_supplier_id=unit["data_supplier_id"],
+                        manufacturer_id=unit["manufacturer_id"],
+                        page_size=unit["page_size"],
+                        page_number=page_number,
+                    )["articles"]
+                    sink(unit, page_number, articles)
+                    self.heartbeat(unit, page_number + 1, len(articles))
+                    summary["pages"] += 1
+                    summary["rows"] += len(articles)
+                self.complete(unit)
+                summary["units"] += 1
+            except LeaseLostError as exc:
+                logger.warning(str(exc))
+            except Exception as exc:
+                logger.error(f"Crawl unit {unit['id']} failed: {exc}")
+                self.release(unit, error=str(exc))
+                summary["failed"] += 1
+        logger.info(f"Crawl worker {self.worker_id} finished: {summary}")
+        return summary
+
+    # ===== Status =====
+
+    def progress(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+
+        Returns:
+            Dict with unit counts per status, pages done and total, and rows processed
+        """
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM crawl_units GROUP BY status"
+            ).fetchall())
+            pages_done, pages_total, rows = self._db.execute(
+                "SELECT COALESCE(SUM(next_page - first_page), 0), "
+                "COALESCE(SUM(last_page - first_page), 0), COALESCE(SUM(rows), 0) FROM crawl_units"
+            ).fetchone()
+        return {
+            **{status: counts.get(status, 0) for status in (PENDING, LEASED, DONE, FAILED)},
+            "pages_done": pages_done,
+            "pages_total": pages_total,
+            "rows": rows,
+        }
+
+    def retry_failed(self) -> int:
+        """
+        Make failed units pending again (with fresh attempts).
+
+        Returns:
+            Number of units reset
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE crawl_units SET status = ?, attempts = 0, error = NULL, updated = ? "
+                "WHERE status = ?",
+                (PENDING, time.time(), FAILED),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the queue database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "CrawlCoordinator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
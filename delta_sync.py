@@ -0,0 +1,376 @@
+"""
+TecDoc Delta Sync
+=================
+
+Incremental synchronisation of supplier catalogues.
+
+The catalogue is split into slices of (dataSupplierId, manufacturerId).
+For every slice the engine records ``totalMatchingArticles``, a content
+hash per fetched page and the slice's articles. On the next run a slice
+is only re-crawled when its total or one of a few sample pages (first,
+last and random pages) has changed; otherwise it is skipped after a
+handful of requests. Pages are always fetched from the API (bypassing a
+response cache of the client), so a slice is never compared with a
+cached copy of itself. Re-crawled slices produce an added/removed/changed
+article delta against the previous state.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from article_store import ArticleStore
+from core_tecdoc_client import TecDocClient
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_slices (
+    data_supplier_id INTEGER NOT NULL,
+    manufacturer_id INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    rows_per_page INTEGER NOT NULL,
+    synced REAL NOT NULL,
+    PRIMARY KEY (data_supplier_id, manufacturer_id)
+);
+CREATE TABLE IF NOT EXISTS sync_pages (
+    data_supplier_id INTEGER NOT NULL,
+    manufacturer_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (data_supplier_id, manufacturer_id, page)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_articles (
+    data_supplier_id INTEGER NOT NULL,
+    manufacturer_id INTEGER NOT NULL,
+    article_number TEXT NOT NULL,
+    mfr_id TEXT,
+    mfr_name TEXT,
+    PRIMARY KEY (data_supplier_id, manufacturer_id, article_number)
+) WITHOUT ROWID;
+"""
+
+# manufacturer_id stored for slices that cover all manufacturers
+ALL_MANUFACTURERS = 0
+
+
+def page_hash(articles: List[Dict[str, Any]]) -> str:
+    """
+    Compute the content hash of one page of articles.
+
+    Args:
+        articles: Articles as returned by ``TecDocClient.get_articles``
+
+    Returns:
+        Hex digest over article number, mfr ID and mfr name of every article
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for article in articles:
+        digest.update(
+            f"{article['number']}\x1f{article['manufacturer_id']}\x1f"
+            f"{article['manufacturer_name']}\x1e".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+class DeltaSync:
+    """
+    Delta sync engine for (supplier, manufacturer) catalogue slices.
+
+    State is kept in its own SQLite file, so syncs can run from cron.
+    """
+
+    def __init__(
+        self,
+        client: TecDocClient,
+        path: str = "tecdoc_sync.sqlite",
+        page_size: int = 100,
+        sample_pages: int = 2,
+        workers: int = 4,
+        store: Optional[ArticleStore] = None
+    ) -> None:
+        """
+        Initialize delta sync engine.
+
+        Args:
+            client: TecDoc client used for fetching
+            path: SQLite file holding the sync state
+            page_size: Requested rows per page
+            sample_pages: Random middle pages compared besides the first and
+                last page before a slice is considered unchanged (default: 2)
+            workers: Pages fetched in parallel (default: 4)
+            store: Optional article store the deltas are applied to
+        """
+        if workers < 1:
+            raise ValueError("DeltaSync: workers must be >= 1")
+
+        self.client = client
+        self.page_size = page_size
+        self.sample_pages = sample_pages
+        self.workers = workers
+        self.store = store
+
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def _fetch_pages(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int],
+        pages: Iterable[int]
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Fetch several pages in parallel and return their articles by page number."""
+        pages = list(pages)
+
+        def fetch(page_number: int) -> List[Dict[str, Any]]:
+            return self.client.get_articles(
+                data_supplier_id=data_supplier_id,
+                manufacturer_id=manufacturer_id,
+                page_size=self.page_size,
+                page_number=page_number,
+                fresh=True,
+            )["articles"]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(pages, executor.map(fetch, pages)))
+
+    def _load_state(
+        self,
+        data_supplier_id: int,
+        manufacturer_key: int
+    ) -> Tuple[Optional[Tuple[int, int]], Dict[int, str]]:
+        """Load (total, rows_per_page) and page hashes of a slice."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT total, rows_per_page FROM sync_slices "
+                "WHERE data_supplier_id = ? AND manufacturer_id = ?",
+                (data_supplier_id, manufacturer_key),
+            ).fetchone()
+            hashes = dict(self._db.execute(
+                "SELECT page, hash FROM sync_pages "
+                "WHERE data_supplier_id = ? AND manufacturer_id = ?",
+                (data_supplier_id, manufacturer_key),
+            ).fetchall())
+        return row, hashes
+
+    def _samples_match(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int],
+        page_count: int,
+        pages: Dict[int, List[Dict[str, Any]]],
+        old_hashes: Dict[int, str]
+    ) -> bool:
+        """Fetch the sample pages into ``pages`` and compare them with the stored hashes."""
+        if page_hash(pages[0]) != old_hashes.get(0):
+            return False
+
+        middle = range(1, page_count - 1)
+        sample = set(random.sample(middle, min(self.sample_pages, len(middle))))
+        if page_count > 1:
+            sample.add(page_count - 1)
+
+        pages.update(self._fetch_pages(data_supplier_id, manufacturer_id, sorted(sample)))
+        return all(page_hash(pages[n]) == old_hashes.get(n) for n in sample)
+
+    def sync_slice(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int] = None,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Synchronise one slice.
+
+        Args:
+            data_supplier_id: Parts supplier
+            manufacturer_id: Car manufacturer filter (default: all)
+            force: Re-crawl even if the sample pages are unchanged
+
+        Returns:
+            Dict with slice key, ``status`` ("unchanged" or "synced"),
+            ``total``, ``requests`` issued and the ``added``, ``removed`` and
+            ``changed`` article lists
+        """
+        manufacturer_key = manufacturer_id or ALL_MANUFACTURERS
+        state, old_hashes = self._load_state(data_supplier_id, manufacturer_key)
+
+        first = self.client.get_articles(
+            data_supplier_id=data_supplier_id,
+            manufacturer_id=manufacturer_id,
+            page_size=self.page_size,
+            page_number=0,
+            fresh=True,
+        )
+        total = first["total"]
+        rows_per_page = len(first["articles"]) or self.page_size
+        page_count = math.ceil(total / rows_per_page)
+        pages = {0: first["articles"]}
+
+        result = {
+            "data_supplier_id": data_supplier_id,
+            "manufacturer_id": manufacturer_id,
+            "total": total,
+            "added": [],
+            "removed": [],
+            "changed": [],
+        }
+
+        if not force and state == (total, rows_per_page) and self._samples_match(
+            data_supplier_id, manufacturer_id, page_count, pages, old_hashes
+        ):
+            with self._lock:
+                self._db.execute(
+                    "UPDATE sync_slices SET synced = ? "
+                    "WHERE data_supplier_id = ? AND manufacturer_id = ?",
+                    (time.time(), data_supplier_id, manufacturer_key),
+                )
+            logger.info(
+                f"Slice {data_supplier_id}/{manufacturer_key} unchanged "
+                f"({total} articles, {len(pages)} requests)"
+            )
+            result.update(status="unchanged", requests=len(pages))
+            return result
+
+        missing = [n for n in range(page_count) if n not in pages]
+        requests_made = len(pages) + len(missing)
+        pages.update(self._fetch_pages(data_supplier_id, manufacturer_id, missing))
+
+        current: Dict[str, Dict[str, Any]] = {}
+        for page_number in sorted(pages):
+            for article in pages[page_number]:
+                current[article["number"]] = article
+
+        with self._lock:
+            previous = {
+                number: (mfr_id, mfr_name)
+                for number, mfr_id, mfr_name in self._db.execute(
+                    "SELECT article_number, mfr_id, mfr_name FROM sync_articles "
+                    "WHERE data_supplier_id = ? AND manufacturer_id = ?",
+                    (data_supplier_id, manufacturer_key),
+                )
+            }
+
+        for number, article in current.items():
+            old = previous.pop(number, None)
+            if old is None:
+                result["added"].append(article)
+            elif old != (article["manufacturer_id"], article["manufacturer_name"]):
+                result["changed"].append(article)
+        result["removed"] = [
+            {
+                "number": number,
+                "manufacturer_id": mfr_id,
+                "manufacturer_name": mfr_name,
+                "data_supplier_id": data_supplier_id,
+            }
+            for number, (mfr_id, mfr_name) in previous.items()
+        ]
+
+        self._save_state(data_supplier_id, manufacturer_key, total, rows_per_page, pages, current)
+        self._apply_to_store(data_supplier_id, manufacturer_id, result)
+
+        logger.info(
+            f"Slice {data_supplier_id}/{manufacturer_key} synced: "
+            f"+{len(result['added'])} -{len(result['removed'])} ~{len(result['changed'])} "
+            f"({requests_made} requests)"
+        )
+        result.update(status="synced", requests=requests_made)
+        return result
+
+    def _save_state(
+        self,
+        data_supplier_id: int,
+        manufacturer_key: int,
+        total: int,
+        rows_per_page: int,
+        pages: Dict[int, List[Dict[str, Any]]],
+        articles: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """Replace the stored state of a slice in one transaction."""
+        key = (data_supplier_id, manufacturer_key)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for table in ("sync_pages", "sync_articles"):
+                    self._db.execute(
+                        f"DELETE FROM {table} WHERE data_supplier_id = ? AND manufacturer_id = ?", key
+                    )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_slices "
+                    "(data_supplier_id, manufacturer_id, total, rows_per_page, synced) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    key + (total, rows_per_page, time.time()),
+                )
+                self._db.executemany(
+                    "INSERT INTO sync_pages (data_supplier_id, manufacturer_id, page, hash) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key + (n, page_hash(articles_on_page)) for n, articles_on_page in pages.items()),
+                )
+                self._db.executemany(
+                    "INSERT INTO sync_articles "
+                    "(data_supplier_id, manufacturer_id, article_number, mfr_id, mfr_name) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        key + (number, a["manufacturer_id"], a["manufacturer_name"])
+                        for number, a in articles.items()
+                    ),
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _apply_to_store(
+        self,
+        data_supplier_id: int,
+        manufacturer_id: Optional[int],
+        delta: Dict[str, Any]
+    ) -> None:
+        """Write a delta to the article store, if one is configured."""
+        if self.store is None:
+            return
+        self.store.upsert_articles(delta["added"] + delta["changed"], data_supplier_id)
+        # Articles leaving a manufacturer slice may still exist for other manufacturers
+        if manufacturer_id is None and delta["removed"]:
+            self.store.delete_articles(data_supplier_id, (a["number"] for a in delta["removed"]))
+
+    def sync(
+        self,
+        slices: Iterable[Tuple[int, Optional[int]]],
+        force: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Synchronise several slices one after another.
+
+        Args:
+            slices: (dataSupplierId, manufacturerId or None) pairs
+            force: Re-crawl every slice
+
+        Yields:
+            Result dict of ``sync_slice`` per slice
+        """
+        for data_supplier_id, manufacturer_id in slices:
+            yield self.sync_slice(data_supplier_id, manufacturer_id, force=force)
+
+    def close(self) -> None:
+        """Close the state database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "DeltaSync":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -10,15 +10,14 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core_tecdoc_client import TecDocClient
+from reference_registry import ReferenceRegistry
 
 
-# Top DataSuppliers
+# Top DataSuppliers, IDs resolved from the reference data
+registry = ReferenceRegistry()
 SUPPLIERS = [
-    (3, "ATE"),
-    (2, "BOSCH"),
-    (7, "SACHS"),
-    (206, "A.B.S."),
-    (4, "MANN-FILTER"),
+    (registry.supplier_id(name), name)
+    for name in ("ATE", "BOSCH", "SACHS", "A.B.S.", "MANN-FILTER")
 ]
 
 
@@ -0,0 +1,336 @@
+"""
+TecDoc Multi-Locale Fan-Out
+===========================
+
+Runs the same query for several (country, lang) locales concurrently.
+
+All per-locale ``TecDocClient`` instances share one connection pool, one
+throttle (rate limit, AIMD concurrency, retries), one coalescer and,
+optionally, one cache and metrics registry, so adding markets does not
+add connections or rate budget.
+
+Responses that do not depend on the language (article lists,
+manufacturer and brand lists carry no translated text) are fetched once
+per country and shared by all languages of that country.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core_tecdoc_client import TecDocClient
+from metrics import ClientMetrics
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from soap_transport import PooledSessionTransport, SoapTransport
+from throttle import Throttle
+
+logger = logging.getLogger(__name__)
+
+Locale = Tuple[str, str]
+
+# Functions whose responses contain no language-dependent text
+LANGUAGE_INVARIANT_FUNCTIONS = frozenset({"getArticles", "getBrands", "getManufacturers"})
+
+
+def merge_results(
+    results: Dict[Locale, Iterable[Dict[str, Any]]],
+    key: Callable[[Dict[str, Any]], Any] = lambda record: record["id"]
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Merge per-locale record lists into one dict keyed by record identity.
+
+    Args:
+        results: Records per locale, e.g. from ``LocaleFanOut.get_manufacturers``
+            (or pass ``merge=True`` there)
+        key: Function returning the identity of a record (default: ``record["id"]``)
+
+    Returns:
+        Dict of key -> first seen record plus ``locales``, the list of
+        locales the record was returned for
+    """
+    merged: Dict[Any, Dict[str, Any]] = {}
+    for locale, records in results.items():
+        for record in records:
+            entry = merged.get(key(record))
+            if entry is None:
+                entry = merged[key(record)] = {**record, "locales": []}
+            entry["locales"].append(locale)
+    return merged
+
+
+class LocaleFanOut:
+    """
+    Concurrent fan-out of TecDoc queries over several locales.
+
+    Per-locale clients are available as ``clients[(country, lang)]``.
+    """
+
+    def __init__(
+        self,
+        locales: Sequence[Locale],
+        provider_id: Optional[int] = None,
+        api_key: Optional[str] = None,
+        timeout: int = 30,
+        transport: Optional[SoapTransport] = None,
+        cache: Optional[ResponseCache] = None,
+        throttle: Optional[Throttle] = None,
+        single_flight: Optional[SingleFlight] = None,
+        metrics: Optional[ClientMetrics] = None,
+        endpoint: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> None:
+        """
+        Initialize fan-out.
+
+        Args:
+            locales: (country, lang) pairs, e.g. [("de", "de"), ("at", "de"), ("fr", "fr")]
+            provider_id: TecDoc provider ID (default: from TEC_PROVIDER_ID env)
+            api_key: API authentication key (default: from TEC_API_KEY env)
+            timeout: Request timeout in seconds (default: 30)
+            transport: Shared HTTP transport (default: pooled session owned
+                and closed by this fan-out)
+            cache: Shared response cache (default: none)
+            throttle: Shared throttle (default: new Throttle)
+            single_flight: Shared coalescer (default: new SingleFlight)
+            metrics: Shared metrics registry (default: none)
+            endpoint: SOAP endpoint URL (default: from TEC_ENDPOINT env or
+                TecDocClient.SOAP_ENDPOINT)
+            max_workers: Locales queried at once (default: number of locales)
+        """
+        unique = list(dict.fromkeys((country.lower(), lang.lower()) for country, lang in locales))
+        if not unique:
+            raise ValueError("LocaleFanOut: at least one locale is required")
+
+        self.locales: List[Locale] = unique
+        self._owns_transport = transport is None
+        self.transport = transport or PooledSessionTransport(pool_maxsize=max(16, len(unique)))
+        self.throttle = throttle or Throttle()
+        self.single_flight = single_flight or SingleFlight()
+
+        self.clients: Dict[Locale, TecDocClient] = {
+            (country, lang): TecDocClient(
+                provider_id=provider_id,
+                api_key=api_key,
+                country=country,
+                lang=lang,
+                timeout=timeout,
+                transport=self.transport,
+                cache=cache,
+                throttle=self.throttle,
+                single_flight=self.single_flight,
+                metrics=metrics,
+                endpoint=endpoint,
+            )
+            for country, lang in unique
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(unique), thread_name_prefix="tecdoc-locale"
+        )
+
+    def map(
+        self,
+        call: Callable[[TecDocClient], Any],
+        language_invariant: bool = False,
+        return_exceptions: bool = False
+    ) -> Dict[Locale, Any]:
+        """
+        Run a call on every locale's client concurrently.
+
+        Args:
+            call: Function receiving a client and returning its result
+            language_invariant: The result does not depend on the language;
+                call once per country and share the result (default: False)
+            return_exceptions: Put exceptions into the result dict instead of
+                raising the first one (default: False)
+
+        Returns:
+            Dict of (country, lang) -> result, in locale order
+        """
+        groups: Dict[Any, List[Locale]] = {}
+        for locale in self.locales:
+            groups.setdefault(locale[0] if language_invariant else locale, []).append(locale)
+
+        futures = {
+            members[0]: self._executor.submit(call, self.clients[members[0]])
+            for members in groups.values()
+        }
+
+        results: Dict[Locale, Any] = {}
+        for members in groups.values():
+            future = futures[members[0]]
+            try:
+                result = future.result()
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                logger.warning(f"Locale {members[0]} failed: {exc}")
+                result = exc
+            for locale in members:
+                results[locale] = result
+
+        if language_invariant and len(futures) < len(self.locales):
+            logger.debug(f"Fan-out deduplicated {len(self.locales)} locales to {len(futures)} calls")
+        return {locale: results[locale] for locale in self.locales}
+
+    def _fan_out(
+        self,
+        function: str,
+        call: Callable[[TecDocClient], Any],
+        return_exceptions: bool,
+        merge_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        records: Callable[[Any], Iterable[Dict[str, Any]]] = lambda result: result
+    ) -> Dict[Any, Any]:
+        """
+        Run the call of one TecDoc function on every locale.
+
+        Args:
+            function: TecDoc function name; functions in
+                ``LANGUAGE_INVARIANT_FUNCTIONS`` are called once per country
+            call: Function receiving a client and returning its result
+            return_exceptions: Return failures instead of raising
+            merge_key: Merge the records of all locales with ``merge_results``
+                using this key (default: results per locale)
+            records: Get the records of one locale's result (default: the
+                result itself)
+
+        Returns:
+            Dict of (country, lang) -> result, or the merged records (failed
+            locales are left out)
+        """
+        results = self.map(call, function in LANGUAGE_INVARIANT_FUNCTIONS, return_exceptions)
+        if merge_key is None:
+            return results
+        return merge_results(
+            {
+                locale: records(result)
+                for locale, result in results.items()
+                if not isinstance(result, Exception)
+            },
+            merge_key,
+        )
+
+    def get_countries(
+        self,
+        return_exceptions: bool = False,
+        merge: bool = False
+    ) -> Dict[Any, Any]:
+        """
+        Get the country list (with localized names) for every locale.
+
+        Args:
+            return_exceptions: Return failures instead of raising (default: False)
+            merge: Merge the lists by country code (default: False)
+
+        Returns:
+            Dict of (country, lang) -> countries, or with ``merge`` of
+            code -> country with ``locales``
+        """
+        return self._fan_out(
+            "getCountries",
+            lambda client: client.get_countries(),
+            return_exceptions,
+            (lambda country: country["code"]) if merge else None,
+        )
+
+    def get_manufacturers(
+        self,
+        linking_target_type: str = "p",
+        return_exceptions: bool = False,
+        merge: bool = False
+    ) -> Dict[Any, Any]:
+        """
+        Get the car manufacturer list for every locale (one call per country).
+
+        Args:
+            linking_target_type: Target type ("p" for passenger cars)
+            return_exceptions: Return failures instead of raising (default: False)
+            merge: Merge the lists by manufacturer ID (default: False)
+
+        Returns:
+            Dict of (country, lang) -> manufacturers, or with ``merge`` of
+            ID -> manufacturer with ``locales``
+        """
+        return self._fan_out(
+            "getManufacturers",
+            lambda client: client.get_manufacturers(linking_target_type),
+            return_exceptions,
+            (lambda manufacturer: manufacturer["id"]) if merge else None,
+        )
+
+    def get_brands(
+        self,
+        return_exceptions: bool = False,
+        merge: bool = False
+    ) -> Dict[Any, Any]:
+        """
+        Get the DataSupplier list for every locale (one call per country).
+
+        Args:
+            return_exceptions: Return failures instead of raising (default: False)
+            merge: Merge the lists by DataSupplier ID (default: False)
+
+        Returns:
+            Dict of (country, lang) -> brands, or with ``merge`` of
+            ID -> brand with ``locales``
+        """
+        return self._fan_out(
+            "getBrands",
+            lambda client: client.get_brands(),
+            return_exceptions,
+            (lambda brand: brand["id"]) if merge else None,
+        )
+
+    def get_articles(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+        page_size: int = 100,
+        page_number: int = 0,
+        return_exceptions: bool = False,
+        merge: bool = False
+    ) -> Dict[Any, Any]:
+        """
+        Get one article page per locale, using each locale's country as
+        article country (one call per country).
+
+        Args:
+            data_supplier_id: Filter by parts supplier
+            manufacturer_id: Filter by car manufacturer
+            page_size: Number of results per page (max 100)
+            page_number: Page number (0-based)
+            return_exceptions: Return failures instead of raising (default: False)
+            merge: Merge the article lists by (DataSupplier ID, article
+                number) (default: False)
+
+        Returns:
+            Dict of (country, lang) -> page dict as returned by ``get_articles``,
+            or with ``merge`` of (DataSupplier ID, number) -> article with
+            ``locales``
+        """
+        return self._fan_out(
+            "getArticles",
+            lambda client: client.get_articles(
+                data_supplier_id=data_supplier_id,
+                manufacturer_id=manufacturer_id,
+                page_size=page_size,
+                page_number=page_number,
+            ),
+            return_exceptions,
+            (lambda article: (article["data_supplier_id"], article["number"])) if merge else None,
+            lambda page: page["articles"],
+        )
+
+    def close(self) -> None:
+        """Stop the worker pool, close all clients and an owned transport."""
+        self._executor.shutdown(wait=True)
+        for client in self.clients.values():
+            client.close()
+        if self._owns_transport:
+            self.transport.close()
+
+    def __enter__(self) -> "LocaleFanOut":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,300 @@
+"""
+TecDoc Client Metrics
+=====================
+
+Hot-path instrumentation for the TecDoc SOAP clients.
+
+``ClientMetrics`` records per SOAP function:
+- latency histograms split into connect (TCP/TLS), server (request sent
+  until response body received, minus connect) and parse time
+- request/response byte counts and request counts by HTTP status
+- articles parsed and articles parsed per second of parse time
+
+Statistics of other client components (cache hit ratio, retries, requests
+in flight, coalescing) are pulled from registered sources at snapshot
+time. Every observation is also passed to registered hooks, and
+``prometheus()`` renders a Prometheus text-format snapshot.
+
+A client without a ``ClientMetrics`` instance skips all instrumentation.
+"""
+
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+MetricsHook = Callable[[Dict[str, Any]], None]
+
+
+class Histogram:
+    """Cumulative-bucket histogram (not thread-safe; guarded by ClientMetrics)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Get (upper bound, cumulative count) pairs including +Inf."""
+        pairs, running = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+def _escape(value: Any) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    """Format Prometheus labels."""
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+class ClientMetrics:
+    """
+    Metrics registry for one or more TecDoc clients.
+
+    Thread-safe. Register hooks with ``add_hook`` and component statistics
+    with ``add_source``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "tecdoc") -> None:
+        """
+        Initialize metrics registry.
+
+        Args:
+            buckets: Latency histogram bucket bounds in seconds
+            prefix: Metric name prefix (default: "tecdoc")
+        """
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Dict[Tuple[str, int], int] = defaultdict(int)
+        self._request_bytes: Dict[str, int] = defaultdict(int)
+        self._response_bytes: Dict[str, int] = defaultdict(int)
+        self._articles: Dict[str, int] = defaultdict(int)
+        self._hooks: List[MetricsHook] = []
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        """
+        Register a callback receiving every observation.
+
+        The callback gets a dict with ``event`` ("request" or "parse"),
+        ``function`` and the measured values. Exceptions are logged and ignored.
+
+        Args:
+            hook: Callback function
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def add_source(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Register a component whose ``stats()`` dict is exported as gauges.
+
+        Args:
+            name: Source name used in metric names (e.g. "cache")
+            stats: Function returning a dict of numeric values
+        """
+        with self._lock:
+            self._sources[name] = stats
+
+    def _histogram(self, function: str, phase: str) -> Histogram:
+        """Get or create the histogram of one function/phase (lock held)."""
+        histogram = self._latency.get((function, phase))
+        if histogram is None:
+            histogram = self._latency[(function, phase)] = Histogram(self.buckets)
+        return histogram
+
+    def observe_request(
+        self,
+        function: str,
+        status: int,
+        connect: float,
+        server: float,
+        request_bytes: int,
+        response_bytes: int
+    ) -> None:
+        """
+        Record one completed HTTP request.
+
+        Args:
+            function: TecDoc function name
+            status: HTTP status code (0 for network errors)
+            connect: Seconds spent in TCP/TLS connect
+            server: Seconds from send until the body was received, minus connect
+            request_bytes: Size of the request body
+            response_bytes: Size of the (decoded) response body
+        """
+        with self._lock:
+            self._histogram(function, "connect").observe(connect)
+            self._histogram(function, "server").observe(server)
+            self._requests[(function, status)] += 1
+            self._request_bytes[function] += request_bytes
+            self._response_bytes[function] += response_bytes
+            hooks = self._hooks
+
+        if hooks:
+            self._emit(hooks, {
+                "event": "request",
+                "function": function,
+                "status": status,
+                "connect": connect,
+                "server": server,
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+            })
+
+    def observe_parse(self, function: str, seconds: float, articles: int = 0) -> None:
+        """
+        Record parsing of one response.
+
+        Args:
+            function: TecDoc function name
+            seconds: Parse time
+            articles: Number of articles parsed
+        """
+        with self._lock:
+            self._histogram(function, "parse").observe(seconds)
+            self._articles[function] += articles
+            hooks = self._hooks
+
+        if hooks:
+            self._emit(hooks, {
+                "event": "parse",
+                "function": function,
+                "parse": seconds,
+                "articles": articles,
+            })
+
+    @staticmethod
+    def _emit(hooks: List[MetricsHook], event: Dict[str, Any]) -> None:
+        """Call all hooks, isolating their failures."""
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception as exc:
+                logger.warning(f"Metrics hook {hook!r} failed: {exc}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all metrics as a plain dict.
+
+        Returns:
+            Dict with per-function latency summaries (count, sum, p50, p99 per
+            phase), request counts, byte counts, articles/s and source stats
+        """
+        with self._lock:
+            functions: Dict[str, Dict[str, Any]] = defaultdict(dict)
+            for (function, phase), h in self._latency.items():
+                functions[function][phase] = {
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.quantile(0.5),
+                    "p99": h.quantile(0.99),
+                }
+            for (function, status), count in self._requests.items():
+                functions[function].setdefault("requests", {})[status] = count
+            for function, count in self._request_bytes.items():
+                functions[function]["request_bytes"] = count
+            for function, count in self._response_bytes.items():
+                functions[function]["response_bytes"] = count
+            for function, count in self._articles.items():
+                parse = self._latency.get((function, "parse"))
+                functions[function]["articles"] = count
+                functions[function]["articles_per_second"] = (
+                    count / parse.sum if parse and parse.sum else 0.0
+                )
+            sources = dict(self._sources)
+
+        return {
+            "functions": dict(functions),
+            "sources": {name: stats() for name, stats in sources.items()},
+        }
+
+    def prometheus(self) -> str:
+        """
+        Render a Prometheus text-format (0.0.4) snapshot.
+
+        Returns:
+            Exposition text
+        """
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_request_phase_seconds SOAP call latency by phase (connect, server, parse)",
+            f"# TYPE {p}_request_phase_seconds histogram",
+        ]
+
+        with self._lock:
+            for (function, phase), h in sorted(self._latency.items()):
+                labels = _labels(function=function, phase=phase)
+                for bound, count in h.cumulative():
+                    lines.append(f'{p}_request_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{p}_request_phase_seconds_sum{{{labels}}} {h.sum!r}")
+                lines.append(f"{p}_request_phase_seconds_count{{{labels}}} {h.count}")
+
+            lines += [f"# HELP {p}_requests_total SOAP requests by HTTP status",
+                      f"# TYPE {p}_requests_total counter"]
+            for (function, status), count in sorted(self._requests.items()):
+                lines.append(f"{p}_requests_total{{{_labels(function=function, status=status)}}} {count}")
+
+            for name, values, help_text in (
+                ("request_bytes_total", self._request_bytes, "Request body bytes"),
+                ("response_bytes_total", self._response_bytes, "Response body bytes"),
+                ("articles_parsed_total", self._articles, "Articles parsed"),
+            ):
+                lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} counter"]
+                for function, count in sorted(values.items()):
+                    lines.append(f"{p}_{name}{{{_labels(function=function)}}} {count}")
+
+            lines += [f"# HELP {p}_articles_parsed_per_second Articles per second of parse time",
+                      f"# TYPE {p}_articles_parsed_per_second gauge"]
+            for function, count in sorted(self._articles.items()):
+                parse = self._latency.get((function, "parse"))
+                rate = count / parse.sum if parse and parse.sum else 0.0
+                lines.append(f"{p}_articles_parsed_per_second{{{_labels(function=function)}}} {rate!r}")
+
+            sources = dict(self._sources)
+
+        for name, stats in sorted(sources.items()):
+            for key, value in sorted(stats().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{p}_{name}_{key}"
+                    lines += [f"# TYPE {metric} gauge", f"{metric} {value!r}"]
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,288 @@
+"""
+TecDoc Page Planner
+===================
+
+Exact page schedules and verified-complete article crawls.
+
+The endpoint returns fewer rows per page than requested (10 rows for
+``pageSize=100``), so a schedule computed from the requested page size
+stops early, and a loop until an empty page wastes requests. The planner:
+- learns the effective rows per page of each query shape from the first
+  full page and caches it (optionally in a JSON file)
+- computes the exact schedule from ``totalMatchingArticles``
+- checks coverage after every round: row counts per page, duplicates and
+  changes of the total during the crawl ("drift")
+- re-fetches only the pages that failed a check
+
+With a cached page size and a known total (e.g. from a count matrix), all
+pages are requested in a single concurrent round.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def page_schedule(total: int, rows_per_page: int) -> List[Tuple[int, int]]:
+    """
+    Compute the exact page schedule of a query.
+
+    Args:
+        total: totalMatchingArticles
+        rows_per_page: Effective rows the server returns per page
+
+    Returns:
+        List of (page number, expected row count)
+    """
+    if rows_per_page < 1:
+        raise ValueError("page_schedule: rows_per_page must be >= 1")
+    pages = math.ceil(total / rows_per_page)
+    return [(n, min(rows_per_page, total - n * rows_per_page)) for n in range(pages)]
+
+
+class PagePlanner:
+    """
+    Page-size prober and coverage-checked article fetcher.
+
+    Thread-safe; one planner can serve several crawls.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: Optional[str] = None,
+        workers: int = 4,
+        max_rounds: int = 3
+    ) -> None:
+        """
+        Initialize page planner.
+
+        Args:
+            client: ``TecDocClient``
+            path: JSON file persisting the learned page sizes (default: memory only)
+            workers: Pages fetched in parallel (default: 4)
+            max_rounds: Re-fetch rounds for pages failing the coverage
+                checks (default: 3)
+        """
+        if workers < 1:
+            raise ValueError("PagePlanner: workers must be >= 1")
+
+        self.client = client
+        self.path = path
+        self.workers = workers
+        self.max_rounds = max_rounds
+
+        self._lock = threading.Lock()
+        self._page_sizes: Dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._page_sizes = json.load(f)
+
+    def _shape(self, manufacturer_id: Optional[int], page_size: int) -> str:
+        """Key of a query shape: country, requested page size and filter kind."""
+        kind = "manufacturer" if manufacturer_id else "supplier"
+        return f"{self.client.country}|{page_size}|{kind}"
+
+    def rows_per_page(self, manufacturer_id: Optional[int] = None, page_size: int = 100) -> Optional[int]:
+        """
+        Get the cached effective page size of a query shape.
+
+        Args:
+            manufacturer_id: Whether the query filters by manufacturer
+            page_size: Requested page size
+
+        Returns:
+            Effective rows per page, or None if not learned yet
+        """
+        with self._lock:
+            return self._page_sizes.get(self._shape(manufacturer_id, page_size))
+
+    def _learn(self, manufacturer_id: Optional[int], page_size: int, total: int, rows: int) -> None:
+        """Cache the effective page size seen on a full first page."""
+        # A first page holding everything says nothing about the page size
+        if rows < 1 or rows >= total:
+            return
+        shape = self._shape(manufacturer_id, page_size)
+        with self._lock:
+            if self._page_sizes.get(shape) == rows:
+                return
+            logger.info(f"Effective page size for {shape}: {rows} rows (requested {page_size})")
+            self._page_sizes[shape] = rows
+            if self.path:
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._page_sizes, f, indent=2, sort_keys=True)
+                os.replace(temp_path, self.path)
+
+    def fetch_all(
+        self,
+        data_supplier_id: Optional[int] = None,
+        manufacturer_id: Optional[int] = None,
+        page_size: int = 100,
+        expected_total: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch every article of a query with verified coverage.
+
+        Each round fetches the pages still missing or invalid (re-fetches
+        bypass the client's response cache), then checks:
+        every page reports the same total (else the pages fetched under an
+        older total are re-fetched), every page holds exactly its scheduled
+        number of rows, and no article appears on two pages.
+
+        Args:
+            data_supplier_id: Filter by parts supplier
+            manufacturer_id: Filter by car manufacturer
+            page_size: Requested page size (default: 100)
+            expected_total: Known total; with a cached page size, all pages
+                are requested in the first round (default: probe page 0 first)
+
+        Returns:
+            Dict with ``articles`` (deduplicated, in page order), ``total``,
+            ``rows_per_page``, ``pages``, ``requests``, ``refetched`` (requests
+            after the first round), ``complete`` and the ``issues`` of the
+            last round
+        """
+        def fetch(page_number: int, fresh: bool = False) -> Dict[str, Any]:
+            return self.client.get_articles(
+                data_supplier_id=data_supplier_id,
+                manufacturer_id=manufacturer_id,
+                page_size=page_size,
+                page_number=page_number,
+                fresh=fresh,
+            )
+
+        def refetch(page_number: int) -> Dict[str, Any]:
+            # A cached copy would repeat the page that failed the check
+            return fetch(page_number, fresh=True)
+
+        rows_per_page = self.rows_per_page(manufacturer_id, page_size)
+        fetched: Dict[int, Dict[str, Any]] = {}
+        requests = 0
+
+        if rows_per_page is None or expected_total is None:
+            fetched[0] = fetch(0)
+            requests += 1
+            total = fetched[0]["total"]
+            self._learn(manufacturer_id, page_size, total, len(fetched[0]["articles"]))
+            rows_per_page = self.rows_per_page(manufacturer_id, page_size) or (
+                len(fetched[0]["articles"]) or page_size
+            )
+        else:
+            total = expected_total
+
+        refetched = 0
+        issues: List[str] = []
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for round_number in range(self.max_rounds + 1):
+                schedule = dict(page_schedule(total, rows_per_page))
+                wanted = [n for n in schedule if n not in fetched]
+                if wanted:
+                    if round_number:
+                        refetched += len(wanted)
+                    fetched.update(zip(wanted, executor.map(refetch if round_number else fetch, wanted)))
+                    requests += len(wanted)
+
+                total, rows_per_page, invalid, issues = self._check(
+                    fetched, total, rows_per_page, manufacturer_id, page_size
+                )
+                if not issues:
+                    break
+                logger.warning(f"Coverage round {round_number}: {'; '.join(issues)}")
+                for n in invalid:
+                    fetched.pop(n, None)
+        finally:
+            executor.shutdown(wait=True)
+
+        articles, seen = [], set()
+        for n in sorted(fetched):
+            for article in fetched[n]["articles"]:
+                key = (article.get("data_supplier_id"), article["number"])
+                if key not in seen:
+                    seen.add(key)
+                    articles.append(article)
+
+        complete = not issues and len(articles) == total
+        if not complete:
+            logger.warning(
+                f"Incomplete crawl of {data_supplier_id}/{manufacturer_id}: "
+                f"{len(articles)} of {total} articles"
+            )
+        return {
+            "articles": articles,
+            "total": total,
+            "rows_per_page": rows_per_page,
+            "pages": len(page_schedule(total, rows_per_page)),
+            "requests": requests,
+            "refetched": refetched,
+            "complete": complete,
+            "issues": issues,
+        }
+
+    def _check(
+        self,
+        fetched: Dict[int, Dict[str, Any]],
+        total: int,
+        rows_per_page: int,
+        manufacturer_id: Optional[int],
+        page_size: int
+    ) -> Tuple[int, int, List[int], List[str]]:
+        """
+        Check the coverage of the fetched pages.
+
+        Returns:
+            Tuple of (current total, rows per page, pages to re-fetch, issues)
+        """
+        issues: List[str] = []
+        invalid: List[int] = []
+        if not fetched:
+            return total, rows_per_page, invalid, issues
+
+        # Count drift: the highest page number saw the most recent state
+        totals = {page["total"] for page in fetched.values()}
+        if len(totals) > 1 or total not in totals:
+            current = fetched[max(fetched)]["total"]
+            stale = [n for n, page in fetched.items() if page["total"] != current]
+            issues.append(f"total changed {total} -> {current}, {len(stale)} stale pages")
+            invalid += stale
+            total = current
+
+        # A full page with a different size than assumed corrects the schedule
+        full = {len(page["articles"]) for n, page in fetched.items() if n < max(fetched)}
+        if len(full) == 1 and rows_per_page not in full and min(full) > 0:
+            rows_per_page = full.pop()
+            self._learn(manufacturer_id, page_size, total, rows_per_page)
+            issues.append(f"rows per page corrected to {rows_per_page}")
+
+        schedule = dict(page_schedule(total, rows_per_page))
+        for n, page in fetched.items():
+            if n not in schedule:
+                invalid.append(n)
+            elif n not in invalid and len(page["articles"]) != schedule[n]:
+                issues.append(f"page {n} has {len(page['articles'])} of {schedule[n]} rows")
+                invalid.append(n)
+
+        missing = [n for n in schedule if n not in fetched]
+        if missing:
+            issues.append(f"{len(missing)} pages missing")
+
+        seen: Dict[Any, int] = {}
+        for n in sorted(fetched):
+            if n in invalid:
+                continue
+            for article in fetched[n]["articles"]:
+                key = (article.get("data_supplier_id"), article["number"])
+                if key in seen and seen[key] != n:
+                    issues.append(f"article {article['number']} on pages {seen[key]} and {n}")
+                    invalid.append(n)
+                    break
+                seen[key] = n
+
+        return total, rows_per_page, sorted(set(invalid)), issues
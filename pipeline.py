@@ -0,0 +1,501 @@
+"""
+TecDoc Crawl Pipeline
+=====================
+
+Staged fetch -> parse -> sink engine for large crawls.
+
+- fetch: I/O worker threads get raw SOAP responses through the client
+  (cache, throttle, hedging and circuit breakers apply as usual)
+- parse: a process pool parses the responses on all cores, so parsing
+  neither holds the GIL of the fetch threads nor is capped at one core
+- sinks: one thread per sink (store, export, callback) consumes every
+  parsed result
+
+Stages are connected by bounded queues. A slow stage fills its input queue
+and blocks the stage before it, so memory stays bounded and the fetchers
+slow down to the pace of the slowest consumer. Parse results reach the
+sinks in the order the responses arrived, not in task order.
+
+Each stage counts processed and failed items, busy time, and time spent
+blocked on a full output queue (backpressure) or idle on an empty input
+queue. ``stats()`` exports the counters as a flat dict for ``ClientMetrics``;
+``bottleneck()`` names the stage with the highest utilization.
+
+Tasks are query dicts like those of ``tecdoc_cli``:
+``{"function": "getArticles", "params": {...}}``; ``article_page_tasks``
+generates the pages of count-matrix cells.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core_tecdoc_client import TecDocClient
+from page_planner import page_schedule
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+Task = Dict[str, Any]
+Sink = Callable[[Task, Any], None]
+
+PARSERS: Dict[str, Callable[[str], Any]] = {
+    "getArticles": TecDocClient._parse_articles,
+    "getBrands": TecDocClient._parse_brands,
+    "getCountries": TecDocClient._parse_countries,
+    "getManufacturers": TecDocClient._parse_manufacturers,
+}
+
+
+def parse_response(function: str, xml_response: str) -> Any:
+    """
+    Parse a raw response like the matching ``TecDocClient`` method.
+
+    Args:
+        function: TecDoc function name
+        xml_response: Raw XML response
+
+    Returns:
+        ``(total, article dicts)`` for getArticles, record dicts for the
+        other known functions, the raw XML otherwise
+    """
+    parse = PARSERS.get(function)
+    return parse(xml_response) if parse else xml_response
+
+
+def _timed_parse(parse: Callable[[str, str], Any], function: str, xml_response: str) -> Tuple[Any, float]:
+    """Parse one response and measure the CPU time spent (runs in a worker process)."""
+    started = time.process_time()
+    result = parse(function, xml_response)
+    return result, time.process_time() - started
+
+
+def article_page_tasks(
+    cells: Iterable[Tuple[int, Optional[int], int]],
+    rows_per_page: int,
+    article_country: str,
+    page_size: int = 100
+) -> Iterable[Task]:
+    """
+    Generate the getArticles page tasks of known-size queries.
+
+    Params match ``TecDocClient.get_articles``, so pages fetched by the
+    pipeline and by the client share cache entries.
+
+    Args:
+        cells: (DataSupplier ID, manufacturer ID or None, total) tuples,
+            e.g. ``CountMatrix.cells()``
+        rows_per_page: Effective rows per page (see ``PagePlanner.rows_per_page``)
+        article_country: Article country code
+        page_size: Requested page size (default: 100)
+
+    Yields:
+        Task dicts
+    """
+    for data_supplier_id, manufacturer_id, total in cells:
+        for page_number, _ in page_schedule(total, rows_per_page):
+            params: Dict[str, Any] = {
+                "articleCountry": article_country,
+                "pageSize": page_size,
+                "pageNumber": page_number,
+            }
+            if data_supplier_id:
+                params["dataSupplierIds"] = data_supplier_id
+            if manufacturer_id:
+                params["manufacturerId"] = manufacturer_id
+            yield {"function": "getArticles", "params": params}
+
+
+def article_sink(consume: Callable[[List[Dict[str, Any]]], Any]) -> Sink:
+    """
+    Adapt an article consumer to a pipeline sink.
+
+    Args:
+        consume: Function taking a page of article dicts, e.g.
+            ``ArticleStore.upsert_articles`` or an export writer's ``write``
+
+    Returns:
+        Sink passing the articles of getArticles results (other results
+        are ignored)
+    """
+    def sink(task: Task, result: Any) -> None:
+        if task["function"] == "getArticles":
+            consume(result[1])
+    return sink
+
+
+class StageStats:
+    """Thread-safe counters of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int) -> None:
+        """
+        Initialize stage counters.
+
+        Args:
+            name: Stage name
+            workers: Threads or processes working in the stage
+        """
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.idle = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, processed: int = 0, failed: int = 0, busy: float = 0.0,
+            blocked: float = 0.0, idle: float = 0.0) -> None:
+        """Add to the counters."""
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.busy += busy
+            self.blocked += blocked
+            self.idle += idle
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        """
+        Get the counters with derived rates.
+
+        Args:
+            elapsed: Seconds since the pipeline started
+
+        Returns:
+            Dict with ``workers``, ``processed``, ``failed``, ``busy``,
+            ``blocked``, ``idle`` (seconds summed over workers), ``rate``
+            (items/s) and ``utilization`` (busy share of worker time)
+        """
+        with self._lock:
+            stats = {
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy": round(self.busy, 3),
+                "blocked": round(self.blocked, 3),
+                "idle": round(self.idle, 3),
+            }
+        stats["rate"] = round(stats["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+        capacity = elapsed * self.workers
+        stats["utilization"] = round(self.busy / capacity, 3) if capacity > 0 else 0.0
+        return stats
+
+
+class Pipeline:
+    """
+    Fetch/parse/sink pipeline over one client.
+
+    Configure sinks with ``add_sink``, then call ``run`` once.
+    """
+
+    def __init__(
+        self,
+        client: TecDocClient,
+        fetch_workers: int = 8,
+        parse_workers: Optional[int] = None,
+        queue_size: int = 64,
+        parse: Callable[[str, str], Any] = parse_response
+    ) -> None:
+        """
+        Initialize pipeline.
+
+        Args:
+            client: TecDoc client fetching the raw responses
+            fetch_workers: I/O threads (default: 8)
+            parse_workers: Parser processes (default: CPU count; 0 parses in
+                a thread of this process)
+            queue_size: Capacity of each queue between stages (default: 64)
+            parse: Parser taking (function, raw XML); must be a module-level
+                function unless ``parse_workers=0`` (default: parse_response)
+        """
+        if fetch_workers < 1:
+            raise ValueError("Pipeline: fetch_workers must be >= 1")
+        if queue_size < 1:
+            raise ValueError("Pipeline: queue_size must be >= 1")
+        if parse_workers is not None and parse_workers < 0:
+            raise ValueError("Pipeline: parse_workers must be >= 0")
+
+        self.client = client
+        self.fetch_workers = fetch_workers
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.queue_size = queue_size
+        self.parse = parse
+
+        self.failures: List[Dict[str, Any]] = []
+        self._sinks: List[Tuple[str, Sink]] = []
+        self._queues: Dict[str, queue.Queue] = {}
+        self._stages: Dict[str, StageStats] = {}
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._source_error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_sink(self, name: str, sink: Sink) -> None:
+        """
+        Add a sink stage.
+
+        Args:
+            name: Stage name used in the statistics
+            sink: Function taking (task, parsed result); called from one
+                thread
+        """
+        if self._started is not None:
+            raise ValueError("Pipeline: sinks must be added before run()")
+        if name in ("fetch", "parse") or any(name == existing for existing, _ in self._sinks):
+            raise ValueError(f"Pipeline: duplicate stage name {name!r}")
+        self._sinks.append((name, sink))
+
+    def stop(self) -> None:
+        """Stop feeding tasks; items already queued are dropped."""
+        self._stop.set()
+
+    def _fail(self, stage: str, task: Task, exc: Exception) -> None:
+        """Record a failed item."""
+        logger.warning(f"Pipeline {stage} failed for {task.get('function')} {task.get('params')}: {exc}")
+        self._stages[stage].add(failed=1)
+        with self._lock:
+            self.failures.append({"stage": stage, "task": task, "error": f"{exc.__class__.__name__}: {exc}"})
+
+    def _put(self, name: str, stage: StageStats, item: Any) -> None:
+        """Put an item into a stage's input queue, counting the time blocked."""
+        started = time.perf_counter()
+        self._queues[name].put(item)
+        stage.add(blocked=time.perf_counter() - started)
+
+    def _get(self, name: str, stage: StageStats) -> Any:
+        """Take an item from a stage's input queue, counting the time idle."""
+        started = time.perf_counter()
+        item = self._queues[name].get()
+        stage.add(idle=time.perf_counter() - started)
+        return item
+
+    def _feed(self, tasks: Iterable[Task]) -> None:
+        """Source: put the tasks into the fetch queue."""
+        try:
+            for task in tasks:
+                if self._stop.is_set():
+                    break
+                # Not a stage: waiting for the fetchers is not counted as
+                # backpressure of the fetch stage
+                self._queues["fetch"].put(task)
+        except Exception as exc:
+            logger.error(f"Pipeline task source failed: {exc}")
+            self._source_error = exc
+        finally:
+            for _ in range(self.fetch_workers):
+                self._queues["fetch"].put(_DONE)
+
+    def _fetch(self) -> None:
+        """Fetch stage worker: get raw responses."""
+        stage = self._stages["fetch"]
+        while True:
+            task = self._get("fetch", stage)
+            if task is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            started = time.perf_counter()
+            try:
+                xml_response = self.client.get_raw_response(task["function"], task.get("params") or {})
+            except Exception as exc:
+                stage.add(busy=time.perf_counter() - started)
+                self._fail("fetch", task, exc)
+                continue
+            stage.add(processed=1, busy=time.perf_counter() - started)
+            self._put("parse", stage, (task, xml_response))
+
+    def _dispatch(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        """Parse stage: submit responses to the pool in arrival order."""
+        stage = self._stages["parse"]
+        try:
+            while True:
+                item = self._get("parse", stage)
+                if item is _DONE:
+                    return
+                if self._stop.is_set():
+                    continue
+                task, xml_response = item
+                if executor is None:
+                    future: Future = Future()
+                    try:
+                        future.set_result(_timed_parse(self.parse, task["function"], xml_response))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                else:
+                    try:
+                        future = executor.submit(_timed_parse, self.parse, task["function"], xml_response)
+                    except Exception as exc:
+                        # e.g. BrokenProcessPool after a worker died: keep
+                        # draining the queue so the fetchers never block
+                        self._fail("parse", task, exc)
+                        continue
+                # Bounded: at most queue_size parses in flight. Waiting here means
+                # the pool is saturated, which is busy time, not backpressure
+                self._queues["parsing"].put((task, future))
+        finally:
+            self._queues["parsing"].put(_DONE)
+
+    def _collect(self) -> None:
+        """Parse stage: hand results to the sinks in submission order."""
+        stage = self._stages["parse"]
+        while True:
+            item = self._queues["parsing"].get()
+            if item is _DONE:
+                for name, _ in self._sinks:
+                    self._queues[name].put(_DONE)
+                return
+            task, future = item
+            try:
+                result, seconds = future.result()
+            except Exception as exc:
+                self._fail("parse", task, exc)
+                continue
+            stage.add(processed=1, busy=seconds)
+            for name, _ in self._sinks:
+                if not self._stop.is_set():
+                    self._put(name, stage, (task, result))
+
+    def _drain(self, name: str, sink: Sink) -> None:
+        """Sink stage worker: consume parsed results."""
+        stage = self._stages[name]
+        while True:
+            item = self._get(name, stage)
+            if item is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+            task, result = item
+            started = time.perf_counter()
+            try:
+                sink(task, result)
+            except Exception as exc:
+                stage.add(busy=time.perf_counter() - started)
+                self._fail(name, task, exc)
+                continue
+            stage.add(processed=1, busy=time.perf_counter() - started)
+
+    def run(self, tasks: Iterable[Task]) -> Dict[str, Any]:
+        """
+        Run the pipeline until all tasks have passed every stage.
+
+        Failed items are logged, counted and collected in ``failures``;
+        they do not stop the pipeline.
+
+        Args:
+            tasks: Query dicts with ``function`` and ``params``; consumed
+                lazily, so generators of any length are fine
+
+        Returns:
+            Per-stage statistics (see ``stage_stats``)
+
+        Raises:
+            Exception: Error raised by the ``tasks`` iterable, re-raised once
+                the tasks fed before it have passed every stage
+        """
+        if self._started is not None:
+            raise ValueError("Pipeline: run() may only be called once")
+
+        self._stages["fetch"] = StageStats("fetch", self.fetch_workers)
+        self._stages["parse"] = StageStats("parse", max(1, self.parse_workers))
+        for name, _ in self._sinks:
+            self._stages[name] = StageStats(name, 1)
+        for name in ["fetch", "parse", "parsing"] + [name for name, _ in self._sinks]:
+            self._queues[name] = queue.Queue(maxsize=self.queue_size)
+
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+        threads = [threading.Thread(target=self._feed, args=(tasks,), name="pipeline-feed")]
+        threads += [
+            threading.Thread(target=self._fetch, name=f"pipeline-fetch-{i}")
+            for i in range(self.fetch_workers)
+        ]
+        threads.append(threading.Thread(target=self._dispatch, args=(executor,), name="pipeline-parse"))
+        threads.append(threading.Thread(target=self._collect, name="pipeline-collect"))
+        threads += [
+            threading.Thread(target=self._drain, args=(name, sink), name=f"pipeline-{name}")
+            for name, sink in self._sinks
+        ]
+
+        self._started = time.monotonic()
+        fetchers = threads[1:1 + self.fetch_workers]
+        try:
+            for thread in threads:
+                thread.daemon = True
+                thread.start()
+            for thread in fetchers:
+                thread.join()
+            # All fetchers are done: close the parse stage's input
+            self._queues["parse"].put(_DONE)
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._finished = time.monotonic()
+
+        if self._source_error is not None:
+            raise self._source_error
+
+        stats = self.stage_stats()
+        logger.info(
+            f"Pipeline finished: {stats['fetch']['processed']} fetched, "
+            f"{stats['parse']['processed']} parsed, {len(self.failures)} failures, "
+            f"bottleneck {self.bottleneck()}"
+        )
+        return stats
+
+    def _elapsed(self) -> float:
+        """Seconds since the start (until the end, once finished)."""
+        if self._started is None:
+            return 0.0
+        return (self._finished or time.monotonic()) - self._started
+
+    def stage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the counters of every stage.
+
+        Returns:
+            Dict of stage name -> ``StageStats.snapshot`` plus ``queued``
+            (items waiting in the stage's input queue)
+        """
+        elapsed = self._elapsed()
+        stats = {}
+        for name, stage in self._stages.items():
+            stats[name] = stage.snapshot(elapsed)
+            stats[name]["queued"] = self._queues[name].qsize()
+        return stats
+
+    def bottleneck(self) -> Optional[str]:
+        """
+        Name the stage limiting throughput.
+
+        Returns:
+            Stage with the highest utilization, or None before ``run``
+        """
+        stats = self.stage_stats()
+        if not stats:
+            return None
+        return max(stats, key=lambda name: stats[name]["utilization"])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get flat pipeline statistics for ``ClientMetrics.add_source``.
+
+        Returns:
+            Dict with ``elapsed``, ``failures`` and ``<stage>_<counter>``
+            for every stage counter
+        """
+        stats: Dict[str, Any] = {"elapsed": round(self._elapsed(), 3), "failures": len(self.failures)}
+        for name, counters in self.stage_stats().items():
+            for counter, value in counters.items():
+                stats[f"{name}_{counter}"] = value
+        return stats
@@ -0,0 +1,479 @@
+"""
+TecDoc JSON Query Service
+=========================
+
+Local read-through HTTP/JSON service in front of the SOAP client (stdlib only).
+
+Many applications can share one warm cache and one pooled upstream
+connection set by querying this service instead of embedding their own
+``TecDocClient``:
+
+    GET /countries
+    GET /manufacturers[?linking_target_type=p]
+    GET /suppliers
+    GET /articles?supplier=30[&manufacturer=16][&page=0][&page_size=100]
+    GET /articles/stream?supplier=30[&manufacturer=16]   (chunked JSONL, all pages)
+    GET /stats
+
+Rendered JSON responses are kept in memory for a TTL per endpoint and
+carry an ``ETag``; a request with a matching ``If-None-Match`` gets
+``304 Not Modified``. Missing or expired responses fall through to the
+upstream API, coalesced with identical requests in flight. The article
+stream fetches pages ahead of the client under a bounded window and
+follows the reader's pace.
+
+Run standalone with ``python query_service.py --port 8080 --cache
+.cache/tecdoc.sqlite`` or embed ``QueryService`` in an existing event loop.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from async_tecdoc_client import AsyncTecDocClient
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Seconds a rendered response is served without asking upstream, per endpoint
+DEFAULT_SERVICE_TTLS = {
+    "countries": 7 * 24 * 3600,
+    "manufacturers": 24 * 3600,
+    "suppliers": 24 * 3600,
+    "articles": 3600,
+}
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    502: "Bad Gateway",
+}
+
+# (status, body, extra headers)
+Response = Tuple[int, bytes, Dict[str, str]]
+
+# (endpoint kind, cache key args, upstream call) of a parsed request
+Route = Tuple[str, Tuple[Any, ...], Callable[[], Awaitable[Any]]]
+
+
+class BadRequest(ValueError):
+    """Invalid query parameter."""
+
+
+def _int_param(query: Dict[str, list], name: str, default: Optional[int] = None) -> Optional[int]:
+    """Read an optional non-negative integer query parameter."""
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+    if value < 0:
+        raise BadRequest(f"{name} must be >= 0")
+    return value
+
+
+def _json_body(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class QueryService:
+    """
+    Asyncio HTTP/1.1 JSON service backed by an ``AsyncTecDocClient``.
+
+    Serves one country/language: the client's.
+    """
+
+    def __init__(
+        self,
+        client: AsyncTecDocClient,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        prefetch: int = 4
+    ) -> None:
+        """
+        Initialize query service.
+
+        Args:
+            client: Async client used for upstream calls (not closed by the service)
+            host: Interface to listen on (default: "127.0.0.1")
+            port: TCP port, 0 for any free port (default: 8080)
+            ttls: Response TTL in seconds per endpoint (default: DEFAULT_SERVICE_TTLS)
+            max_entries: Rendered responses kept in memory (default: 1024)
+            prefetch: Article pages fetched ahead of a streaming reader (default: 4)
+        """
+        if max_entries < 1:
+            raise ValueError("QueryService: max_entries must be >= 1")
+        if prefetch < 1:
+            raise ValueError("QueryService: prefetch must be >= 1")
+
+        self.client = client
+        self.host = host
+        self.port = port
+        self.ttls = dict(DEFAULT_SERVICE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.prefetch = prefetch
+
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.upstream_errors = 0
+
+        # key -> (created, body, etag)
+        self._responses: "OrderedDict[Tuple[Any, ...], Tuple[float, bytes, str]]" = OrderedDict()
+        self._single_flight = SingleFlight()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        self._routes: Dict[str, Callable[[Dict[str, list]], Route]] = {
+            "/countries": self._countries,
+            "/manufacturers": self._manufacturers,
+            "/suppliers": self._suppliers,
+            "/articles": self._articles,
+        }
+
+    # ===== Lifecycle =====
+
+    async def start(self) -> None:
+        """Start listening; ``port`` is updated to the bound port."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"TecDoc query service listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        """Start (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening and close open connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "QueryService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get service statistics.
+
+        Returns:
+            Dict with ``requests``, cache ``hits``/``misses``, requests
+            ``coalesced`` with a miss in flight, ``not_modified`` responses,
+            ``upstream_errors`` and cached ``entries``
+        """
+        return {
+            "requests": self.requests,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self._single_flight.merged,
+            "not_modified": self.not_modified,
+            "upstream_errors": self.upstream_errors,
+            "entries": len(self._responses),
+        }
+
+    # ===== Routes =====
+
+    def _countries(self, query: Dict[str, list]) -> Route:
+        return "countries", (), self.client.get_countries
+
+    def _manufacturers(self, query: Dict[str, list]) -> Route:
+        target = query.get("linking_target_type", ["p"])[-1]
+        return "manufacturers", (target,), lambda: self.client.get_manufacturers(target)
+
+    def _suppliers(self, query: Dict[str, list]) -> Route:
+        return "suppliers", (), self.client.get_brands
+
+    def _articles(self, query: Dict[str, list]) -> Route:
+        supplier = _int_param(query, "supplier")
+        manufacturer = _int_param(query, "manufacturer")
+        page = _int_param(query, "page", 0)
+        page_size = _int_param(query, "page_size", 100)
+        if not supplier and not manufacturer:
+            raise BadRequest("supplier or manufacturer is required")
+
+        def fetch() -> Awaitable[Any]:
+            return self.client.get_articles(
+                data_supplier_id=supplier,
+                manufacturer_id=manufacturer,
+                page_size=page_size,
+                page_number=page,
+            )
+        return "articles", (supplier, manufacturer, page, page_size), fetch
+
+    # ===== Responses =====
+
+    async def _cached(
+        self,
+        kind: str,
+        args: Tuple[Any, ...],
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Tuple[float, bytes, str]:
+        """Get a rendered response from memory, or render it from upstream."""
+        key = (kind,) + args
+        now = time.time()
+        entry = self._responses.get(key)
+        if entry is not None and now - entry[0] < self.ttls.get(kind, 0):
+            self._responses.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        async def render() -> Tuple[float, bytes, str]:
+            # Only the request that calls upstream counts as a miss;
+            # identical requests in flight are counted as coalesced
+            self.misses += 1
+            body = _json_body(await fetch())
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            rendered = (time.time(), body, etag)
+            if self.ttls.get(kind, 0) > 0:
+                self._responses[key] = rendered
+                self._responses.move_to_end(key)
+                while len(self._responses) > self.max_entries:
+                    self._responses.popitem(last=False)
+            return rendered
+
+        return await self._single_flight.do_async(key, render)
+
+    async def _respond(self, path: str, query: Dict[str, list], headers: Dict[str, str]) -> Response:
+        """Build the response of a non-streaming GET request."""
+        if path == "/stats":
+            return 200, _json_body(self.stats()), {}
+
+        route = self._routes.get(path)
+        if route is None:
+            return 404, _json_body({"error": f"unknown path {path}"}), {}
+
+        try:
+            kind, args, fetch = route(query)
+            created, body, etag = await self._cached(kind, args, fetch)
+        except BadRequest as exc:
+            return 400, _json_body({"error": str(exc)}), {}
+        except Exception as exc:
+            self.upstream_errors += 1
+            logger.warning(f"Upstream call for {path} failed: {exc}")
+            return 502, _json_body({"error": f"{exc.__class__.__name__}: {exc}"}), {}
+
+        max_age = max(0, int(self.ttls.get(kind, 0) - (time.time() - created)))
+        extra = {"ETag": etag, "Cache-Control": f"max-age={max_age}"}
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            self.not_modified += 1
+            return 304, b"", extra
+        return 200, body, extra
+
+    @staticmethod
+    async def _send(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        extra: Dict[str, str],
+        keep_alive: bool,
+        send_body: bool = True
+    ) -> None:
+        """Write a complete response (only the head for HEAD requests)."""
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        if status != 304:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body if send_body else b""))
+        await writer.drain()
+
+    async def _stream_articles(
+        self,
+        query: Dict[str, list],
+        writer: asyncio.StreamWriter,
+        keep_alive: bool,
+        method: str = "GET",
+        version: str = "HTTP/1.1"
+    ) -> bool:
+        """
+        Stream all pages of an article query as JSONL.
+
+        HTTP/1.1 clients get a chunked body; for HTTP/1.0 clients (which
+        never keep the connection alive) the end of the body is marked by
+        closing the connection. HEAD requests get the head only. If a page
+        fails after the head was sent, the body ends with an
+        ``{"error": ...}`` line and the connection is closed.
+
+        Returns:
+            Whether the connection may be kept alive
+        """
+        supplier = _int_param(query, "supplier")
+        manufacturer = _int_param(query, "manufacturer")
+        page_size = _int_param(query, "page_size", 100)
+        if not supplier and not manufacturer:
+            raise BadRequest("supplier or manufacturer is required")
+
+        def fetch(page_number: int) -> Awaitable[Dict[str, Any]]:
+            return self.client.get_articles(
+                data_supplier_id=supplier,
+                manufacturer_id=manufacturer,
+                page_size=page_size,
+                page_number=page_number,
+            )
+
+        try:
+            first = await fetch(0)
+        except Exception as exc:
+            self.upstream_errors += 1
+            logger.warning(f"Upstream call for /articles/stream failed: {exc}")
+            body = _json_body({"error": f"{exc.__class__.__name__}: {exc}"})
+            await self._send(writer, 502, body, {}, keep_alive, method != "HEAD")
+            return True
+
+        rows_per_page = len(first["articles"]) or page_size
+        page_count = -(-first["total"] // rows_per_page)
+
+        chunked = version == "HTTP/1.1"
+        lines = ["HTTP/1.1 200 OK", "Content-Type: application/x-ndjson; charset=utf-8"]
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        lines.append(f"X-Total-Count: {first['total']}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if method == "HEAD":
+            await writer.drain()
+            return True
+
+        def frame(data: bytes) -> bytes:
+            if chunked and data:
+                return f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n"
+            return data
+
+        pending: Deque["asyncio.Task[Dict[str, Any]]"] = deque()
+        next_page = 1
+        page = first
+        error: Optional[Exception] = None
+        try:
+            while True:
+                while next_page < page_count and len(pending) < self.prefetch:
+                    pending.append(asyncio.ensure_future(fetch(next_page)))
+                    next_page += 1
+                chunk = b"".join(_json_body(article) + b"\n" for article in page["articles"])
+                if chunk:
+                    writer.write(frame(chunk))
+                    await writer.drain()
+                if not pending:
+                    break
+                try:
+                    page = await pending.popleft()
+                except Exception as exc:
+                    error = exc
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if error is not None:
+            # The status line is already sent: end the body with an error line
+            self.upstream_errors += 1
+            logger.warning(f"Upstream call for /articles/stream failed mid-stream: {error}")
+            writer.write(frame(_json_body({"error": f"{error.__class__.__name__}: {error}"}) + b"\n"))
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return error is None
+
+    # ===== Connections =====
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, 400, _json_body({"error": "malformed request line"}), {}, False)
+                    break
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+
+                if method not in ("GET", "HEAD"):
+                    await self._send(writer, 405, _json_body({"error": "only GET is supported"}), {}, keep_alive)
+                elif url.path == "/articles/stream":
+                    try:
+                        if not await self._stream_articles(query, writer, keep_alive, method, version):
+                            break
+                    except BadRequest as exc:
+                        body = _json_body({"error": str(exc)})
+                        await self._send(writer, 400, body, {}, keep_alive, method != "HEAD")
+                else:
+                    status, body, extra = await self._respond(url.path, query, headers)
+                    await self._send(writer, status, body, extra, keep_alive, method != "HEAD")
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as exc:
+            # Failures after the response head was sent end the connection
+            logger.warning(f"Connection aborted: {exc}")
+        finally:
+            writer.close()
+
+
+def main() -> None:
+    """Run the service until interrupted."""
+    parser = argparse.ArgumentParser(description="Local TecDoc JSON query service")
+    parser.add_argument("--host", default="127.0.0.1", help="interface (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port (default: 8080)")
+    parser.add_argument("--cache", help="SQLite response cache shared with other tools")
+    parser.add_argument("--concurrency", type=int, default=16, help="upstream requests in flight")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    async def serve() -> None:
+        cache = None
+        if args.cache:
+            from response_cache import ResponseCache
+            cache = ResponseCache(path=args.cache)
+        async with AsyncTecDocClient(cache=cache, concurrency=args.concurrency) as client:
+            async with QueryService(client, args.host, args.port) as service:
+                await service.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
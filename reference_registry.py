@@ -0,0 +1,500 @@
+"""
+TecDoc Reference Registry
+=========================
+
+Indexed access to the DataSupplier (parts manufacturer) and car
+manufacturer reference data shipped in ``data/`` and ``reference_data/``.
+
+The files are loaded once, lazily, on first use and merged by ID. The
+registry offers:
+- O(1) ID -> name and normalized name -> ID lookups
+- search by exact name, name prefix and trigram similarity (typos,
+  punctuation and spacing differences)
+- an optional binary snapshot file that is memory-mapped at startup
+  instead of parsing JSON/CSV; it is rebuilt when a source file changes
+- incremental refresh from the live ``getManufacturers``/``getBrands`` lists
+"""
+
+import bisect
+import csv
+import hashlib
+import html
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRS = (os.path.join(_ROOT, "data"), os.path.join(_ROOT, "reference_data"))
+
+SUPPLIER_FILES = ("datasuppliers.json", "parts_manufacturers_77.json", "parts_manufacturers_77.csv")
+MANUFACTURER_FILES = ("manufacturers.json", "car_manufacturers_433.json")
+
+SNAPSHOT_MAGIC = b"TDREFREG"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<8sI16sII")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a supplier/manufacturer name for matching.
+
+    Decodes HTML entities, strips accents, upper-cases and drops everything
+    except letters and digits ("Lynk &amp; Co" -> "LYNKCO", "A.B.S." -> "ABS").
+
+    Args:
+        name: Name as found in the reference data or user input
+
+    Returns:
+        Normalized name
+    """
+    decomposed = unicodedata.normalize("NFKD", html.unescape(name))
+    return "".join(c for c in decomposed if c.isalnum()).upper()
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    """Get the boundary-padded trigrams of a normalized name."""
+    padded = f"^{normalized}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _NameTable:
+    """ID, name and article count columns of one entity type, with lookup indexes."""
+
+    def __init__(self, ids: Sequence[int], names: Sequence[str], articles: Sequence[int]) -> None:
+        self.ids = list(ids)
+        self.names = list(names)
+        self.articles = list(articles)
+        self.positions = {id_: pos for pos, id_ in enumerate(self.ids)}
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        for pos, name in enumerate(self.names):
+            self.by_name[normalize_name(name)].append(pos)
+
+        # Search structures, built on first search
+        self._sorted: Optional[List[str]] = None
+        self._grams: Optional[Dict[str, List[str]]] = None
+
+    def record(self, pos: int, with_articles: bool) -> Dict[str, Any]:
+        """Get one entry as a dict."""
+        record: Dict[str, Any] = {"id": self.ids[pos], "name": self.names[pos]}
+        if with_articles:
+            record["articles"] = self.articles[pos]
+        return record
+
+    def _build_search(self) -> None:
+        """Build the sorted prefix list and the trigram index."""
+        grams: Dict[str, List[str]] = defaultdict(list)
+        for key in self.by_name:
+            for gram in _trigrams(key):
+                grams[gram].append(key)
+        self._grams = dict(grams)
+        self._sorted = sorted(self.by_name)
+
+    def search(self, query: str, limit: int, min_similarity: float) -> List[int]:
+        """
+        Find entries by exact name, prefix, then trigram similarity.
+
+        Returns:
+            Positions, best matches first
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        if self._sorted is None:
+            self._build_search()
+
+        keys: List[str] = []
+        if key in self.by_name:
+            keys.append(key)
+
+        start = bisect.bisect_left(self._sorted, key)
+        for candidate in self._sorted[start:]:
+            if not candidate.startswith(key):
+                break
+            if candidate != key:
+                keys.append(candidate)
+
+        if len(keys) < limit:
+            query_grams = _trigrams(key)
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for candidate in self._grams.get(gram, ()):
+                    shared[candidate] += 1
+            scored = []
+            for candidate, count in shared.items():
+                similarity = count / (len(query_grams) + len(_trigrams(candidate)) - count)
+                if similarity >= min_similarity and candidate not in keys:
+                    scored.append((-similarity, candidate))
+            keys += [candidate for _, candidate in sorted(scored)]
+
+        positions = [pos for k in keys for pos in self.by_name[k]]
+        return positions[:limit]
+
+
+def _source_files(data_dirs: Sequence[str]) -> List[str]:
+    """Get the existing reference files, suppliers first."""
+    return [
+        os.path.join(data_dir, name)
+        for names in (SUPPLIER_FILES, MANUFACTURER_FILES)
+        for data_dir in data_dirs
+        for name in names
+        if os.path.exists(os.path.join(data_dir, name))
+    ]
+
+
+def _signature(paths: Iterable[str]) -> bytes:
+    """Digest over path, size and modification time of the source files."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\x1e".encode("utf-8"))
+    return digest.digest()
+
+
+def _load_file(path: str) -> List[Tuple[int, str, int]]:
+    """Read (id, name, articles) entries from one reference file."""
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return [
+                (int(row["ID"]), html.unescape(row["Name"]), int(row.get("Articles") or 0))
+                for row in csv.DictReader(f)
+            ]
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "datasuppliers" in data:
+        entries = data["datasuppliers"]
+    else:
+        entries = data["manufacturers"]
+        entries = entries["data"] if isinstance(entries, dict) else entries
+    return [
+        (int(e["id"]), html.unescape(e["name"]), int(e.get("articles") or 0))
+        for e in entries
+    ]
+
+
+class ReferenceRegistry:
+    """
+    Lazily loaded, indexed DataSupplier and manufacturer registry.
+
+    Thread-safe. Entries are dicts with ``id`` (int) and ``name``;
+    suppliers also carry their ``articles`` count.
+    """
+
+    def __init__(
+        self,
+        data_dirs: Sequence[str] = DATA_DIRS,
+        snapshot_path: Optional[str] = None
+    ) -> None:
+        """
+        Initialize registry. Nothing is read until the first lookup.
+
+        Args:
+            data_dirs: Directories searched for the reference files; for an
+                ID found in several files, the first directory wins
+                (default: data/ and reference_data/ next to this module)
+            snapshot_path: Binary snapshot file, reused while the source
+                files are unchanged (default: TEC_REFERENCE_SNAPSHOT env, or none)
+        """
+        self.data_dirs = tuple(data_dirs)
+        self.snapshot_path = snapshot_path or os.getenv("TEC_REFERENCE_SNAPSHOT")
+
+        self._suppliers: Optional[_NameTable] = None
+        self._manufacturers: Optional[_NameTable] = None
+        self._lock = threading.Lock()
+
+    # ===== Loading =====
+
+    def _tables(self) -> Tuple[_NameTable, _NameTable]:
+        """Get (suppliers, manufacturers), loading them on first use."""
+        if self._suppliers is None:
+            with self._lock:
+                if self._suppliers is None:
+                    self._load()
+        return self._suppliers, self._manufacturers
+
+    def _load(self) -> None:
+        """Load from the snapshot if it is current, else from the source files (lock held)."""
+        files = _source_files(self.data_dirs)
+        if not files:
+            raise FileNotFoundError(f"ReferenceRegistry: no reference data in {self.data_dirs}")
+        signature = _signature(files)
+
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                loaded = self._read_snapshot(self.snapshot_path, signature)
+            except (OSError, ValueError, struct.error) as exc:
+                logger.warning(f"Ignoring unreadable reference snapshot {self.snapshot_path}: {exc}")
+                loaded = None
+            if loaded:
+                self._suppliers, self._manufacturers = loaded
+                logger.debug(f"Reference data loaded from snapshot {self.snapshot_path}")
+                return
+
+        merged: Dict[str, Dict[int, Tuple[str, int]]] = {"suppliers": {}, "manufacturers": {}}
+        for path in files:
+            kind = "suppliers" if os.path.basename(path) in SUPPLIER_FILES else "manufacturers"
+            for id_, name, articles in _load_file(path):
+                merged[kind].setdefault(id_, (name, articles))
+
+        self._suppliers, self._manufacturers = (
+            _NameTable(
+                list(entries),
+                [name for name, _ in entries.values()],
+                [articles for _, articles in entries.values()],
+            )
+            for entries in (merged["suppliers"], merged["manufacturers"])
+        )
+        logger.info(
+            f"Reference data loaded ({len(self._suppliers.ids)} suppliers, "
+            f"{len(self._manufacturers.ids)} manufacturers)"
+        )
+
+        if self.snapshot_path:
+            self._write_snapshot(self.snapshot_path, signature)
+
+    @staticmethod
+    def _read_snapshot(path: str, signature: bytes) -> Optional[Tuple[_NameTable, _NameTable]]:
+        """Memory-map a snapshot; returns None if it was built from other sources."""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, stored, *counts = _HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError("not a reference snapshot")
+            if stored != signature:
+                return None
+
+            offset = _HEADER.size
+            tables = []
+            for count in counts:
+                columns = []
+                for length in (count, count, count + 1):
+                    column = array("I")
+                    column.frombytes(mm[offset:offset + length * column.itemsize])
+                    offset += length * column.itemsize
+                    columns.append(column)
+                ids, articles, ends = columns
+                blob = mm[offset:offset + ends[-1]]
+                offset += ends[-1]
+                names = [blob[ends[i]:ends[i + 1]].decode("utf-8") for i in range(count)]
+                tables.append(_NameTable(ids, names, articles))
+            return tables[0], tables[1]
+
+    def _write_snapshot(self, path: str, signature: bytes) -> None:
+        """Write the current tables to a snapshot file (atomically replaced)."""
+        parts = [_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, signature,
+            len(self._suppliers.ids), len(self._manufacturers.ids),
+        )]
+        for table in (self._suppliers, self._manufacturers):
+            encoded = [name.encode("utf-8") for name in table.names]
+            ends = array("I", [0])
+            for name in encoded:
+                ends.append(ends[-1] + len(name))
+            parts += [
+                array("I", table.ids).tobytes(),
+                array("I", table.articles).tobytes(),
+                ends.tobytes(),
+                b"".join(encoded),
+            ]
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(b"".join(parts))
+            os.replace(temp_path, path)
+        except OSError as exc:
+            logger.warning(f"Could not write reference snapshot {path}: {exc}")
+        else:
+            logger.debug(f"Reference snapshot written to {path}")
+
+    # ===== Suppliers =====
+
+    def suppliers(self) -> List[Dict[str, Any]]:
+        """Get all DataSuppliers, most articles first."""
+        table = self._tables()[0]
+        order = sorted(range(len(table.ids)), key=lambda pos: -table.articles[pos])
+        return [table.record(pos, True) for pos in order]
+
+    def supplier(self, supplier_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get one DataSupplier by ID.
+
+        Args:
+            supplier_id: DataSupplier ID (int or numeric string)
+
+        Returns:
+            Dict with id, name and articles, or None if unknown
+        """
+        table = self._tables()[0]
+        pos = table.positions.get(int(supplier_id))
+        return table.record(pos, True) if pos is not None else None
+
+    def supplier_name(self, supplier_id: Any) -> Optional[str]:
+        """Get the name of a DataSupplier ID (None if unknown)."""
+        table = self._tables()[0]
+        pos = table.positions.get(int(supplier_id))
+        return table.names[pos] if pos is not None else None
+
+    def supplier_id(self, name: str) -> Optional[int]:
+        """
+        Get the ID of a DataSupplier by name.
+
+        The match ignores case, accents, punctuation and spacing
+        ("mann filter" finds MANN-FILTER).
+
+        Args:
+            name: Supplier name
+
+        Returns:
+            DataSupplier ID, or None if no supplier has this name
+        """
+        table = self._tables()[0]
+        positions = table.by_name.get(normalize_name(name))
+        return table.ids[positions[0]] if positions else None
+
+    def find_suppliers(self, query: str, limit: int = 10, min_similarity: float = 0.25) -> List[Dict[str, Any]]:
+        """
+        Search DataSuppliers by name.
+
+        Args:
+            query: Full name, name prefix or misspelled name
+            limit: Maximum number of results (default: 10)
+            min_similarity: Minimum trigram similarity for fuzzy matches (default: 0.25)
+
+        Returns:
+            Matching suppliers: exact match first, then prefix matches, then
+            fuzzy matches by descending similarity
+        """
+        table = self._tables()[0]
+        return [table.record(pos, True) for pos in table.search(query, limit, min_similarity)]
+
+    # ===== Manufacturers =====
+
+    def manufacturers(self) -> List[Dict[str, Any]]:
+        """Get all car manufacturers in reference data order."""
+        table = self._tables()[1]
+        return [table.record(pos, False) for pos in range(len(table.ids))]
+
+    def manufacturer(self, manufacturer_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get one car manufacturer by ID.
+
+        Args:
+            manufacturer_id: Manufacturer ID (int or numeric string)
+
+        Returns:
+            Dict with id and name, or None if unknown
+        """
+        table = self._tables()[1]
+        pos = table.positions.get(int(manufacturer_id))
+        return table.record(pos, False) if pos is not None else None
+
+    def manufacturer_name(self, manufacturer_id: Any) -> Optional[str]:
+        """Get the name of a manufacturer ID (None if unknown)."""
+        table = self._tables()[1]
+        pos = table.positions.get(int(manufacturer_id))
+        return table.names[pos] if pos is not None else None
+
+    def manufacturer_id(self, name: str) -> Optional[int]:
+        """
+        Get the ID of a car manufacturer by name (normalized match).
+
+        Args:
+            name: Manufacturer name
+
+        Returns:
+            Manufacturer ID, or None if no manufacturer has this name
+        """
+        table = self._tables()[1]
+        positions = table.by_name.get(normalize_name(name))
+        return table.ids[positions[0]] if positions else None
+
+    def find_manufacturers(self, query: str, limit: int = 10, min_similarity: float = 0.25) -> List[Dict[str, Any]]:
+        """
+        Search car manufacturers by name.
+
+        Args:
+            query: Full name, name prefix or misspelled name
+            limit: Maximum number of results (default: 10)
+            min_similarity: Minimum trigram similarity for fuzzy matches (default: 0.25)
+
+        Returns:
+            Matching manufacturers, best matches first
+        """
+        table = self._tables()[1]
+        return [table.record(pos, False) for pos in table.search(query, limit, min_similarity)]
+
+    # ===== Refresh =====
+
+    def _apply(self, kind: str, entries: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Merge a live list into one table; returns added/removed/renamed counts."""
+        suppliers, manufacturers = self._tables()
+        with self._lock:
+            table = suppliers if kind == "suppliers" else manufacturers
+            live = {int(e["id"]): html.unescape(e["name"]) for e in entries}
+            removed = [pos for pos, id_ in enumerate(table.ids) if id_ not in live]
+            renamed = [
+                pos for pos, id_ in enumerate(table.ids)
+                if id_ in live and live[id_] != table.names[pos]
+            ]
+            added = [id_ for id_ in live if id_ not in table.positions]
+            counts = {"added": len(added), "removed": len(removed), "renamed": len(renamed)}
+            if not any(counts.values()):
+                return counts
+
+            keep = [pos for pos, id_ in enumerate(table.ids) if id_ in live]
+            updated = _NameTable(
+                [table.ids[pos] for pos in keep] + added,
+                [live[table.ids[pos]] for pos in keep] + [live[id_] for id_ in added],
+                [table.articles[pos] for pos in keep] + [0] * len(added),
+            )
+            if kind == "suppliers":
+                self._suppliers = updated
+            else:
+                self._manufacturers = updated
+
+            if self.snapshot_path:
+                self._write_snapshot(self.snapshot_path, _signature(_source_files(self.data_dirs)))
+
+        logger.info(f"Reference {kind} refreshed: {counts}")
+        return counts
+
+    def refresh_manufacturers(self, client: Any, linking_target_type: str = "p") -> Dict[str, int]:
+        """
+        Apply changes of the live manufacturer list.
+
+        New manufacturers are added, missing ones removed and renamed ones
+        updated; the snapshot (if configured) is rewritten only on changes.
+        The refreshed data stays in the snapshot until a source file changes.
+
+        Args:
+            client: ``TecDocClient`` or ``TecDocAPI``
+            linking_target_type: Target type ("p" for passenger cars)
+
+        Returns:
+            Dict with added, removed and renamed counts
+        """
+        return self._apply("manufacturers", client.get_manufacturers(linking_target_type))
+
+    def refresh_suppliers(self, client: Any) -> Dict[str, int]:
+        """
+        Apply changes of the live DataSupplier list (``getBrands``).
+
+        Article counts of known suppliers are kept; new suppliers get 0.
+
+        Args:
+            client: ``TecDocClient``
+
+        Returns:
+            Dict with added, removed and renamed counts
+        """
+        return self._apply("suppliers", client.get_brands())
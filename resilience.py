@@ -0,0 +1,403 @@
+"""
+TecDoc Tail-Latency Controls
+============================
+
+Hedged requests and per-function circuit breakers for the SOAP clients.
+
+- HedgePolicy: once a call has been running longer than the observed
+  latency quantile of its function (p95 by default), a second identical
+  request is sent and the first good response wins. All TecDoc functions
+  used by the clients are read-only, so duplicates are safe. A budget caps
+  the extra load (by default at most 5% more requests).
+- CircuitBreaker: opens after consecutive failures of one function and
+  rejects calls for ``reset_timeout`` seconds; then one trial call decides
+  whether it closes again. The client serves a stale cached response while
+  a circuit is open, if it has a cache, and raises ``CircuitOpenError``
+  otherwise.
+
+Both are configured per SOAP function and export their statistics to
+``ClientMetrics``.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+import requests
+
+from throttle import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Latency quantile after which a call is hedged, per SOAP function
+DEFAULT_HEDGE_QUANTILES = {
+    "getArticles": 0.95,
+    "getBrands": 0.95,
+    "getCountries": 0.95,
+    "getManufacturers": 0.95,
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because its function's circuit is open."""
+
+
+def _failed(response: requests.Response) -> bool:
+    """Whether a response indicates a degraded endpoint."""
+    return response.status_code in RETRY_STATUSES
+
+
+class HedgePolicy:
+    """
+    Hedged-request runner.
+
+    Thread-safe; share one instance between clients to share the latency
+    statistics and the hedge budget.
+    """
+
+    def __init__(
+        self,
+        quantiles: Optional[Dict[str, float]] = None,
+        delays: Optional[Dict[str, float]] = None,
+        min_delay: float = 0.05,
+        max_delay: Optional[float] = None,
+        min_samples: int = 20,
+        window: int = 200,
+        budget: float = 0.05,
+        max_workers: int = 64
+    ) -> None:
+        """
+        Initialize hedge policy.
+
+        Args:
+            quantiles: Latency quantile after which a call is hedged, per
+                SOAP function; functions not listed are never hedged
+                (default: DEFAULT_HEDGE_QUANTILES)
+            delays: Fixed hedge delay in seconds per SOAP function, used
+                instead of the observed quantile (default: none)
+            min_delay: Lower bound of the hedge delay (default: 0.05)
+            max_delay: Upper bound of the hedge delay (default: none)
+            min_samples: Latency samples needed before hedging (default: 20)
+            window: Latency samples kept per function (default: 200)
+            budget: Hedges allowed per request, e.g. 0.05 for at most 5%
+                extra requests (default: 0.05)
+            max_workers: Threads running hedged calls (default: 64)
+        """
+        if not 0 < budget <= 1:
+            raise ValueError("HedgePolicy: budget must be in (0, 1]")
+        if min_samples < 1 or window < min_samples:
+            raise ValueError("HedgePolicy: require 1 <= min_samples <= window")
+
+        self.quantiles = dict(DEFAULT_HEDGE_QUANTILES if quantiles is None else quantiles)
+        self.delays = dict(delays or {})
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = budget
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tecdoc-hedge")
+
+    def delay(self, function: str) -> Optional[float]:
+        """
+        Get the current hedge delay of a function.
+
+        Args:
+            function: TecDoc function name
+
+        Returns:
+            Seconds after which a call is hedged, or None if the function
+            is not hedged (yet)
+        """
+        if function in self.delays:
+            return self.delays[function]
+        quantile = self.quantiles.get(function)
+        if quantile is None:
+            return None
+        with self._lock:
+            samples = self._latencies.get(function)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        value = max(self.min_delay, ordered[min(len(ordered) - 1, int(quantile * len(ordered)))])
+        return min(value, self.max_delay) if self.max_delay is not None else value
+
+    def observe(self, function: str, seconds: float) -> None:
+        """
+        Record the latency of a successful call.
+
+        Args:
+            function: TecDoc function name
+            seconds: Call duration
+        """
+        with self._lock:
+            samples = self._latencies.get(function)
+            if samples is None:
+                samples = self._latencies[function] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def _take_token(self) -> bool:
+        """Spend one hedge from the budget, if available."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.hedged += 1
+                return True
+            self.over_budget += 1
+            return False
+
+    def run(self, function: str, call: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Run a call, hedging it once it exceeds the function's hedge delay.
+
+        The first response that is not a 429/5xx wins; the other call is
+        left to finish in the background and its response is discarded.
+
+        Args:
+            function: TecDoc function name
+            call: Function performing the (throttled) request
+
+        Returns:
+            Winning response
+
+        Raises:
+            requests.RequestException: If all calls failed
+        """
+        delay = self.delay(function)
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(10.0, self._tokens + self.budget)
+
+        started = time.monotonic()
+        if delay is None:
+            response = call()
+            if not _failed(response):
+                self.observe(function, time.monotonic() - started)
+            return response
+
+        primary = self._executor.submit(call)
+        futures = [primary]
+        done, _ = wait(futures, timeout=delay)
+        if not done and self._take_token():
+            logger.debug(f"Hedging {function} after {delay:.3f}s")
+            futures.append(self._executor.submit(call))
+
+        winner: Optional[Future] = None
+        last: Optional[Future] = None
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if winner is None and future.exception() is None and not _failed(future.result()):
+                    winner = future
+                else:
+                    last = future
+
+        # Discard the responses of the calls that did not win
+        result = winner or last
+        for future in futures:
+            if future is not result:
+                future.add_done_callback(_close_response)
+
+        if winner is not None and winner is not primary:
+            with self._lock:
+                self.hedge_wins += 1
+        response = result.result()
+        if not _failed(response):
+            self.observe(function, time.monotonic() - started)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hedging statistics.
+
+        Returns:
+            Dict with ``calls``, ``hedged``, ``hedge_wins``, ``over_budget``
+            (hedges skipped for lack of budget) and the current
+            ``<function>_delay`` of every hedged function
+        """
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "over_budget": self.over_budget,
+            }
+            functions = list(self._latencies)
+        for function in functions:
+            delay = self.delay(function)
+            if delay is not None:
+                stats[f"{function}_delay"] = delay
+        return stats
+
+    def close(self) -> None:
+        """Stop the hedge threads after the calls in flight."""
+        self._executor.shutdown(wait=True)
+
+
+def _close_response(future: Future) -> None:
+    """Close the response of a call that lost a hedge race."""
+    if future.exception() is None:
+        future.result().close()
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one SOAP function."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """
+        Initialize circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit (default: 5)
+            reset_timeout: Seconds the circuit stays open before a trial call (default: 30)
+        """
+        if failure_threshold < 1:
+            raise ValueError("CircuitBreaker: failure_threshold must be >= 1")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go upstream.
+
+        Returns:
+            True if the circuit is closed, or half-open and no trial call
+            is running; False if the call must be rejected
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success: bool) -> None:
+        """
+        Record the outcome of an allowed call.
+
+        Args:
+            success: Whether the endpoint answered normally
+        """
+        with self._lock:
+            if success:
+                if self.state != CLOSED:
+                    logger.info("Circuit closed")
+                self.state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self._opened = time.monotonic()
+                self._trial = False
+
+
+class CircuitBreakers:
+    """
+    Per-function circuit breakers.
+
+    Thread-safe; share one instance between clients of the same endpoint.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        failure_thresholds: Optional[Dict[str, int]] = None,
+        reset_timeouts: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        Initialize circuit breakers.
+
+        Args:
+            failure_threshold: Default consecutive failures that open a circuit (default: 5)
+            reset_timeout: Default open time in seconds (default: 30)
+            failure_thresholds: Failure threshold per SOAP function (default: none)
+            reset_timeouts: Open time per SOAP function (default: none)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_thresholds = dict(failure_thresholds or {})
+        self.reset_timeouts = dict(reset_timeouts or {})
+
+        self.fallbacks = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, function: str) -> CircuitBreaker:
+        """
+        Get (or create) the breaker of a function.
+
+        Args:
+            function: TecDoc function name
+
+        Returns:
+            Circuit breaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(function)
+            if breaker is None:
+                breaker = self._breakers[function] = CircuitBreaker(
+                    self.failure_thresholds.get(function, self.failure_threshold),
+                    self.reset_timeouts.get(function, self.reset_timeout),
+                )
+            return breaker
+
+    def record_fallback(self) -> None:
+        """Count a rejected call that was served from the cache."""
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get circuit statistics.
+
+        Returns:
+            Dict with ``open`` circuits, total ``trips``, ``rejected`` calls,
+            cache ``fallbacks`` and ``<function>_state`` per function
+            (0 closed, 1 half-open, 2 open)
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+            stats: Dict[str, Any] = {"fallbacks": self.fallbacks}
+        stats["open"] = sum(1 for b in breakers.values() if b.state == OPEN)
+        stats["trips"] = sum(b.trips for b in breakers.values())
+        stats["rejected"] = sum(b.rejected for b in breakers.values())
+        for function, breaker in sorted(breakers.items()):
+            stats[f"{function}_state"] = _STATE_VALUES[breaker.state]
+        return stats
@@ -0,0 +1,546 @@
+"""
+TecDoc Raw Response Archive
+===========================
+
+Append-only, compressed archive of raw SOAP responses for re-parsing.
+
+Every response the client receives from the API is appended to the
+current segment file as one self-describing record:
+
+    magic "TDA1" | uint32 meta length | uint32 body length | meta JSON | zlib body
+
+Each body is compressed on its own, so any record can be read with one
+positioned read. A SQLite index maps (function, params, country, lang,
+fetch time) to (segment, offset, length). Segments rotate at
+``segment_bytes``; records are never rewritten.
+
+The segment files alone are enough to rebuild the index: records written
+after the last indexed one (e.g. after a crash) are re-indexed when the
+archive is opened, and a torn record at the end of a segment is cut off.
+
+``reparse`` applies a parser to a selection of stored responses in a
+process pool; workers read the segments themselves, so the parent only
+passes (segment, offset, length) tuples.
+
+One process writes to an archive directory at a time; any number of
+processes may open it with ``readonly=True`` meanwhile.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from response_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TDA1"
+HEADER = struct.Struct("<4sII")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    function TEXT NOT NULL,
+    key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    country TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_key ON responses (key, fetched);
+CREATE INDEX IF NOT EXISTS responses_function ON responses (function, fetched);
+CREATE UNIQUE INDEX IF NOT EXISTS responses_position ON responses (segment, offset);
+"""
+
+# Columns of an entry dict, and the columns written per record (``_index_row``)
+_ENTRY_COLUMNS = ("id", "function", "params", "country", "lang", "fetched", "segment", "offset", "length", "size")
+_INDEX_COLUMNS = ("function", "params", "country", "lang", "fetched", "segment", "offset", "length", "size", "key")
+_SELECT_ENTRY = f"SELECT {', '.join(_ENTRY_COLUMNS)} FROM responses"
+_INSERT_INDEX = (
+    f"INTO responses ({', '.join(_INDEX_COLUMNS)}) VALUES ({', '.join('?' * len(_INDEX_COLUMNS))})"
+)
+
+# (segment path, offset, record length) of one stored response
+Location = Tuple[str, int, int]
+
+
+def segment_name(number: int) -> str:
+    """File name of a segment."""
+    return f"segment-{number:06d}.tda"
+
+
+def read_record(path: str, offset: int, length: int) -> Tuple[Dict[str, Any], str]:
+    """
+    Read one record from a segment file.
+
+    Args:
+        path: Segment file
+        offset: Record offset
+        length: Record length (header included)
+
+    Returns:
+        Tuple of (meta dict, decompressed response body)
+
+    Raises:
+        ValueError: If the bytes at ``offset`` are not a valid record
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return _decode_record(data)
+
+
+def _decode_record(data: bytes) -> Tuple[Dict[str, Any], str]:
+    """Decode a record read from a segment."""
+    if len(data) < HEADER.size:
+        raise ValueError("read_record: truncated record")
+    magic, meta_length, body_length = HEADER.unpack_from(data)
+    if magic != MAGIC or len(data) != HEADER.size + meta_length + body_length:
+        raise ValueError("read_record: invalid record")
+    meta = json.loads(data[HEADER.size:HEADER.size + meta_length].decode("utf-8"))
+    body = zlib.decompress(data[HEADER.size + meta_length:]).decode("utf-8")
+    return meta, body
+
+
+def _parse_chunk(parse: Callable[[str], Any], locations: List[Location]) -> List[Any]:
+    """Read and parse a chunk of records (runs in a worker process)."""
+    results = []
+    handles: Dict[str, Any] = {}
+    try:
+        for path, offset, length in locations:
+            f = handles.get(path)
+            if f is None:
+                f = handles[path] = open(path, "rb")
+            f.seek(offset)
+            results.append(parse(_decode_record(f.read(length))[1]))
+    finally:
+        for f in handles.values():
+            f.close()
+    return results
+
+
+class ResponseArchive:
+    """
+    Segmented, append-only archive of compressed raw SOAP responses.
+
+    Thread-safe; pass it to ``TecDocClient(archive=...)`` to record every
+    response fetched from the API (cache hits are not recorded again).
+    """
+
+    def __init__(
+        self,
+        directory: str = "tecdoc_archive",
+        segment_bytes: int = 256 * 1024 * 1024,
+        compression_level: int = 6,
+        readonly: bool = False
+    ) -> None:
+        """
+        Open (or create) an archive.
+
+        Args:
+            directory: Directory holding the segments and ``index.sqlite``
+            segment_bytes: Size at which a new segment is started (default: 256 MiB)
+            compression_level: zlib level 1-9 (default: 6)
+            readonly: Open for reading only, next to a running writer; skips
+                recovery (default: False)
+        """
+        if segment_bytes < 1024:
+            raise ValueError("ResponseArchive: segment_bytes must be >= 1024")
+        if not 1 <= compression_level <= 9:
+            raise ValueError("ResponseArchive: compression_level must be 1-9")
+
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compression_level = compression_level
+        self.readonly = readonly
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        self._file = None
+        if not readonly:
+            self._recover()
+            segments = self._segments()
+            self._segment = segments[-1] if segments else 1
+            self._file = open(self._segment_path(self._segment), "ab")
+
+    # ===== Segments =====
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, segment_name(number))
+
+    def _segments(self) -> List[int]:
+        """Numbers of the segment files on disk, in order."""
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(".tda"):
+                try:
+                    numbers.append(int(name[8:-4]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _recover(self) -> None:
+        """Index records written after the last indexed one; cut torn tails."""
+        recovered = 0
+        for number in self._segments():
+            path = self._segment_path(number)
+            end = self._db.execute(
+                "SELECT COALESCE(MAX(offset + length), 0) FROM responses WHERE segment = ?",
+                (number,),
+            ).fetchone()[0]
+            size = os.path.getsize(path)
+            if end >= size:
+                continue
+
+            rows = []
+            with open(path, "rb") as f:
+                f.seek(end)
+                while end < size:
+                    header = f.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        break
+                    magic, meta_length, body_length = HEADER.unpack(header)
+                    rest = f.read(meta_length + body_length)
+                    if magic != MAGIC or len(rest) < meta_length + body_length:
+                        break
+                    try:
+                        meta = json.loads(rest[:meta_length].decode("utf-8"))
+                    except ValueError:
+                        break
+                    length = HEADER.size + meta_length + body_length
+                    rows.append(self._index_row(meta, number, end, length))
+                    end += length
+
+            if end < size:
+                logger.warning(f"Archive segment {number}: dropping {size - end} torn bytes")
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            if rows:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    f"INSERT OR IGNORE {_INSERT_INDEX}",
+                    rows,
+                )
+                self._db.execute("COMMIT")
+                recovered += len(rows)
+
+        if recovered:
+            logger.info(f"Archive: re-indexed {recovered} records from segment files")
+
+    @staticmethod
+    def _index_row(meta: Dict[str, Any], segment: int, offset: int, length: int) -> Tuple[Any, ...]:
+        """Index row of a record, in ``_INDEX_COLUMNS`` order."""
+        return (
+            meta["function"],
+            json.dumps(meta["params"], sort_keys=True, separators=(",", ":")),
+            meta["country"],
+            meta["lang"],
+            meta["fetched"],
+            segment,
+            offset,
+            length,
+            meta["size"],
+            make_cache_key(meta["function"], meta["params"], meta["country"], meta["lang"]),
+        )
+
+    # ===== Writing =====
+
+    def append(
+        self,
+        function: str,
+        params: Dict[str, Any],
+        country: str,
+        lang: str,
+        body: str,
+        fetched: Optional[float] = None
+    ) -> int:
+        """
+        Append one raw response.
+
+        Args:
+            function: TecDoc function name
+            params: Function parameters
+            country: Client country code
+            lang: Client language code
+            body: Raw XML response
+            fetched: Time the response was received (default: now)
+
+        Returns:
+            ID of the stored response
+
+        Raises:
+            ValueError: If the archive was opened read-only
+        """
+        if self._file is None:
+            raise ValueError("ResponseArchive: archive is read-only")
+
+        raw = body.encode("utf-8")
+        meta = {
+            "function": function,
+            "params": {k: str(v) for k, v in params.items() if v is not None},
+            "country": country.lower(),
+            "lang": lang.lower(),
+            "fetched": fetched or time.time(),
+            "size": len(raw),
+        }
+        meta_bytes = json.dumps(meta, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        compressed = zlib.compress(raw, self.compression_level)
+        record = HEADER.pack(MAGIC, len(meta_bytes), len(compressed)) + meta_bytes + compressed
+
+        with self._lock:
+            offset = self._file.tell()
+            if offset and offset + len(record) > self.segment_bytes:
+                self._file.close()
+                self._segment += 1
+                self._file = open(self._segment_path(self._segment), "ab")
+                offset = 0
+
+            # Data first: the index never points past the end of a segment
+            self._file.write(record)
+            self._file.flush()
+            cursor = self._db.execute(
+                f"INSERT {_INSERT_INDEX}",
+                self._index_row(meta, self._segment, offset, len(record)),
+            )
+            return cursor.lastrowid
+
+    # ===== Reading =====
+
+    @staticmethod
+    def _entry(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """Convert an index row to an entry dict."""
+        entry = dict(zip(_ENTRY_COLUMNS, row))
+        entry["params"] = json.loads(entry["params"])
+        return entry
+
+    def _location(self, entry: Dict[str, Any]) -> Location:
+        return self._segment_path(entry["segment"]), entry["offset"], entry["length"]
+
+    def entry(self, response_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the index entry of one response.
+
+        Args:
+            response_id: ID returned by ``append``
+
+        Returns:
+            Dict with ``id``, ``function``, ``params``, ``country``, ``lang``,
+            ``fetched``, ``segment``, ``offset``, ``length`` and ``size``
+            (uncompressed bytes), or None if unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                f"{_SELECT_ENTRY} WHERE id = ?", (response_id,)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def get(self, response_id: int) -> Optional[str]:
+        """
+        Read one raw response by ID.
+
+        Args:
+            response_id: ID returned by ``append``
+
+        Returns:
+            Raw XML response, or None if unknown
+        """
+        entry = self.entry(response_id)
+        if entry is None:
+            return None
+        return read_record(*self._location(entry))[1]
+
+    def latest(
+        self,
+        function: str,
+        params: Dict[str, Any],
+        country: str,
+        lang: str,
+        before: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Read the most recent response of a call.
+
+        Args:
+            function: TecDoc function name
+            params: Function parameters
+            country: Client country code
+            lang: Client language code
+            before: Only consider responses fetched before this time
+                (default: any time)
+
+        Returns:
+            Raw XML response, or None if the call was never archived
+        """
+        key = make_cache_key(function, params, country, lang)
+        with self._lock:
+            row = self._db.execute(
+                f"{_SELECT_ENTRY} WHERE key = ? AND fetched < ? "
+                "ORDER BY fetched DESC LIMIT 1",
+                (key, before if before is not None else float("inf")),
+            ).fetchone()
+        if row is None:
+            return None
+        return read_record(*self._location(self._entry(row)))[1]
+
+    def entries(
+        self,
+        function: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over index entries in archive order.
+
+        Args:
+            function: Only responses of this function (default: all)
+            since: Only responses fetched at or after this time
+            until: Only responses fetched before this time
+            batch_size: Index rows read per query (default: 1000)
+
+        Yields:
+            Entry dicts as returned by ``entry``
+        """
+        clauses, args = [], []
+        if function is not None:
+            clauses.append("function = ?")
+            args.append(function)
+        if since is not None:
+            clauses.append("fetched >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("fetched < ?")
+            args.append(until)
+        where = "".join(f" AND {clause}" for clause in clauses)
+
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    f"{_SELECT_ENTRY} WHERE id > ?{where} ORDER BY id LIMIT ?",
+                    [last] + args + [batch_size],
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._entry(row)
+            last = rows[-1][0]
+
+    def reparse(
+        self,
+        parse: Callable[[str], Any],
+        function: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = 64
+    ) -> Iterator[Tuple[Dict[str, Any], Any]]:
+        """
+        Re-parse stored responses in parallel.
+
+        Chunks of records are parsed by a process pool; at most two chunks
+        per worker are in flight, so results are streamed in archive order
+        with bounded memory.
+
+        Args:
+            parse: Parser taking a raw XML response, e.g.
+                ``soap_parser.parse_articles``; must be picklable (a
+                module-level function) unless ``workers=0``
+            function: Only responses of this function (default: all)
+            since: Only responses fetched at or after this time
+            until: Only responses fetched before this time
+            workers: Parser processes (default: CPU count; 0 parses in this process)
+            chunk_size: Records per task (default: 64)
+
+        Yields:
+            Tuples of (entry dict, parse result)
+        """
+        if chunk_size < 1:
+            raise ValueError("reparse: chunk_size must be >= 1")
+
+        def chunks() -> Iterator[List[Dict[str, Any]]]:
+            chunk: List[Dict[str, Any]] = []
+            for entry in self.entries(function, since, until):
+                chunk.append(entry)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        if workers == 0:
+            for chunk in chunks():
+                results = _parse_chunk(parse, [self._location(entry) for entry in chunk])
+                yield from zip(chunk, results)
+            return
+
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending: Deque[Tuple[List[Dict[str, Any]], Future]] = deque()
+        limit = 2 * workers
+        try:
+            for chunk in chunks():
+                locations = [self._location(entry) for entry in chunk]
+                pending.append((chunk, executor.submit(_parse_chunk, parse, locations)))
+                if len(pending) >= limit:
+                    done, future = pending.popleft()
+                    yield from zip(done, future.result())
+            while pending:
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get archive statistics.
+
+        Returns:
+            Dict with ``responses``, ``segments``, ``raw_bytes``,
+            ``stored_bytes`` and ``ratio`` (raw / stored)
+        """
+        with self._lock:
+            responses, raw_bytes, stored_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM responses"
+            ).fetchone()
+        return {
+            "responses": responses,
+            "segments": len(self._segments()),
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the current segment and the index."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._db.close()
+
+    def __enter__(self) -> "ResponseArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,357 @@
+"""
+TecDoc Response Cache
+=====================
+
+Two-tier cache for raw SOAP responses of the TecDoc Web Service API.
+
+- Memory tier: LRU dict bounded by entry count
+- Disk tier: SQLite file bounded by total body size (least recently used
+  entries are evicted first)
+
+Entries are keyed on SOAP function, canonicalised parameters and the
+client's country/language. Each tier has its own TTL per SOAP function;
+functions without a TTL are not cached. The cache can be seeded from the
+reference data in ``data/`` so a client in offline mode can answer
+``getCountries``, ``getManufacturers`` and ``getBrands`` without network access.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reference data shipped next to this module
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# TTLs in seconds per SOAP function (0 or missing = not cached)
+DEFAULT_MEMORY_TTLS: Dict[str, float] = {
+    "getCountries": 24 * 3600,
+    "getManufacturers": 6 * 3600,
+    "getBrands": 6 * 3600,
+    "getArticles": 15 * 60,
+}
+DEFAULT_DISK_TTLS: Dict[str, float] = {
+    "getCountries": 30 * 24 * 3600,
+    "getManufacturers": 7 * 24 * 3600,
+    "getBrands": 7 * 24 * 3600,
+    "getArticles": 24 * 3600,
+}
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode when a response is not in the cache."""
+
+
+def make_cache_key(function: str, params: Dict[str, Any], country: str, lang: str) -> str:
+    """
+    Build a canonical cache key for a SOAP call.
+
+    Parameter order, ``None`` values and int/str spelling of values do not
+    change the key.
+
+    Args:
+        function: TecDoc function name
+        params: Function parameters
+        country: Client country code
+        lang: Client language code
+
+    Returns:
+        Hex digest identifying the call
+    """
+    canonical = json.dumps(
+        {
+            "function": function,
+            "params": {k: str(v) for k, v in params.items() if v is not None},
+            "country": country.lower(),
+            "lang": lang.lower(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Memory + disk cache for raw SOAP responses.
+
+    Thread-safe; one instance can be shared by several clients.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_entries: int = 512,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        memory_ttls: Optional[Dict[str, float]] = None,
+        disk_ttls: Optional[Dict[str, float]] = None
+    ) -> None:
+        """
+        Initialize response cache.
+
+        Args:
+            path: SQLite file for the disk tier (default: memory tier only)
+            memory_entries: Maximum number of responses kept in memory (default: 512)
+            max_disk_bytes: Maximum total body size on disk (default: 256 MiB)
+            memory_ttls: Memory TTL per SOAP function (default: DEFAULT_MEMORY_TTLS)
+            disk_ttls: Disk TTL per SOAP function (default: DEFAULT_DISK_TTLS)
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_ttls = dict(DEFAULT_MEMORY_TTLS if memory_ttls is None else memory_ttls)
+        self.disk_ttls = dict(DEFAULT_DISK_TTLS if disk_ttls is None else disk_ttls)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+
+        if path:
+            self._open_disk(path)
+
+    def _open_disk(self, path: str) -> None:
+        """Open (or create) the SQLite disk tier."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                function TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body TEXT NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._disk_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def get(self, function: str, key: str, allow_stale: bool = False) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            function: TecDoc function name (selects the TTLs)
+            key: Cache key from ``make_cache_key``
+            allow_stale: Return expired entries too (used in offline mode)
+
+        Returns:
+            Raw XML response or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, body = entry
+                if allow_stale or now - created < self.memory_ttls.get(function, 0):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return body
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, body FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    created, body = row
+                    if allow_stale or now - created < self.disk_ttls.get(function, 0):
+                        self._db.execute(
+                            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                        )
+                        self._remember(key, created, body)
+                        self.hits += 1
+                        return body
+
+            self.misses += 1
+            return None
+
+    def set(self, function: str, key: str, body: str, created: Optional[float] = None) -> None:
+        """
+        Store a response in all tiers that have a TTL for ``function``.
+
+        Args:
+            function: TecDoc function name
+            key: Cache key from ``make_cache_key``
+            body: Raw XML response
+            created: Entry timestamp (default: now)
+        """
+        created = time.time() if created is None else created
+        with self._lock:
+            if self.memory_ttls.get(function, 0) > 0:
+                self._remember(key, created, body)
+
+            if self._db is not None and self.disk_ttls.get(function, 0) > 0:
+                size = len(body)
+                old = self._db.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, function, created, accessed, size, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, function, created, time.time(), size, body),
+                )
+                self._disk_bytes += size - (old[0] if old else 0)
+                self._evict_disk()
+
+    def _remember(self, key: str, created: float, body: str) -> None:
+        """Insert into the memory LRU (lock must be held)."""
+        self._memory[key] = (created, body)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Drop least recently used disk entries until under the size limit (lock held)."""
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._disk_bytes -= size
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with hits, misses, hit ratio and tier sizes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _build_response(function: str, records: Iterable[Dict[str, Any]]) -> str:
+    """Build a SOAP response envelope around a list of flat records."""
+    # Imported here: saxutils pulls in urllib.request, which the cache itself never needs
+    from xml.sax.saxutils import escape, unescape
+
+    items = "".join(
+        "<array>"
+        + "".join(f"<{k}>{escape(unescape(str(v)))}</{k}>" for k, v in record.items())
+        + "</array>"
+        for record in records
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        f'<{function}Response xmlns="http://server.cat.tecdoc.net">'
+        f"<status>200</status><data>{items}</data>"
+        f"</{function}Response></soap:Body></soap:Envelope>"
+    )
+
+
+def seed_from_reference_data(
+    cache: ResponseCache,
+    data_dir: str = DATA_DIR,
+    country: str = "de",
+    lang: str = "de"
+) -> int:
+    """
+    Seed the cache with responses built from the JSON reference data.
+
+    Seeds ``getCountries`` (countries.json), ``getManufacturers`` for
+    passenger cars (manufacturers.json) and ``getBrands``
+    (datasuppliers.json). Entries are stored with the files' modification
+    time, so they may already be expired online but are always served in
+    offline mode.
+
+    Args:
+        cache: Cache to seed
+        data_dir: Directory containing the reference JSON files (default:
+            ``data/`` next to this module, whatever the working directory)
+        country: Country code the entries are stored for
+        lang: Language code the entries are stored for
+
+    Returns:
+        Number of seeded responses
+    """
+    seeded = 0
+
+    def load(name: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            logger.warning(f"Reference data not found: {path}")
+            return None, 0.0
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f), os.path.getmtime(path)
+
+    def store(function: str, params: Dict[str, Any], records: Iterable[Dict[str, Any]], mtime: float) -> None:
+        nonlocal seeded
+        key = make_cache_key(function, params, country, lang)
+        cache.set(function, key, _build_response(function, records), created=mtime)
+        seeded += 1
+
+    data, mtime = load("countries.json")
+    if data:
+        store("getCountries", {}, (
+            {"countryCode": c["code"], "countryName": c["name"]} for c in data["countries"]
+        ), mtime)
+
+    data, mtime = load("manufacturers.json")
+    if data:
+        store("getManufacturers", {"linkingTargetType": "p"}, (
+            {"manuId": m["id"], "manuName": m["name"]} for m in data["manufacturers"]["data"]
+        ), mtime)
+
+    data, mtime = load("datasuppliers.json")
+    if data:
+        store("getBrands", {}, (
+            {"dataSupplierId": s["id"], "mfrName": s["name"], "articleCount": s["articles"]}
+            for s in data["datasuppliers"]
+        ), mtime)
+
+    logger.info(f"Seeded {seeded} responses from {data_dir}")
+    return seeded
@@ -0,0 +1,142 @@
+"""
+TecDoc Request Coalescing
+=========================
+
+Single-flight execution for identical concurrent SOAP calls.
+
+While a call for a key is in flight, further callers with the same key do
+not start their own call; they wait for the first one ("leader") and
+receive its result or exception. Works for worker threads (``do``) and
+asyncio tasks (``do_async``); one instance may serve both.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Call:
+    """In-flight threaded call shared by a leader and its followers."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls.
+
+    Results are shared between all callers of one flight and must be
+    treated as read-only.
+
+    Counters:
+        calls: Flights started (an asyncio flight that runs a threaded call
+            through the same instance counts at both levels)
+        merged: Callers served by another caller's flight
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.merged = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run ``func`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the call
+            func: Function performing the call
+
+        Returns:
+            Result of the (possibly shared) call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        with self._lock:
+            call = self._flights.get(key)
+            leader = call is None
+            if leader:
+                call = self._flights[key] = _Call()
+                self.calls += 1
+            else:
+                self.merged += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            call.event.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``factory()`` unless a call with the same key is already in flight.
+
+        The shared call runs as its own task, so a cancelled caller does not
+        cancel the call for the others.
+
+        Args:
+            key: Identity of the call
+            factory: Function returning the awaitable performing the call
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        # Only asyncio callers pay for importing it (already loaded then)
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = asyncio.ensure_future(factory())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.calls += 1
+            else:
+                self.merged += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key: Tuple[int, Hashable]) -> None:
+        """Drop a finished asyncio flight."""
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dict with executed calls, merged callers, merge ratio and flights in progress
+        """
+        with self._lock:
+            callers = self.calls + self.merged
+            return {
+                "calls": self.calls,
+                "merged": self.merged,
+                "merge_ratio": self.merged / callers if callers else 0.0,
+                "in_flight": len(self._flights) + len(self._tasks),
+            }
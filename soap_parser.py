@@ -0,0 +1,529 @@
+"""
+TecDoc SOAP Response Parser
+===========================
+
+Single-pass record parser for TecDoc Web Service (Pegasus 3.0) responses.
+
+A record is the element that directly contains the record's key field
+(e.g. ``articleNumber``); its tag is detected from the first key field in
+the document, and records may nest elements of their own name (e.g. an
+inner ``<array>`` list). One compiled regex then matches whole record
+blocks and captures the wanted fields of each block in the same scan, so
+an optional element that is missing in one record can never shift values
+into a neighbouring record. For a page of flat records the scan runs
+entirely in the regex engine and costs about as much as the per-field
+``re.findall`` passes it replaced (see ``benchmarks/bench_parser.py``).
+
+Regions whose records nest their own tag, and requests for all leaf
+elements of a record (``fields=None``), go to a generic fallback that
+tracks the depth of same-named elements; leaves inside a nested
+same-named element are not part of the record.
+
+The clients parse the complete response text, which is also what gets
+cached and archived. Callers reading a body incrementally can feed it
+chunk by chunk instead; complete top-level records are emitted as soon as
+their closing tag has been seen.
+
+Entity and character references are decoded; empty elements are left out
+of the records; CDATA sections are not supported.
+"""
+
+import codecs
+import re
+from itertools import chain, repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, Union
+
+XmlSource = Union[str, bytes, Iterable[bytes]]
+
+# Fields shared by all clients
+ARTICLE_KEY = "articleNumber"
+BRAND_KEY = "dataSupplierId"
+COUNTRY_KEY = "countryCode"
+MANUFACTURER_KEY = "manuId"
+TOTAL_FIELDS = ("totalMatchingArticles", "totalCount")
+
+# Record fields extracted by default
+ARTICLE_FIELDS = ("articleNumber", "mfrId", "mfrName", "dataSupplierId")
+BRAND_FIELDS = ("dataSupplierId", "mfrId", "mfrName")
+COUNTRY_FIELDS = ("countryCode", "countryName")
+MANUFACTURER_FIELDS = ("manuId", "manuName")
+
+# Optional namespace prefix of a tag
+_PREFIX = r"(?:[\w.\-]+:)?"
+
+# Leaf element: (local name, text); self-closing elements have empty text
+_LEAF = re.compile(rf"<{_PREFIX}([\w.\-]+)(?:\s[^>]*?)?(?:/>|>([^<]*)</{_PREFIX}\1\s*>)")
+_TAG = re.compile(r"<(/?)([\w.\-:]+)[^>]*?(/?)>")
+_ENTITY = re.compile(r"&(#[0-9]+|#x[0-9a-fA-F]+|amp|lt|gt|quot|apos);")
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+_patterns: Dict[Tuple[str, ...], Pattern] = {}
+
+
+def _pattern(kind: str, name: str, fields: Tuple[str, ...] = (), prefix: str = "") -> Pattern:
+    """
+    Get (or compile) a pattern for an element name.
+
+    Kinds: "open" (opening tag, any prefix), "scalar" (leaf text, any
+    prefix), "tag" (opening, closing or self-closing tag, any prefix),
+    "attributes" (opening tag with attributes, literal tag ``name``) and
+    "record" (whole element with literal tag ``name``, capturing
+    ``fields`` with ``prefix``).
+    """
+    key = (kind, name, prefix) + fields
+    pattern = _patterns.get(key)
+    if pattern is None:
+        tag = re.escape(name)
+        if kind == "open":
+            source = rf"<{_PREFIX}{tag}(?:\s[^>]*)?>"
+        elif kind == "scalar":
+            source = rf"<{_PREFIX}{tag}(?:\s[^>]*)?>([^<]*)</"
+        elif kind == "tag":
+            source = rf"<(/?){_PREFIX}{tag}(?:\s[^>]*?)?(/?)>"
+        elif kind == "attributes":
+            source = rf"<{tag}\s[^>]*(?<!/)>"
+        else:
+            # Each tag inside the block matches exactly one branch (a wanted
+            # field, or any other tag plus text), so a block that does not
+            # match fails fast instead of backtracking. A field is captured
+            # at its first occurrence only (group already set: consume
+            # without capturing), like in the generic path
+            names = [re.escape(prefix + field) for field in fields]
+            wanted = "|".join(
+                rf"(?({i}){n}>[^<]*</{n}>|{n}>([^<]*)</{n}>)" for i, n in enumerate(names, 1)
+            )
+            excluded = "|".join([rf"/{tag}>"] + [rf"{n}>" for n in names])
+            source = rf"<{tag}(?:\s[^>]*)?>(?:<(?:{wanted}|(?!{excluded})[^>]*>[^<]*))*</{tag}>"
+        pattern = _patterns[key] = re.compile(source, re.DOTALL)
+    return pattern
+
+
+def _entity(match: "re.Match") -> str:
+    """Decode one entity or character reference."""
+    name = match.group(1)
+    if name[0] == "#":
+        return chr(int(name[2:], 16) if name[1] == "x" else int(name[1:]))
+    return _ENTITIES[name]
+
+
+def _unescape(text: str) -> str:
+    """Decode the entity and character references of element text."""
+    return _ENTITY.sub(_entity, text) if "&" in text else text
+
+
+def _find_open(text: str, name: str, end: Optional[int] = None) -> Optional["re.Match"]:
+    """Find the first opening tag of an element (any prefix) before ``end`` with a literal scan."""
+    if end is None:
+        end = len(text)
+    pattern = _pattern("open", name)
+    position = text.find(name, 0, end)
+    while position > 0:
+        start = text.rfind("<", 0, position)
+        if start >= 0:
+            match = pattern.match(text, start)
+            if match is not None:
+                return match
+        position = text.find(name, position + 1, end)
+    return None
+
+
+def _record(body: str, fields: Optional[Tuple[str, ...]]) -> Dict[str, str]:
+    """Collect the leaf elements of a record block (generic path)."""
+    record: Dict[str, str] = {}
+    for name, text in _LEAF.findall(body):
+        # Repeated names come from nested lists: the first occurrence wins
+        if text and name not in record and (fields is None or name in fields):
+            record[name] = _unescape(text)
+    return record
+
+
+class SoapRecordParser:
+    """
+    Incremental parser emitting per-record dicts (or tuples) in one pass.
+
+    Feed data with ``feed()``; each call returns the records completed by
+    that chunk. Scalar values (e.g. ``totalMatchingArticles``) found
+    outside of records, ahead of the next record, are collected in
+    ``scalars``.
+    """
+
+    def __init__(
+        self,
+        record_field: str,
+        scalar_fields: Sequence[str] = (),
+        fields: Optional[Sequence[str]] = None,
+        rows: bool = False
+    ) -> None:
+        """
+        Initialize record parser.
+
+        Args:
+            record_field: Leaf element that identifies a record (e.g. "articleNumber")
+            scalar_fields: Leaf elements to capture outside of records
+            fields: Leaf elements collected per record (default: all)
+            rows: Emit records as tuples of the ``fields`` values ("" for
+                missing fields) instead of dicts (default: False)
+        """
+        if rows and fields is None:
+            raise ValueError("SoapRecordParser: rows require fields")
+        self.record_field = record_field
+        self.scalar_fields = tuple(scalar_fields)
+        self.fields = tuple(fields) if fields is not None else None
+        self.rows = rows
+        self.scalars: Dict[str, str] = {}
+
+        self._buffer = ""
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._record_tag: Optional[str] = None
+        self._record_pattern: Optional[Pattern] = None
+        self._opening = ""
+        self._closing = ""
+
+    def feed(self, data: Union[str, bytes]) -> List[Dict[str, str]]:
+        """
+        Feed a chunk of the response.
+
+        Args:
+            data: Next chunk of the XML document
+
+        Returns:
+            Records completed by this chunk
+        """
+        if isinstance(data, bytes):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8")()
+            data = self._decoder.decode(data)
+        self._buffer = self._buffer + data if self._buffer else data
+        return self._drain()
+
+    def close(self) -> List[Dict[str, str]]:
+        """
+        Signal the end of the document.
+
+        Returns:
+            Records completed by the remaining buffered data (an incomplete
+            record at the end of a truncated document is dropped)
+        """
+        if self._decoder is not None:
+            self._buffer += self._decoder.decode(b"", final=True)
+        records = self._drain()
+        self._buffer = ""
+        return records
+
+    def _find_record_tag(self) -> bool:
+        """Detect the record element (the parent of the first key field) and compile its patterns."""
+        buffer = self._buffer
+        key = _find_open(buffer, self.record_field)
+        if key is None:
+            return False
+        parent = self._open_parent(buffer, key.start())
+        if parent is None:
+            return False
+        # A key inside a nested element of the record's own name (e.g. an
+        # inner <array>) belongs to that element: the record is the outermost
+        # of the directly nested same-named elements
+        while True:
+            outer = self._open_parent(buffer, parent.start())
+            if outer is None or outer.group(2) != parent.group(2):
+                break
+            parent = outer
+
+        tag = parent.group(2)
+        self._record_tag = tag
+        self._closing = f"</{tag}>"
+        self._opening = f"<{tag}>"
+        if self.fields is not None:
+            qualified = _TAG.match(buffer, key.start()).group(2)
+            prefix = qualified[:-len(self.record_field)]
+            self._record_pattern = _pattern("record", tag, self.fields, prefix)
+        return True
+
+    @staticmethod
+    def _open_parent(buffer: str, position: int) -> Optional["re.Match"]:
+        """Walk back from a tag over its closed siblings to the open parent element."""
+        depth = 0
+        while position > 0:
+            position = buffer.rfind("<", 0, position)
+            match = _TAG.match(buffer, position) if position >= 0 else None
+            if match is None or match.group(3):
+                # Declarations, comments and self-closing siblings
+                continue
+            if match.group(1):
+                depth += 1
+            elif depth:
+                depth -= 1
+            else:
+                return match
+        return None
+
+    def _opens(self, text: str, end: int) -> int:
+        """Count the opening record tags in ``text[:end]``."""
+        count = text.count(self._opening, 0, end)
+        if text.find(self._opening[:-1] + " ", 0, end) >= 0:
+            # Opening tags with attributes (self-closing ones excluded)
+            count += len(_pattern("attributes", self._record_tag).findall(text, 0, end))
+        return count
+
+    def _drain(self) -> List[Dict[str, str]]:
+        """Capture scalars and cut the complete records off the buffer."""
+        buffer = self._buffer
+        if self._record_tag is None:
+            self._find_record_tag()
+
+        # Scalars live outside of records: search up to the first record
+        limit = len(buffer)
+        if self._record_tag is not None:
+            for opening in (self._opening, self._opening[:-1] + " "):
+                position = buffer.find(opening, 0, limit)
+                if position >= 0:
+                    limit = position
+        for name in self.scalar_fields:
+            if name not in self.scalars:
+                tag = _find_open(buffer, name, limit)
+                match = tag and _pattern("scalar", name).match(buffer, tag.start())
+                if match:
+                    self.scalars[name] = _unescape(match.group(1))
+
+        if self._record_tag is None:
+            return []
+        closing = self._closing
+        end = buffer.rfind(closing)
+        if end < 0:
+            return []
+
+        if self.fields is not None:
+            # Matches are disjoint and each starts at a record tag, so when
+            # every record tag starts a match, no record nests another and
+            # the region ends with a top-level record
+            region = buffer[:end + len(closing)]
+            rows = self._record_pattern.findall(region)
+            if len(rows) == region.count(self._opening[:-1]):
+                self._buffer = buffer[len(region):]
+                return self._rows(rows, region)
+
+        # The buffer starts outside of any record, so a closing tag ends a
+        # top-level record only where as many record tags were opened as
+        # closed; closing tags of nested same-named elements are skipped
+        while end >= 0:
+            closes = buffer.count(closing, 0, end) + 1
+            if self._opens(buffer, end) == closes:
+                break
+            end = buffer.rfind(closing, 0, end)
+        if end < 0:
+            return []
+        end += len(closing)
+        self._buffer = buffer[end:]
+        return self._records(buffer[:end], closes)
+
+    def _records(self, region: str, closes: int) -> List[Dict[str, str]]:
+        """Parse the records of a buffer region that ends with a top-level record."""
+        if self.fields is not None:
+            # Each match takes one closing tag; a record nesting its own tag
+            # leaves closing tags unmatched and goes to the generic path
+            rows = self._record_pattern.findall(region)
+            if len(rows) == closes:
+                return self._rows(rows, region)
+        records = self._generic_records(region)
+        if self.rows:
+            return [tuple(record.get(f, "") for f in self.fields) for record in records]
+        return records
+
+    def _rows(self, rows: List[Any], region: str) -> List[Any]:
+        """Convert the record regex matches of a region to rows or dicts."""
+        fields = self.fields
+        if len(fields) == 1:
+            rows = [(row,) for row in rows]
+        if "&" in region:
+            rows = [tuple(map(_unescape, row)) for row in rows]
+        if self.rows:
+            return rows
+        if "" not in chain.from_iterable(rows):
+            return list(map(dict, map(zip, repeat(fields), rows)))
+        return [{f: v for f, v in zip(fields, row) if v} for row in rows]
+
+    def _generic_records(self, region: str) -> List[Dict[str, str]]:
+        """
+        Parse records by tracking the depth of same-named elements.
+
+        Elements nested inside an inner element of the record's own name
+        belong to that inner element and are left out of the record.
+        """
+        local = self._record_tag.rpartition(":")[2]
+        records = []
+        parts: List[str] = []
+        segment = 0
+        depth = 0
+        for match in _pattern("tag", local).finditer(region):
+            closing, self_closing = match.groups()
+            if self_closing:
+                continue
+            if not closing:
+                depth += 1
+                if depth == 1:
+                    parts = []
+                    segment = match.end()
+                elif depth == 2:
+                    parts.append(region[segment:match.start()])
+            elif depth:
+                depth -= 1
+                if depth == 1:
+                    segment = match.end()
+                elif depth == 0:
+                    parts.append(region[segment:match.start()])
+                    body = "".join(parts)
+                    if self.record_field in body:
+                        records.append(_record(body, self.fields))
+        return records
+
+
+def iter_records(
+    source: XmlSource,
+    record_field: str,
+    scalar_fields: Sequence[str] = (),
+    scalars: Optional[Dict[str, str]] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield records from a response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks,
+            e.g. ``response.iter_content(65536)``
+        record_field: Leaf element that identifies a record
+        scalar_fields: Leaf elements to capture outside of records
+        scalars: Optional dict that receives captured scalar values
+        fields: Leaf elements collected per record (default: all)
+
+    Yields:
+        One dict of leaf element values per record
+    """
+    parser = SoapRecordParser(record_field, scalar_fields, fields)
+    chunks = (source,) if isinstance(source, (str, bytes)) else source
+
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+    if scalars is not None:
+        scalars.update(parser.scalars)
+
+
+def parse_records(
+    source: XmlSource,
+    record_field: str,
+    scalar_fields: Sequence[str] = (),
+    fields: Optional[Sequence[str]] = None,
+    rows: bool = False
+) -> Tuple[List[Any], Dict[str, str]]:
+    """
+    Parse all records and scalar values of a response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+        record_field: Leaf element that identifies a record
+        scalar_fields: Leaf elements to capture outside of records
+        fields: Leaf elements collected per record (default: all)
+        rows: Return records as tuples of the ``fields`` values (default: False)
+
+    Returns:
+        Tuple of (records, scalars)
+    """
+    parser = SoapRecordParser(record_field, scalar_fields, fields, rows)
+    if isinstance(source, (str, bytes)):
+        records = parser.feed(source)
+    else:
+        records = []
+        for chunk in source:
+            records += parser.feed(chunk)
+    records += parser.close()
+    return records, parser.scalars
+
+
+def parse_countries(
+    source: XmlSource,
+    fields: Optional[Sequence[str]] = COUNTRY_FIELDS
+) -> List[Dict[str, str]]:
+    """
+    Parse a ``getCountries`` response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+        fields: Record fields to collect (default: COUNTRY_FIELDS, None for all)
+
+    Returns:
+        List of raw country records (countryCode, countryName)
+    """
+    return parse_records(source, COUNTRY_KEY, fields=fields)[0]
+
+
+def parse_manufacturers(
+    source: XmlSource,
+    fields: Optional[Sequence[str]] = MANUFACTURER_FIELDS
+) -> List[Dict[str, str]]:
+    """
+    Parse a ``getManufacturers`` response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+        fields: Record fields to collect (default: MANUFACTURER_FIELDS, None for all)
+
+    Returns:
+        List of raw manufacturer records (manuId, manuName)
+    """
+    return parse_records(source, MANUFACTURER_KEY, fields=fields)[0]
+
+
+def parse_brands(
+    source: XmlSource,
+    fields: Optional[Sequence[str]] = BRAND_FIELDS
+) -> List[Dict[str, str]]:
+    """
+    Parse a ``getBrands`` response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+        fields: Record fields to collect (default: BRAND_FIELDS, None for all)
+
+    Returns:
+        List of raw brand records (dataSupplierId, mfrId, mfrName)
+    """
+    return parse_records(source, BRAND_KEY, fields=fields)[0]
+
+
+def parse_articles(
+    source: XmlSource,
+    fields: Optional[Sequence[str]] = ARTICLE_FIELDS
+) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    Parse a ``getArticles`` response.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+        fields: Record fields to collect (default: ARTICLE_FIELDS, None for all)
+
+    Returns:
+        Tuple of (total matching articles, raw article records with
+        articleNumber, mfrId, mfrName, dataSupplierId)
+    """
+    records, scalars = parse_records(source, ARTICLE_KEY, TOTAL_FIELDS, fields)
+    return _total(scalars), records
+
+
+def parse_article_rows(source: XmlSource) -> Tuple[int, List[Tuple[str, str, str, str]]]:
+    """
+    Parse a ``getArticles`` response into tuples, skipping the per-record dicts.
+
+    Args:
+        source: Complete XML (str/bytes) or an iterable of byte chunks
+
+    Returns:
+        Tuple of (total matching articles, (articleNumber, mfrId, mfrName,
+        dataSupplierId) tuples with "" for missing values)
+    """
+    rows, scalars = parse_records(source, ARTICLE_KEY, TOTAL_FIELDS, ARTICLE_FIELDS, rows=True)
+    return _total(scalars), rows
+
+
+def _total(scalars: Dict[str, str]) -> int:
+    """Get the total matching articles of a getArticles response."""
+    return int(next((scalars[name] for name in TOTAL_FIELDS if scalars.get(name)), "0"))
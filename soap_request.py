@@ -0,0 +1,178 @@
+"""
+TecDoc SOAP Request Builder
+===========================
+
+Encodes SOAP request envelopes for the TecDoc Web Service (Pegasus 3.0).
+
+The envelope head (XML declaration, envelope, function element and the
+provider/country/lang elements) and tail are encoded once per function
+and cached as bytes; each request only encodes its parameters.
+
+Parameter values are XML-escaped. Besides scalars, params may hold:
+- lists/tuples/sets: one element per value
+  (``{"dataSupplierIds": [30, 101]}`` -> ``<dataSupplierIds>30</dataSupplierIds><dataSupplierIds>101</dataSupplierIds>``)
+- dicts: nested elements
+  (``{"searchQuery": {"text": "HU 816 x", "type": 0}}`` -> ``<searchQuery><text>HU 816 x</text><type>0</type></searchQuery>``)
+
+``None`` values (also inside lists and dicts) are omitted, booleans are
+written as ``true``/``false``.
+
+``split_records`` distributes the records of a batched response (e.g. one
+getArticles call for several DataSuppliers) back to the requested keys.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+SOAP_NAMESPACE = "http://schemas.xmlsoap.org/soap/envelope/"
+TECDOC_NAMESPACE = "http://server.cat.tecdoc.net"
+
+_ELEMENT_NAME = re.compile(r"[A-Za-z_][\w.\-]*\Z")
+
+
+@lru_cache(maxsize=1024)
+def _tags(name: str) -> Tuple[bytes, bytes]:
+    """Get the encoded opening and closing tag of a parameter element."""
+    if not _ELEMENT_NAME.match(name):
+        raise ValueError(f"encode_params: invalid parameter name {name!r}")
+    return f"<{name}>".encode("ascii"), f"</{name}>".encode("ascii")
+
+
+def _text(value: Any) -> bytes:
+    """Encode a scalar parameter value as escaped element text."""
+    if isinstance(value, bool):
+        return b"true" if value else b"false"
+    # Same escaping as xml.sax.saxutils.escape, without importing it (and urllib.request)
+    text = str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text.encode("utf-8")
+
+
+def _encode(name: str, value: Any, parts: List[bytes]) -> None:
+    """Append the element(s) of one parameter to ``parts``."""
+    if value is None:
+        return
+    if isinstance(value, (list, tuple, set, frozenset)):
+        values = sorted(value) if isinstance(value, (set, frozenset)) else value
+        for item in values:
+            _encode(name, item, parts)
+        return
+
+    opening, closing = _tags(name)
+    parts.append(opening)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _encode(key, item, parts)
+    else:
+        parts.append(_text(value))
+    parts.append(closing)
+
+
+def encode_params(params: Dict[str, Any]) -> bytes:
+    """
+    Encode function parameters as XML elements.
+
+    Args:
+        params: Function parameters (scalars, lists, sets, dicts)
+
+    Returns:
+        UTF-8 encoded parameter elements
+
+    Raises:
+        ValueError: If a parameter name is not a valid XML element name
+    """
+    parts: List[bytes] = []
+    for name, value in params.items():
+        _encode(name, value, parts)
+    return b"".join(parts)
+
+
+class SoapRequestBuilder:
+    """
+    Builds request envelopes for one provider, country and language.
+
+    Thread-safe.
+    """
+
+    def __init__(self, provider_id: int, country: str, lang: str) -> None:
+        """
+        Initialize request builder.
+
+        Args:
+            provider_id: TecDoc provider ID
+            country: Country code
+            lang: Language code
+        """
+        self.provider_id = provider_id
+        self.country = country
+        self.lang = lang
+
+        self._templates: Dict[str, Tuple[bytes, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _template(self, function: str) -> Tuple[bytes, bytes]:
+        """Get (or encode) the envelope head and tail of a function."""
+        template = self._templates.get(function)
+        if template is None:
+            if not _ELEMENT_NAME.match(function):
+                raise ValueError(f"SoapRequestBuilder: invalid function name {function!r}")
+            head = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<soap:Envelope xmlns:soap="{SOAP_NAMESPACE}"><soap:Body>'
+                f'<{function} xmlns="{TECDOC_NAMESPACE}">'
+            ).encode("utf-8") + encode_params(
+                {"provider": self.provider_id, "country": self.country, "lang": self.lang}
+            )
+            tail = f"</{function}></soap:Body></soap:Envelope>".encode("utf-8")
+            with self._lock:
+                template = self._templates.setdefault(function, (head, tail))
+        return template
+
+    def build(self, function: str, params: Dict[str, Any]) -> bytes:
+        """
+        Build a SOAP request body.
+
+        Args:
+            function: TecDoc function name (e.g., "getArticles")
+            params: Function parameters
+
+        Returns:
+            UTF-8 encoded SOAP envelope
+
+        Raises:
+            ValueError: If the function or a parameter name is not a valid
+                XML element name
+        """
+        head, tail = self._template(function)
+        return head + encode_params(params) + tail
+
+
+def split_records(
+    records: Iterable[Dict[str, Any]],
+    field: str,
+    keys: Sequence[Hashable]
+) -> Dict[Hashable, List[Dict[str, Any]]]:
+    """
+    Distribute the records of a batched response to the requested keys.
+
+    Values are compared by their string form, so int keys match the string
+    values of parsed records. Records of keys that were not requested are
+    dropped.
+
+    Args:
+        records: Records of the combined response(s)
+        field: Record field holding the batched value (e.g. "data_supplier_id")
+        keys: Values that were packed into the request
+
+    Returns:
+        Dict of key -> records, in response order; every requested key is
+        present, with an empty list if it had no records
+    """
+    result: Dict[Hashable, List[Dict[str, Any]]] = {key: [] for key in keys}
+    by_text = {str(key): result[key] for key in keys}
+    for record in records:
+        bucket = by_text.get(str(record.get(field)))
+        if bucket is not None:
+            bucket.append(record)
+    return result
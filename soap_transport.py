@@ -0,0 +1,223 @@
+"""
+TecDoc SOAP Transport
+=====================
+
+HTTP transport layer for the TecDoc Web Service API (Pegasus 3.0).
+
+The clients never call ``requests.post`` directly; they hand the SOAP
+envelope to a transport object. The default transport keeps a pooled
+``requests.Session`` so consecutive calls reuse the same TCP/TLS
+connection instead of paying a fresh handshake per page.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent in connect() (TCP + TLS) by the current thread's last request
+_connect_time = threading.local()
+
+
+class _ConnectTimer:
+    """Connection mixin adding the duration of ``connect()`` to ``_connect_time``."""
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnection(_ConnectTimer, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_ConnectTimer, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections record their connect time."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class SoapTransport:
+    """
+    Base class for SOAP transports.
+
+    A transport sends one POST request and returns the ``requests.Response``.
+    Subclasses must implement ``post`` and may override ``close``.
+    """
+
+    def post(
+        self,
+        url: str,
+        data: bytes,
+        headers: Dict[str, str],
+        timeout: float
+    ) -> requests.Response:
+        """
+        Send a POST request.
+
+        Args:
+            url: Endpoint URL
+            data: Encoded request body
+            headers: Request headers
+            timeout: Request timeout in seconds
+
+        Returns:
+            HTTP response
+
+        Raises:
+            requests.RequestException: On network errors
+        """
+        raise NotImplementedError
+
+    @property
+    def connect_time(self) -> float:
+        """Seconds the calling thread's last ``post`` spent connecting (0 if unknown)."""
+        return 0.0
+
+    def close(self) -> None:
+        """Release all resources held by the transport."""
+
+    def __enter__(self) -> "SoapTransport":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class PooledSessionTransport(SoapTransport):
+    """
+    Keep-alive transport backed by a pooled ``requests.Session``.
+
+    The underlying urllib3 connection pool is thread-safe, so one instance
+    can be shared by all worker threads of a client. With ``pool_block``
+    enabled, ``pool_maxsize`` is a hard per-host connection limit and
+    additional threads wait for a free connection.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = True,
+        keep_alive: bool = True,
+        gzip: bool = True
+    ) -> None:
+        """
+        Initialize pooled transport.
+
+        Args:
+            pool_connections: Number of per-host pools to cache (default: 4)
+            pool_maxsize: Maximum connections kept per host (default: 16)
+            pool_block: Block when the per-host pool is exhausted instead of
+                opening extra throw-away connections (default: True)
+            keep_alive: Reuse connections between requests (default: True)
+            gzip: Advertise gzip/deflate response compression (default: True)
+        """
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError("PooledSessionTransport: pool sizes must be >= 1")
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.gzip = gzip
+
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _build_session(self) -> requests.Session:
+        """Create the pooled session with the configured adapter and headers."""
+        session = requests.Session()
+        adapter = _TimedHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        session.headers["Connection"] = "keep-alive" if self.keep_alive else "close"
+        session.headers["Accept-Encoding"] = "gzip, deflate" if self.gzip else "identity"
+
+        logger.debug(
+            f"Pooled session created (pool_connections={self.pool_connections}, "
+            f"pool_maxsize={self.pool_maxsize}, block={self.pool_block})"
+        )
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        """Lazily created shared session."""
+        if self._session is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("PooledSessionTransport: transport is closed")
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def post(
+        self,
+        url: str,
+        data: bytes,
+        headers: Dict[str, str],
+        timeout: float
+    ) -> requests.Response:
+        """
+        Send a POST request over a pooled connection.
+
+        Args:
+            url: Endpoint URL
+            data: Encoded request body
+            headers: Request headers (merged over the session defaults)
+            timeout: Request timeout in seconds
+
+        Returns:
+            HTTP response
+
+        Raises:
+            requests.RequestException: On network errors
+        """
+        _connect_time.seconds = 0.0
+        return self.session.post(url, data=data, headers=headers, timeout=timeout)
+
+    @property
+    def connect_time(self) -> float:
+        """Seconds the calling thread's last ``post`` spent in TCP/TLS connect."""
+        return getattr(_connect_time, "seconds", 0.0)
+
+    def close(self) -> None:
+        """Close all pooled connections. Further calls to ``post`` fail."""
+        with self._lock:
+            self._closed = True
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+            logger.debug("Pooled session closed")
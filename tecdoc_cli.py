@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+TecDoc Command-Line Interface
+=============================
+
+Batch execution of TecDoc queries from JSONL, for shell pipelines and cron jobs.
+
+Every input line is one query::
+
+    {"function": "getArticles", "params": {"dataSupplierIds": 30, "pageNumber": 2}}
+    {"id": "bmw", "function": "getManufacturers", "params": {"linkingTargetType": "p"}}
+
+Queries run concurrently; one JSON result line per query is written to
+stdout in input order, as soon as it and all queries before it are done::
+
+    {"index": 0, "function": "getArticles", "result": {"total": 139899, "articles": [...]}}
+    {"index": 1, "id": "bmw", "function": "getManufacturers", "error": "HTTPError: ..."}
+
+Results are the parsed SOAP records (``soap_parser``); functions without
+a parser return the raw XML. ``getArticles`` params default to
+``articleCountry`` = ``--country``, ``pageSize`` 100 and ``pageNumber`` 0,
+like ``TecDocClient.get_articles``, so both share cache entries.
+
+Imports are deferred: answers found in the ``--cache`` never load
+``requests`` or the client, so cached and ``--offline`` runs start in a
+few tens of milliseconds.
+
+Usage:
+    tecdoc_cli.py run queries.jsonl --cache .cache/tecdoc.sqlite --workers 8
+    cat queries.jsonl | tecdoc_cli.py run --cache .cache/tecdoc.sqlite --offline
+    tecdoc_cli.py query getArticles dataSupplierIds=30 pageNumber=1
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Parser (soap_parser function name) per SOAP function
+PARSERS = {
+    "getArticles": "parse_articles",
+    "getBrands": "parse_brands",
+    "getCountries": "parse_countries",
+    "getManufacturers": "parse_manufacturers",
+}
+
+
+class QueryRunner:
+    """
+    Executes queries, answering from the cache first and creating the
+    TecDoc client only on the first cache miss.
+
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        offline: bool = False,
+        country: Optional[str] = None,
+        lang: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        timeout: int = 30
+    ) -> None:
+        """
+        Initialize query runner.
+
+        Args:
+            cache_path: SQLite response cache (default: none)
+            offline: Answer only from the cache (default: False)
+            country: Country code (default: from TEC_COUNTRY env or "de")
+            lang: Language code (default: from TEC_LANG env or "de")
+            endpoint: SOAP endpoint URL (default: from TEC_ENDPOINT env)
+            timeout: Request timeout in seconds (default: 30)
+        """
+        if offline and not cache_path:
+            raise ValueError("QueryRunner: offline mode requires a cache")
+
+        self.offline = offline
+        self.country = (country or os.getenv("TEC_COUNTRY", "de")).lower()
+        self.lang = (lang or os.getenv("TEC_LANG", "de")).lower()
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+        self.cache = None
+        if cache_path:
+            from response_cache import ResponseCache
+            self.cache = ResponseCache(path=cache_path)
+
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        """Lazily created ``TecDocClient`` sharing the runner's cache."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from core_tecdoc_client import TecDocClient
+                    self._client = TecDocClient(
+                        country=self.country,
+                        lang=self.lang,
+                        timeout=self.timeout,
+                        cache=self.cache,
+                        offline=self.offline,
+                        endpoint=self.endpoint,
+                    )
+        return self._client
+
+    def _params(self, function: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the ``get_articles`` defaults to getArticles params."""
+        if function != "getArticles":
+            return params
+        return {"articleCountry": self.country, "pageSize": 100, "pageNumber": 0, **params}
+
+    def _fetch(self, function: str, params: Dict[str, Any]) -> str:
+        """Get the raw XML response, from the cache if possible."""
+        if self.cache is not None:
+            from response_cache import CacheMissError, make_cache_key
+            key = make_cache_key(function, params, self.country, self.lang)
+            cached = self.cache.get(function, key, allow_stale=self.offline)
+            if cached is not None:
+                return cached
+            if self.offline:
+                raise CacheMissError(f"TecDoc offline mode: {function} response not cached")
+            # Already missed the cache here: don't let the client look it up again
+            return self.client.get_raw_response(function, params, fresh=True)
+        return self.client.get_raw_response(function, params)
+
+    def execute(self, query: Dict[str, Any]) -> Any:
+        """
+        Execute one query.
+
+        Args:
+            query: Dict with ``function`` and optional ``params``
+
+        Returns:
+            Parsed records (``{"total", "articles"}`` for getArticles) or
+            the raw XML for functions without a parser
+
+        Raises:
+            ValueError: If the query is malformed
+        """
+        function = query.get("function")
+        params = query.get("params") or {}
+        if not isinstance(function, str) or not isinstance(params, dict):
+            raise ValueError("execute: query needs a 'function' string and a 'params' object")
+
+        xml_response = self._fetch(function, self._params(function, params))
+        parser = PARSERS.get(function)
+        if parser is None:
+            return xml_response
+
+        import soap_parser
+        result = getattr(soap_parser, parser)(xml_response)
+        if function == "getArticles":
+            total, articles = result
+            return {"total": total, "articles": articles}
+        return result
+
+    def close(self) -> None:
+        """Close the client and the cache."""
+        if self._client is not None:
+            self._client.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def run_queries(
+    runner: QueryRunner,
+    lines: Iterable[str],
+    output: TextIO,
+    workers: int = 8
+) -> int:
+    """
+    Execute JSONL queries concurrently, writing results in input order.
+
+    At most ``4 * workers`` queries are read ahead, so unbounded input
+    streams run in constant memory.
+
+    Args:
+        runner: Query runner
+        lines: JSONL query lines (blank lines are skipped)
+        output: Stream receiving one JSON result line per query
+        workers: Queries executed at once (default: 8)
+
+    Returns:
+        Number of failed queries
+    """
+    if workers < 1:
+        raise ValueError("run_queries: workers must be >= 1")
+
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    def execute(index: int, line: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index}
+        try:
+            query = json.loads(line)
+            if not isinstance(query, dict):
+                raise ValueError("query must be a JSON object")
+            if "id" in query:
+                result["id"] = query["id"]
+            result["function"] = query.get("function")
+            result["result"] = runner.execute(query)
+        except Exception as exc:
+            result["error"] = f"{exc.__class__.__name__}: {exc}"
+        return result
+
+    def write(future: Future) -> bool:
+        result = future.result()
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        return "error" not in result
+
+    failed = 0
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tecdoc-cli") as executor:
+        for index, line in enumerate(_query_lines(lines)):
+            pending.append(executor.submit(execute, index, line))
+            while pending and (pending[0].done() or len(pending) >= 4 * workers):
+                failed += not write(pending.popleft())
+        while pending:
+            failed += not write(pending.popleft())
+    return failed
+
+
+def _query_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Skip blank lines."""
+    for line in lines:
+        if line.strip():
+            yield line
+
+
+def _parse_value(value: str) -> Any:
+    """Parse a ``key=value`` argument value as JSON, falling back to a string."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(prog="tecdoc", description="Run TecDoc queries from the shell.")
+    parser.add_argument("--cache", help="SQLite response cache file")
+    parser.add_argument("--offline", action="store_true", help="answer only from the cache")
+    parser.add_argument("--country", help="country code (default: TEC_COUNTRY or de)")
+    parser.add_argument("--lang", help="language code (default: TEC_LANG or de)")
+    parser.add_argument("--endpoint", help="SOAP endpoint URL (default: TEC_ENDPOINT)")
+    parser.add_argument("--timeout", type=int, default=30, help="request timeout in seconds")
+    parser.add_argument("--log-level", default="WARNING", help="log level on stderr (default: WARNING)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="execute a JSONL query file or stdin")
+    run.add_argument("file", nargs="?", default="-", help="JSONL file (default: stdin)")
+    run.add_argument("--workers", type=int, default=8, help="queries executed at once (default: 8)")
+
+    query = commands.add_parser("query", help="execute one query")
+    query.add_argument("function", help="SOAP function, e.g. getArticles")
+    query.add_argument("params", nargs="*", metavar="key=value", help="function parameters")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line interface.
+
+    Args:
+        argv: Arguments (default: ``sys.argv[1:]``)
+
+    Returns:
+        Exit status: 0 if all queries succeeded, 1 if any failed, 2 on usage errors
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        stream=sys.stderr,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    try:
+        runner = QueryRunner(
+            cache_path=args.cache,
+            offline=args.offline,
+            country=args.country,
+            lang=args.lang,
+            endpoint=args.endpoint,
+            timeout=args.timeout,
+        )
+    except ValueError as exc:
+        print(f"tecdoc: {exc}", file=sys.stderr)
+        return 2
+
+    try:
+        if args.command == "query":
+            params = {}
+            for pair in args.params:
+                key, sep, value = pair.partition("=")
+                if not sep:
+                    print(f"tecdoc: parameter {pair!r} is not key=value", file=sys.stderr)
+                    return 2
+                params[key] = _parse_value(value)
+            lines = [json.dumps({"function": args.function, "params": params})]
+            failed = run_queries(runner, lines, sys.stdout, workers=1)
+        elif args.file == "-":
+            failed = run_queries(runner, sys.stdin, sys.stdout, workers=args.workers)
+        else:
+            with open(args.file, "r", encoding="utf-8") as f:
+                failed = run_queries(runner, f, sys.stdout, workers=args.workers)
+    finally:
+        runner.close()
+
+    if failed:
+        logger.warning(f"{failed} queries failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
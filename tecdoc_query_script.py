@@ -8,16 +8,34 @@ API Endpoint: https://webservice.tecalliance.services/pegasus-3-0/services/Tecdo
 Land: DE (Deutschland)
 """
 
-import requests
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional
 import json
+import logging
+
+from reference_registry import ReferenceRegistry
+from soap_parser import parse_articles, parse_countries, parse_manufacturers
+from soap_request import SoapRequestBuilder
+
+if TYPE_CHECKING:
+    from soap_transport import SoapTransport
+    from throttle import Throttle
+
+logger = logging.getLogger(__name__)
 
 
 class TecDocAPI:
     """TecDoc SOAP API Client - Nur funktionierende Funktionen"""
     
-    def __init__(self, provider_id: str, api_key: str, country: str = "de", language: str = "de"):
+    def __init__(
+        self,
+        provider_id: str,
+        api_key: str,
+        country: str = "de",
+        language: str = "de",
+        transport: Optional["SoapTransport"] = None,
+        timeout: float = 30,
+        throttle: Optional["Throttle"] = None
+    ):
         self.provider_id = provider_id
         self.api_key = api_key
         self.country = country
@@ -27,27 +45,43 @@ class TecDocAPI:
             "Content-Type": "text/xml; charset=UTF-8",
             "X-Api-Key": api_key
         }
+        # Envelope-Vorlage je Funktion, Parameterwerte werden XML-escaped
+        self.request_builder = SoapRequestBuilder(provider_id, country, language)
+        # Gepoolte Keep-Alive-Verbindung, wird von close() geschlossen
+        # (requests wird erst hier geladen)
+        self._owns_transport = transport is None
+        if transport is None:
+            from soap_transport import PooledSessionTransport
+            transport = PooledSessionTransport()
+        self.transport = transport
+        # Gemeinsames Rate-Limit, AIMD-Parallelität und Retries (429/5xx/Timeouts)
+        self.timeout = timeout
+        if throttle is None:
+            from throttle import Throttle
+            throttle = Throttle()
+        self.throttle = throttle
+    
+    def close(self) -> None:
+        """HTTP-Verbindungen schließen (nur eigener Transport)"""
+        if self._owns_transport:
+            self.transport.close()
+    
+    def __enter__(self) -> "TecDocAPI":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
     
     def _call_soap(self, function_name: str, parameters: Dict) -> str:
-        """Generische SOAP-Anfrage"""
-        # Parameter als XML-Elemente aufbauen
-        param_xml = ""
-        for key, value in parameters.items():
-            param_xml += f"<{key}>{value}</{key}>"
-        
-        soap_body = f"""<?xml version="1.0" encoding="UTF-8"?>
-<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
-    <soap:Body>
-        <{function_name} xmlns="http://server.cat.tecdoc.net">
-            <provider>{self.provider_id}</provider>
-            <country>{self.country}</country>
-            <lang>{self.language}</lang>
-            {param_xml}
-        </{function_name}>
-    </soap:Body>
-</soap:Envelope>"""
+        """Generische SOAP-Anfrage; HTTP-Fehler (nach allen Retries) lösen requests.HTTPError aus"""
+        soap_body = self.request_builder.build(function_name, parameters)
         
-        response = requests.post(self.endpoint, data=soap_body, headers=self.headers)
+        response = self.throttle.run(lambda: self.transport.post(
+            self.endpoint, data=soap_body, headers=self.headers, timeout=self.timeout
+        ))
+        if not response.ok:
+            logger.error(f"TecDoc API Error: HTTP {response.status_code} - {response.text[:500]}")
+            response.raise_for_status()
         return response.text
     
     # ===== FUNKTIONIERENDE FUNKTIONEN =====
@@ -59,17 +93,11 @@ class TecDocAPI:
         """
         xml_response = self._call_soap("getCountries", {})
         
-        # XML parsen
-        root = ET.fromstring(xml_response)
-        countries = []
-        
-        # Parse with regex for simplicity
-        import re
-        countries_data = re.findall(r'<countryCode>([^<]+)</countryCode>\s*<countryName>([^<]+)</countryName>', xml_response)
-        for code, name in countries_data:
-            countries.append({"code": code, "name": name})
-        
-        return countries
+        # XML in einem Durchlauf parsen
+        return [
+            {"code": record["countryCode"], "name": record.get("countryName", "")}
+            for record in parse_countries(xml_response)
+        ]
     
     def get_manufacturers(self, linking_target_type: str = "p") -> List[Dict]:
         """
@@ -86,17 +114,11 @@ class TecDocAPI:
             "linkingTargetType": linking_target_type
         })
         
-        # XML parsen
-        root = ET.fromstring(xml_response)
-        manufacturers = []
-        
-        # Parse with regex - element names are manuId/manuName, not mfrId/mfrName
-        import re
-        mfr_data = re.findall(r'<manuId>(\d+)</manuId>\s*<manuName>([^<]+)</manuName>', xml_response)
-        for mfr_id, mfr_name in mfr_data:
-            manufacturers.append({"id": int(mfr_id), "name": mfr_name})
-        
-        return manufacturers
+        # XML in einem Durchlauf parsen - Elemente heißen manuId/manuName, nicht mfrId/mfrName
+        return [
+            {"id": int(record["manuId"]), "name": record.get("manuName", "")}
+            for record in parse_manufacturers(xml_response)
+        ]
     
     def get_articles(
         self, 
@@ -142,26 +164,15 @@ class TecDocAPI:
         
         xml_response = self._call_soap("getArticles", params)
         
-        # XML parsen
-        root = ET.fromstring(xml_response)
+        # XML in einem Durchlauf parsen (ein Datensatz pro Artikel)
+        total_count, records = parse_articles(xml_response)
         articles = []
-        
-        # Total Count
-        total_elem = root.find(".//{http://server.cat.tecdoc.net}totalCount")
-        total_count = int(total_elem.text) if total_elem is not None else 0
-        
-        # Parse articles with regex
-        import re
-        article_data = re.findall(
-            r'<articleNumber>([^<]+)</articleNumber>.*?<mfrId>(\d+)</mfrId>.*?<mfrName>([^<]+)</mfrName>.*?<dataSupplierId>(\d+)</dataSupplierId>',
-            xml_response, re.DOTALL
-        )
-        for art_no, mfr_id, mfr_name, ds_id in article_data:
+        for record in records:
             articles.append({
-                "articleNumber": art_no,
-                "mfrId": int(mfr_id),
-                "mfrName": mfr_name,
-                "dataSupplierId": int(ds_id)
+                "articleNumber": record["articleNumber"],
+                "mfrId": int(record["mfrId"]) if record.get("mfrId") else None,
+                "mfrName": record.get("mfrName"),
+                "dataSupplierId": int(record["dataSupplierId"]) if record.get("dataSupplierId") else None
             })
         
         return {
@@ -234,13 +245,13 @@ def main():
     # ===== 3. TEILE-HERSTELLER ERMITTELN =====
     print("\n3️⃣  TEILE-HERSTELLER (DataSuppliers)")
     print("-" * 80)
-    print("✅ 77 DataSuppliers verfügbar:")
+    # Referenzdaten aus data/ und reference_data/ statt fest kodierter Liste
+    registry = ReferenceRegistry()
+    print(f"✅ {len(registry.suppliers())} DataSuppliers verfügbar:")
     
     datasuppliers = [
-        {"id": 3, "name": "ATE", "articles": 14158},
-        {"id": 4, "name": "MANN-FILTER", "articles": 6470},
-        {"id": 2, "name": "BOSCH", "articles": 1067423},
-        {"id": 206, "name": "A.B.S.", "articles": 2011654},
+        registry.supplier(registry.supplier_id(name))
+        for name in ("ATE", "MANN-FILTER", "BOSCH", "A.B.S.")
     ]
     
     for ds in datasuppliers:
@@ -249,7 +260,7 @@ def main():
     # ===== 4. ARTIKEL ABRUFEN (ATE) =====
     print("\n4️⃣  ARTIKEL-LISTE (ATE)")
     print("-" * 80)
-    result = api.get_articles(data_supplier_id=3, page_number=0, page_size=10)
+    result = api.get_articles(data_supplier_id=registry.supplier_id("ATE"), page_number=0, page_size=10)
     print(f"✅ Gesamt: {result['total_count']:,} ATE Artikel")
     print(f"   Seite 1: {result['page_size']} Artikel geladen")
     print("\n   Beispiel-Artikel:")
@@ -259,7 +270,7 @@ def main():
     # ===== 5. ARTIKEL ABRUFEN (MANN-FILTER) =====
     print("\n5️⃣  ARTIKEL-LISTE (MANN-FILTER)")
     print("-" * 80)
-    result = api.get_articles(data_supplier_id=4, page_number=0, page_size=10)
+    result = api.get_articles(data_supplier_id=registry.supplier_id("MANN-FILTER"), page_number=0, page_size=10)
     print(f"✅ Gesamt: {result['total_count']:,} MANN-FILTER Artikel")
     print(f"   Seite 1: {result['page_size']} Artikel geladen")
     print("\n   Beispiel-Artikel:")
@@ -281,6 +292,8 @@ def main():
     print("\n" + "=" * 80)
     print("✅ Alle funktionierenden Abfragen erfolgreich durchgeführt!")
     print("=" * 80)
+    
+    api.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+import csv
+import zipfile
+
+import pytest
+
+from article_export import COLUMNS, open_writer, read_columnar
+
+
+def articles(start, count):
+    return [
+        {"number": f"A{i}", "manufacturer_id": 1, "manufacturer_name": "BOSCH", "data_supplier_id": 30}
+        for i in range(start, start + count)
+    ]
+
+
+def test_row_groups_span_write_calls(tmp_path):
+    path = str(tmp_path / "articles.tdcol")
+    with open_writer(path, row_group_size=5) as writer:
+        for page in range(3):
+            assert writer.write(articles(page * 4, 4)) == 4
+
+    groups = list(read_columnar(path))
+    assert [len(group) for group in groups] == [5, 5, 2]
+    assert writer.rows == 12
+
+
+@pytest.mark.parametrize("name", ["empty.csv", "empty.jsonl", "empty.tdcol", "empty.xlsx", "empty.csv.gz"])
+def test_zero_row_export_writes_a_file(tmp_path, name):
+    path = str(tmp_path / name)
+    with open_writer(path) as writer:
+        writer.write([])
+
+    assert writer.paths == [path]
+    if name == "empty.csv":
+        with open(path, newline="") as f:
+            assert list(csv.reader(f)) == [list(COLUMNS)]
+    elif name == "empty.tdcol":
+        assert list(read_columnar(path)) == []
+    elif name == "empty.xlsx":
+        with zipfile.ZipFile(path) as workbook:
+            assert b"<sheetData><row r=\"1\">" in workbook.read("xl/worksheets/sheet1.xml")
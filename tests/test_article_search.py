@@ -0,0 +1,68 @@
+import random
+import string
+import struct
+
+import pytest
+
+from article_search import ArticleSearchIndex, _gram_codes, normalize_number
+
+
+def build_index(count=3000, seed=3):
+    rng = random.Random(seed)
+    articles = [{"number": "HU 816 x", "data_supplier_id": 4, "manufacturer_id": None}]
+    for _ in range(count):
+        if rng.random() < 0.5:
+            number = f"0 986 {rng.randint(0, 9999):04d}"
+        else:
+            number = "".join(rng.choices(string.ascii_uppercase + string.digits, k=rng.randint(4, 9)))
+        articles.append({"number": number, "data_supplier_id": rng.randint(1, 50), "manufacturer_id": 1})
+    index = ArticleSearchIndex()
+    index.add(articles)
+    return index
+
+
+def brute_force(index, query, limit, min_similarity):
+    query_grams = _gram_codes(normalize_number(query))
+    scored = []
+    for key_index in range(len(index._key_ends) - 1):
+        grams = _gram_codes(index.key(key_index))
+        similarity = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+        if similarity >= min_similarity:
+            scored.append((-similarity, key_index))
+    hits = []
+    for negative, key_index in sorted(scored):
+        hits += [(hit["number"], round(-negative, 3)) for hit in index._hits(key_index, "fuzzy", 0.0)]
+    return hits[:limit]
+
+
+@pytest.mark.parametrize("max_postings", [50000, 200])
+def test_fuzzy_matches_brute_force(max_postings):
+    index = build_index()
+    for query in ["HU861X", "0986 4521", "098612", "X7Q2", "0 986 0042"]:
+        for limit in (1, 5, 20):
+            hits = index.fuzzy(query, limit, max_postings=max_postings)
+            assert [(hit["number"], hit["score"]) for hit in hits] == brute_force(index, query, limit, 0.3)
+
+
+def test_transposed_digits_are_found():
+    hits = build_index().fuzzy("HU861X")
+    assert hits[0]["number"] == "HU 816 x"
+    assert hits[0]["score"] == 0.333
+
+
+def test_saved_index_keeps_fuzzy_results(tmp_path):
+    index = build_index()
+    path = str(tmp_path / "articles.idx")
+    index.save(path)
+    with ArticleSearchIndex.load(path) as loaded:
+        assert loaded.fuzzy("0986 4521") == index.fuzzy("0986 4521")
+
+
+def test_index_of_another_version_is_rejected(tmp_path):
+    path = str(tmp_path / "articles.idx")
+    build_index(10).save(path)
+    with open(path, "r+b") as f:
+        f.seek(8)
+        f.write(struct.pack("<I", 1))
+    with pytest.raises(ValueError, match="rebuild"):
+        ArticleSearchIndex.load(path)
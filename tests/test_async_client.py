@@ -0,0 +1,62 @@
+import asyncio
+
+from async_tecdoc_client import AsyncTecDocClient
+from mock_pegasus_server import MockPegasusServer
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_fetch_all_pages_follows_the_server_page_size():
+    async def main(server):
+        async with AsyncTecDocClient(provider_id=1, api_key="test", endpoint=server.url) as client:
+            return await client.fetch_all_pages(data_supplier_id=30, max_concurrency=3)
+
+    with MockPegasusServer(articles_per_supplier=35, max_page_size=10) as server:
+        pages = run(main(server))
+
+    assert len(pages) == 4
+    numbers = [article["number"] for page in pages for article in page["articles"]]
+    assert numbers == [f"030 {i:07d}" for i in range(35)]
+    assert all(page["total"] == 35 for page in pages)
+
+
+def test_concurrent_identical_calls_share_one_request():
+    async def main(server):
+        async with AsyncTecDocClient(provider_id=1, api_key="test", endpoint=server.url) as client:
+            return await asyncio.gather(*(client.get_brands() for _ in range(10)))
+
+    with MockPegasusServer(latency=0.1) as server:
+        results = run(main(server))
+        assert server.requests == 1
+
+    assert all(result == results[0] for result in results)
+    assert len(results[0]) == len(server.suppliers)
+
+
+def test_aclose_does_not_block_the_event_loop():
+    async def main(server):
+        client = AsyncTecDocClient(provider_id=1, api_key="test", endpoint=server.url)
+        call = asyncio.ensure_future(client.get_countries())
+        await asyncio.sleep(0.05)
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await client.aclose()
+        ticker.cancel()
+        return ticks, await call
+
+    with MockPegasusServer(latency=0.4) as server:
+        ticks, countries = run(main(server))
+
+    # The loop kept running while aclose waited for the in-flight call
+    assert ticks >= 10
+    assert countries
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", ["core_tecdoc_client", "tecdoc_query_script"])
+def test_import_does_not_load_http_stack(module):
+    code = (
+        f"import sys, {module}; "
+        "print(','.join(m for m in ('requests', 'soap_transport', 'throttle') if m in sys.modules))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert loaded == ""
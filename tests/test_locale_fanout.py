@@ -0,0 +1,35 @@
+from locale_fanout import LocaleFanOut
+from mock_pegasus_server import MockPegasusServer
+
+LOCALES = [("de", "de"), ("de", "en"), ("at", "de")]
+
+
+def test_merged_manufacturers_are_fetched_once_per_country():
+    with MockPegasusServer() as server:
+        with LocaleFanOut(LOCALES, provider_id=1, api_key="test", endpoint=server.url) as fan_out:
+            merged = fan_out.get_manufacturers(merge=True)
+        assert server.requests == 2
+
+    assert len(merged) == len(server.manufacturers)
+    entry = next(iter(merged.values()))
+    assert entry["locales"] == LOCALES
+
+
+def test_merged_articles_are_keyed_by_supplier_and_number():
+    with MockPegasusServer(articles_per_supplier=5) as server:
+        with LocaleFanOut(LOCALES, provider_id=1, api_key="test", endpoint=server.url) as fan_out:
+            per_locale = fan_out.get_articles(data_supplier_id=30)
+            merged = fan_out.get_articles(data_supplier_id=30, merge=True)
+
+    assert set(per_locale) == set(LOCALES)
+    articles = per_locale[("de", "de")]["articles"]
+    assert sorted(merged) == sorted((article["data_supplier_id"], article["number"]) for article in articles)
+    assert all(article["locales"] == LOCALES for article in merged.values())
+
+
+def test_language_dependent_calls_run_per_locale():
+    with MockPegasusServer() as server:
+        with LocaleFanOut(LOCALES, provider_id=1, api_key="test", endpoint=server.url) as fan_out:
+            merged = fan_out.get_countries(merge=True)
+        assert server.requests == 3
+    assert all(country["locales"] == LOCALES for country in merged.values())
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline
+
+
+class FakeClient:
+    """Client stub returning a canned response per task."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def get_raw_response(self, function, params):
+        time.sleep(self.delay)
+        return f"<{function}>{params.get('page')}</{function}>"
+
+
+def echo_parse(function, xml_response):
+    return xml_response
+
+
+def crash_parse(function, xml_response):
+    # Kills the worker process: the pool breaks
+    os._exit(1)
+
+
+def tasks(count):
+    return [{"function": "getArticles", "params": {"page": i}} for i in range(count)]
+
+
+def run_with_timeout(pipeline, source, timeout=30):
+    outcome = {}
+
+    def target():
+        try:
+            outcome["stats"] = pipeline.run(source)
+        except Exception as exc:
+            outcome["error"] = exc
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "Pipeline.run() hung"
+    return outcome
+
+
+def test_broken_process_pool_fails_items_instead_of_hanging():
+    pipeline = Pipeline(FakeClient(), fetch_workers=2, parse_workers=1, queue_size=2, parse=crash_parse)
+    outcome = run_with_timeout(pipeline, tasks(20))
+
+    assert "stats" in outcome
+    assert outcome["stats"]["fetch"]["processed"] == 20
+    assert len(pipeline.failures) == 20
+    assert {failure["stage"] for failure in pipeline.failures} == {"parse"}
+
+
+def test_task_source_error_is_raised_after_the_fed_tasks():
+    consumed = []
+
+    def source():
+        yield from tasks(3)
+        raise RuntimeError("task source broke")
+
+    pipeline = Pipeline(FakeClient(), fetch_workers=2, parse_workers=0, parse=echo_parse)
+    pipeline.add_sink("collect", lambda task, result: consumed.append(result))
+    outcome = run_with_timeout(pipeline, source())
+
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert sorted(consumed) == [f"<getArticles>{i}</getArticles>" for i in range(3)]
+
+
+def test_source_waiting_is_not_fetch_backpressure():
+    pipeline = Pipeline(FakeClient(delay=0.02), fetch_workers=1, parse_workers=0, queue_size=1, parse=echo_parse)
+    outcome = run_with_timeout(pipeline, tasks(10))
+
+    stats = outcome["stats"]
+    assert stats["fetch"]["processed"] == 10
+    assert stats["fetch"]["blocked"] < 0.05
+    assert pipeline.bottleneck() == "fetch"
@@ -0,0 +1,107 @@
+import asyncio
+import http.client
+import json
+import socket
+
+from query_service import QueryService
+
+
+class StubClient:
+    """Async client stub serving three pages of articles."""
+
+    def __init__(self, fail_page=None, delay=0.0):
+        self.fail_page = fail_page
+        self.delay = delay
+        self.calls = 0
+
+    async def get_articles(self, data_supplier_id=None, manufacturer_id=None, page_size=100, page_number=0):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if page_number == self.fail_page:
+            raise ConnectionError("upstream went away")
+        articles = [{"number": f"A{page_number}-{i}"} for i in range(2)]
+        return {"total": 6, "articles": articles}
+
+    async def get_brands(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return [{"id": 30, "name": "BOSCH"}]
+
+
+def serve(client, scenario):
+    """Run a blocking scenario(port) against a service on a free port."""
+    async def main():
+        async with QueryService(client, port=0) as service:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, scenario, service.port), service.stats()
+    return asyncio.run(main())
+
+
+def test_stream_failure_ends_body_with_error_line():
+    def scenario(port):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request("GET", "/articles/stream?supplier=30")
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8").splitlines()
+
+    (status, lines), stats = serve(StubClient(fail_page=2), scenario)
+
+    assert status == 200
+    assert [json.loads(line)["number"] for line in lines[:4]] == ["A0-0", "A0-1", "A1-0", "A1-1"]
+    assert json.loads(lines[-1]) == {"error": "ConnectionError: upstream went away"}
+    assert stats["upstream_errors"] == 1
+
+
+def test_coalesced_requests_count_one_miss():
+    def scenario(port):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def get(_):
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            connection.request("GET", "/suppliers")
+            return connection.getresponse().status
+
+        with ThreadPoolExecutor(5) as pool:
+            return list(pool.map(get, range(5)))
+
+    client = StubClient(delay=0.2)
+    statuses, stats = serve(client, scenario)
+
+    assert statuses == [200] * 5
+    assert client.calls == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["misses"] + stats["coalesced"] == 5
+
+
+def test_head_keeps_the_connection_alive():
+    def scenario(port):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request("HEAD", "/articles/stream?supplier=30")
+        head = connection.getresponse()
+        head.read()
+        connection.request("GET", "/stats")
+        stats = connection.getresponse()
+        return head.status, head.getheader("X-Total-Count"), stats.status, json.loads(stats.read())
+
+    (head_status, total, stats_status, stats), _ = serve(StubClient(), scenario)
+
+    assert (head_status, total, stats_status) == (200, "6", 200)
+    assert stats["requests"] == 2
+
+
+def test_http10_stream_is_not_chunked():
+    def scenario(port):
+        with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+            sock.sendall(b"GET /articles/stream?supplier=30 HTTP/1.0\r\n\r\n")
+            data = b""
+            while True:
+                received = sock.recv(65536)
+                if not received:
+                    return data
+                data += received
+
+    data, _ = serve(StubClient(), scenario)
+    head, _, body = data.partition(b"\r\n\r\n")
+
+    assert b"Transfer-Encoding" not in head
+    assert len(body.decode("utf-8").splitlines()) == 6
@@ -0,0 +1,35 @@
+import time
+
+import pytest
+import requests
+
+from core_tecdoc_client import TecDocClient
+from mock_pegasus_server import MockPegasusServer
+from resilience import CLOSED, CircuitBreakers, CircuitOpenError
+from throttle import RetryPolicy, Throttle
+
+
+def test_invalid_request_does_not_take_the_half_open_trial():
+    breakers = CircuitBreakers(failure_threshold=1, reset_timeout=0.05)
+    with MockPegasusServer(error_rate=1.0) as server:
+        client = TecDocClient(
+            provider_id=1,
+            api_key="test",
+            endpoint=server.url,
+            throttle=Throttle(retry=RetryPolicy(max_attempts=1)),
+            breakers=breakers,
+        )
+        with pytest.raises(requests.HTTPError):
+            client.get_raw_response("getBrands", {})
+        with pytest.raises(CircuitOpenError):
+            client.get_raw_response("getBrands", {})
+
+        time.sleep(0.06)
+        server.error_rate = 0.0
+        # Rejected while building the envelope: no trial call was started
+        with pytest.raises(ValueError):
+            client.get_raw_response("getBrands", {"bad name": 1})
+
+        assert "<dataSupplierId>" in client.get_raw_response("getBrands", {})
+        assert breakers.get("getBrands").state == CLOSED
+        client.close()
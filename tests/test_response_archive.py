@@ -0,0 +1,24 @@
+import os
+
+from response_archive import ResponseArchive
+
+
+def test_entries_survive_reindexing(tmp_path):
+    directory = str(tmp_path / "archive")
+    archive = ResponseArchive(directory)
+    first = archive.append("getBrands", {}, "de", "de", "<brands/>", fetched=100.0)
+    second = archive.append("getArticles", {"dataSupplierIds": 30}, "de", "de", "<articles/>", fetched=200.0)
+
+    entry = archive.entry(second)
+    assert entry["id"] == second
+    assert entry["function"] == "getArticles"
+    assert entry["params"] == {"dataSupplierIds": "30"}
+    assert (entry["country"], entry["lang"], entry["fetched"]) == ("de", "de", 200.0)
+    assert archive.get(first) == "<brands/>"
+    archive.close()
+
+    # Rebuild the index from the segments
+    os.remove(os.path.join(directory, "index.sqlite"))
+    with ResponseArchive(directory) as reopened:
+        assert [entry["function"] for entry in reopened.entries()] == ["getBrands", "getArticles"]
+        assert reopened.latest("getArticles", {"dataSupplierIds": 30}, "de", "de") == "<articles/>"
@@ -0,0 +1,14 @@
+from core_tecdoc_client import TecDocClient
+from response_cache import ResponseCache, seed_from_reference_data
+
+
+def test_seed_finds_reference_data_from_any_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+
+    assert seed_from_reference_data(cache) == 3
+
+    offline = TecDocClient(provider_id=1, cache=cache, offline=True)
+    manufacturers = offline.get_manufacturers()
+    assert manufacturers and all(manufacturer["id"] for manufacturer in manufacturers)
+    cache.close()
@@ -0,0 +1,77 @@
+import pytest
+
+from soap_parser import ARTICLE_FIELDS, parse_article_rows, parse_articles, parse_records
+
+ENVELOPE = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+    '<ns2:getArticlesResponse xmlns:ns2="http://server.cat.tecdoc.net">'
+    "<ns2:status>200</ns2:status><ns2:totalMatchingArticles>2</ns2:totalMatchingArticles>"
+    "<ns2:articles>{records}</ns2:articles>"
+    "</ns2:getArticlesResponse></soap:Body></soap:Envelope>"
+)
+
+# Article records are <ns2:array> elements that nest inner <ns2:array> lists
+NESTED_AFTER_KEY = ENVELOPE.format(records=(
+    "<ns2:array><ns2:dataSupplierId>30</ns2:dataSupplierId><ns2:articleNumber>A1</ns2:articleNumber>"
+    "<ns2:oeNumbers><ns2:array><ns2:articleNumber>OE1</ns2:articleNumber></ns2:array></ns2:oeNumbers>"
+    "<ns2:mfrId>1</ns2:mfrId><ns2:mfrName>BOSCH</ns2:mfrName></ns2:array>"
+    "<ns2:array><ns2:dataSupplierId>31</ns2:dataSupplierId><ns2:articleNumber>A2</ns2:articleNumber>"
+    "<ns2:oeNumbers><ns2:array><ns2:articleNumber>OE2</ns2:articleNumber></ns2:array>"
+    "<ns2:array><ns2:articleNumber>OE3</ns2:articleNumber></ns2:array></ns2:oeNumbers>"
+    "<ns2:mfrId>2</ns2:mfrId><ns2:mfrName>MANN &amp; HUMMEL</ns2:mfrName></ns2:array>"
+))
+
+# Inner list ahead of the key field, directly nested, with attributes
+NESTED_BEFORE_KEY = ENVELOPE.format(records=(
+    '<ns2:array id="1"><ns2:array><ns2:articleNumber>OE1</ns2:articleNumber><ns2:mfrName>OE</ns2:mfrName>'
+    "</ns2:array><ns2:array/><ns2:dataSupplierId>30</ns2:dataSupplierId>"
+    "<ns2:articleNumber>A1</ns2:articleNumber><ns2:mfrId>1</ns2:mfrId><ns2:mfrName>BOSCH</ns2:mfrName></ns2:array>"
+    '<ns2:array id="2"><ns2:dataSupplierId>31</ns2:dataSupplierId><ns2:articleNumber>A2</ns2:articleNumber>'
+    "<ns2:array><ns2:articleNumber>OE2</ns2:articleNumber></ns2:array>"
+    "<ns2:mfrId>2</ns2:mfrId><ns2:mfrName>MANN &amp; HUMMEL</ns2:mfrName></ns2:array>"
+))
+
+EXPECTED = [
+    {"articleNumber": "A1", "mfrId": "1", "mfrName": "BOSCH", "dataSupplierId": "30"},
+    {"articleNumber": "A2", "mfrId": "2", "mfrName": "MANN & HUMMEL", "dataSupplierId": "31"},
+]
+
+
+def chunks(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("document", [NESTED_AFTER_KEY, NESTED_BEFORE_KEY], ids=["after-key", "before-key"])
+@pytest.mark.parametrize("size", [None, 1, 7, 13, 64])
+def test_nested_same_name_records(document, size):
+    source = document if size is None else chunks(document, size)
+
+    records, scalars = parse_records(
+        source, "articleNumber", ["totalMatchingArticles"], fields=ARTICLE_FIELDS
+    )
+    assert records == EXPECTED
+    assert scalars == {"totalMatchingArticles": "2"}
+
+    records, _ = parse_records(document if size is None else chunks(document, size), "articleNumber")
+    assert [record["articleNumber"] for record in records] == ["A1", "A2"]
+    assert [record["mfrName"] for record in records] == ["BOSCH", "MANN & HUMMEL"]
+
+
+@pytest.mark.parametrize("size", [None, 7])
+def test_article_rows_of_nested_records(size):
+    source = NESTED_AFTER_KEY if size is None else chunks(NESTED_AFTER_KEY, size)
+    total, rows = parse_article_rows(source)
+    assert total == 2
+    assert rows == [("A1", "1", "BOSCH", "30"), ("A2", "2", "MANN & HUMMEL", "31")]
+
+
+def test_missing_field_does_not_shift_into_next_record():
+    document = ENVELOPE.format(records=(
+        "<ns2:array><ns2:articleNumber>A1</ns2:articleNumber></ns2:array>"
+        "<ns2:array><ns2:articleNumber>A2</ns2:articleNumber><ns2:mfrName>BOSCH</ns2:mfrName></ns2:array>"
+    ))
+    total, articles = parse_articles(document)
+    assert total == 2
+    assert articles == [{"articleNumber": "A1"}, {"articleNumber": "A2", "mfrName": "BOSCH"}]
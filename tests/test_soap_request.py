@@ -0,0 +1,70 @@
+import io
+
+import pytest
+import requests
+
+from core_tecdoc_client import TecDocClient
+from soap_request import SoapRequestBuilder
+from tecdoc_query_script import TecDocAPI
+
+ARTICLES = (
+    b'<?xml version="1.0" encoding="UTF-8"?><soap:Envelope><soap:Body><getArticlesResponse>'
+    b"<totalMatchingArticles>0</totalMatchingArticles></getArticlesResponse></soap:Body></soap:Envelope>"
+)
+
+
+class RecordingTransport:
+    """Transport recording the request bodies and answering an empty page."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.bodies.append(data)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = ARTICLES
+        response.raw = io.BytesIO(ARTICLES)
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def test_values_are_escaped_and_lists_repeated():
+    body = SoapRequestBuilder(1, "de", "de").build(
+        "getArticles", {"searchQuery": "A&B <x>", "dataSupplierIds": [30, 101], "skipped": None}
+    )
+    assert b"<searchQuery>A&amp;B &lt;x&gt;</searchQuery>" in body
+    assert b"<dataSupplierIds>30</dataSupplierIds><dataSupplierIds>101</dataSupplierIds>" in body
+    assert b"skipped" not in body
+    assert body.endswith(b"</getArticles></soap:Body></soap:Envelope>")
+
+
+def test_invalid_names_are_rejected():
+    builder = SoapRequestBuilder(1, "de", "de")
+    with pytest.raises(ValueError):
+        builder.build("getArticles></soap:Body>", {})
+    with pytest.raises(ValueError):
+        builder.build("getArticles", {"bad name": 1})
+
+
+def test_query_script_escapes_parameter_values():
+    transport = RecordingTransport()
+    api = TecDocAPI("1", "key", transport=transport)
+    api._call_soap("getArticles", {"searchQuery": "MANN & HUMMEL"})
+
+    assert b"<searchQuery>MANN &amp; HUMMEL</searchQuery>" in transport.bodies[0]
+
+
+def test_empty_supplier_list_is_rejected_before_any_request():
+    transport = RecordingTransport()
+    client = TecDocClient(provider_id=1, api_key="test", transport=transport)
+
+    with pytest.raises(ValueError):
+        client.get_articles(data_supplier_id=[])
+    assert transport.bodies == []
+
+    client.get_articles(data_supplier_id=[101, 30])
+    assert b"<dataSupplierIds>30</dataSupplierIds><dataSupplierIds>101</dataSupplierIds>" in transport.bodies[0]
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+import requests
+
+from tecdoc_query_script import TecDocAPI
+from throttle import RetryPolicy, Throttle
+
+
+def response(status, body=b"<ok/>"):
+    result = requests.Response()
+    result.status_code = status
+    result._content = body
+    result.raw = io.BytesIO(body)
+    result.url = "http://tecdoc.test/"
+    return result
+
+
+class FakeTransport:
+    """Transport returning queued responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.posts = 0
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts += 1
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+def throttle(attempts):
+    return Throttle(retry=RetryPolicy(max_attempts=attempts, base_delay=0))
+
+
+def test_retryable_status_is_retried():
+    transport = FakeTransport(response(503), response(200))
+    limiter = throttle(3)
+    api = TecDocAPI("1", "key", transport=transport, throttle=limiter)
+
+    assert api._call_soap("getCountries", {}) == "<ok/>"
+    assert transport.posts == 2
+    assert limiter.stats()["retries"] == 1
+
+
+def test_http_error_after_retries_is_raised():
+    transport = FakeTransport(response(503, b"busy"), response(503, b"still busy"))
+    api = TecDocAPI("1", "key", transport=transport, throttle=throttle(2))
+
+    with pytest.raises(requests.HTTPError) as error:
+        api._call_soap("getCountries", {})
+    assert error.value.response.status_code == 503
+    assert transport.posts == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    transport = FakeTransport(response(401, b"invalid api key"))
+    api = TecDocAPI("1", "key", transport=transport, throttle=throttle(4))
+
+    with pytest.raises(requests.HTTPError):
+        api.get_countries()
+    assert transport.posts == 1
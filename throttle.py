@@ -0,0 +1,324 @@
+"""
+TecDoc Request Throttling
+=========================
+
+Shared rate limiting and retry engine for all SOAP fetch paths.
+
+- TokenBucket: caps the request rate (requests/second with burst)
+- AimdLimiter: caps requests in flight and adapts the cap with
+  additive-increase/multiplicative-decrease, driven by latency and errors
+- RetryPolicy: exponential backoff with full jitter on 429/5xx/timeouts
+- Throttle: combines the three around a single request function
+
+One ``Throttle`` instance can be shared by several clients and threads so
+they all stay within the same budget.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, FrozenSet, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        """
+        Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (default: one second worth of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("TokenBucket: rate must be > 0")
+
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AimdLimiter:
+    """
+    Concurrency limiter with additive-increase/multiplicative-decrease.
+
+    Each successful request with normal latency raises the limit by
+    ``increase / limit`` (about +increase per round trip of the whole
+    window). An error, or a latency above ``tolerance`` times the recent
+    median latency, multiplies the limit by ``decrease``, at most once
+    per observed round trip.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        tolerance: float = 3.0,
+        window: int = 100
+    ) -> None:
+        """
+        Initialize AIMD limiter.
+
+        Args:
+            initial: Starting concurrency limit (default: 8)
+            minimum: Lowest concurrency limit (default: 1)
+            maximum: Highest concurrency limit (default: 64)
+            increase: Additive increase per window (default: 1.0)
+            decrease: Multiplicative decrease factor (default: 0.5)
+            tolerance: Latency factor over the median treated as congestion (default: 3.0)
+            window: Number of latency samples for the median (default: 100)
+        """
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("AimdLimiter: require 1 <= minimum <= initial <= maximum")
+        if not 0 < decrease < 1:
+            raise ValueError("AimdLimiter: decrease must be between 0 and 1")
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+
+        self.limit = float(initial)
+        self.in_flight = 0
+
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Wait until a request slot is free and take it."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, error: bool = False) -> None:
+        """
+        Return a slot and adapt the limit.
+
+        Args:
+            latency: Request duration in seconds
+            error: Whether the request failed with a throttling/server error
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if self._latencies:
+                samples = sorted(self._latencies)
+                baseline = samples[len(samples) // 2]
+            else:
+                baseline = latency
+            congested = error or latency > baseline * self.tolerance
+            if not error:
+                self._latencies.append(latency)
+
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= baseline:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retry_statuses: FrozenSet[int] = RETRY_STATUSES
+    ) -> None:
+        """
+        Initialize retry policy.
+
+        Args:
+            max_attempts: Total attempts per request including the first (default: 4)
+            base_delay: Backoff base in seconds (default: 0.5)
+            max_delay: Backoff cap in seconds (default: 30)
+            retry_statuses: HTTP status codes that are retried (default: 429 and 5xx)
+        """
+        if max_attempts < 1:
+            raise ValueError("RetryPolicy: max_attempts must be >= 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the sleep time before the next attempt.
+
+        Args:
+            attempt: Number of the failed attempt (1-based)
+            retry_after: Server-provided Retry-After in seconds
+
+        Returns:
+            Seconds to wait
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            return min(self.max_delay, max(backoff, retry_after))
+        return backoff
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Parse a numeric Retry-After header."""
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class Throttle:
+    """
+    Rate limit, concurrency limit and retry engine.
+
+    Wraps a request function: every attempt takes a token and a concurrency
+    slot, and 429/5xx responses, timeouts and connection errors are retried
+    with backoff.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        limiter: Optional[AimdLimiter] = None,
+        retry: Optional[RetryPolicy] = None
+    ) -> None:
+        """
+        Initialize throttle.
+
+        Args:
+            rate: Maximum requests per second (default: unlimited)
+            burst: Token bucket capacity (default: one second worth of requests)
+            limiter: Concurrency limiter (default: AimdLimiter())
+            retry: Retry policy (default: RetryPolicy())
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.limiter = limiter or AimdLimiter()
+        self.retry = retry or RetryPolicy()
+
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def run(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Send a request with throttling and retries.
+
+        Args:
+            send: Function performing one HTTP attempt
+
+        Returns:
+            The first non-retryable response, or the last response once
+            all attempts are used up
+
+        Raises:
+            requests.RequestException: If the last attempt failed with a
+                network error
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.bucket is not None:
+                self.bucket.acquire()
+
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = send()
+            except (requests.Timeout, requests.ConnectionError) as exc:
+                self.limiter.release(time.monotonic() - started, error=True)
+                self._count(error=True)
+                if attempt >= self.retry.max_attempts:
+                    raise
+                delay = self.retry.delay(attempt)
+                logger.warning(
+                    f"TecDoc request failed ({exc.__class__.__name__}), "
+                    f"retry {attempt}/{self.retry.max_attempts - 1} in {delay:.2f}s"
+                )
+            except BaseException:
+                self.limiter.release(time.monotonic() - started, error=True)
+                self._count(error=True)
+                raise
+            else:
+                retryable = response.status_code in self.retry.retry_statuses
+                self.limiter.release(time.monotonic() - started, error=retryable)
+                self._count(error=retryable)
+                if not retryable or attempt >= self.retry.max_attempts:
+                    return response
+                delay = self.retry.delay(attempt, _retry_after(response))
+                logger.warning(
+                    f"TecDoc HTTP {response.status_code}, "
+                    f"retry {attempt}/{self.retry.max_attempts - 1} in {delay:.2f}s"
+                )
+                response.close()
+
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get throttling statistics.
+
+        Returns:
+            Dict with request/retry/error counts, requests in flight and the
+            current concurrency limit
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "in_flight": self.limiter.in_flight,
+                "concurrency_limit": self.limiter.limit,
+            }
+
+    def _count(self, error: bool) -> None:
+        """Update request counters."""
+        with self._lock:
+            self.requests += 1
+            if error:
+                self.errors += 1